@@ -1,34 +1,87 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_mailman import Mail
 from flask_wtf.csrf import CSRFProtect
 
 from app.config import Config
+from app.routing import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 mail = Mail()
 csrf = CSRFProtect()
 
+
+def __getattr__(name):
+    # `from app import migrate` は従来どおり使えるようにし、Flask-Migrate（alembic）は初回参照時に読み込む
+    if name == 'migrate':
+        from flask_migrate import Migrate
+        globals()['migrate'] = Migrate(db=db)
+        return globals()['migrate']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # リバースプロキシの背後では送信元IPを X-Forwarded-For から復元する
+    if app.config.get('PROXY_FIX_X_FOR'):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config['PROXY_FIX_X_FOR']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     # Initialize extensions with app
+    from app import routing
+    routing.init_app(app, db)
     db.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
     mail.init_app(app)
     csrf.init_app(app)
 
+    from app.repository.user_cache import user_cache
+    user_cache.init_app(app)
+
+    from app.repository.username_index import username_index
+    username_index.init_app(app)
+
+    from app.repository.follow_graph import follow_graph
+    follow_graph.init_app(app)
+
+    from app.pubsub import timeline_stream
+    timeline_stream.init_app(app)
+
+    from app.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
+
+    from app.services.fragment_cache import post_fragment_cache
+    post_fragment_cache.init_app(app)
+
+    from app.repository.last_seen_buffer import last_seen_buffer
+    last_seen_buffer.init_app(app)
+
+    from app.assets import static_assets
+    static_assets.init_app(app)
+
+    from app.metrics import metrics
+    metrics.init_app(app)
+
+    from app.profiling import request_profiler
+    request_profiler.init_app(app)
+
     # Set up login view
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
 
+    # Record user activity (written in batches by last_seen_buffer)
+    @app.before_request
+    def record_last_seen():
+        from flask_login import current_user
+        if current_user.is_authenticated:
+            current_user.update_last_seen()
+
     # Register blueprints
     from app.routes.auth import bp as auth_bp
     app.register_blueprint(auth_bp)
@@ -36,14 +89,30 @@ def create_app(config_class=Config):
     from app.routes.timeline import bp as timeline_bp
     app.register_blueprint(timeline_bp)
 
+    from app.routes.search import bp as search_bp
+    app.register_blueprint(search_bp)
+
+    from app.routes.users import bp as users_bp
+    app.register_blueprint(users_bp)
+
+    # CLI commands (Flask-Migrate's `flask db` is loaded on first use to keep alembic out of worker startup)
+    from app.cli import register_commands
+    register_commands(app)
+
     # Shell context
     @app.shell_context_processor
     def make_shell_context():
         return {
             'db': db,
-            'User': User
+            'User': User,
+            'Post': Post
         }
 
     return app
 
-from app.models.user import User
+from app.models.user import User, Post
+from app.models.timeline import TimelineEntry
+from app.models.email_outbox import EmailOutbox
+from app.models.search import PostSearchTerm
+from app.models.follow import Follow
+from app.models.notification import Notification
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict
+
+from flask import current_app, request
+from jinja2 import FileSystemBytecodeCache
+
+
+# フィンガープリント付きの静的ファイルを出力するディレクトリ（static フォルダからの相対パス）
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# ファイル名に付けるハッシュの桁数
+HASH_LENGTH = 12
+
+
+def fingerprint_name(filename: str, content: bytes) -> str:
+    """内容のハッシュを付けたファイル名を生成
+
+    Args:
+        filename: 元のファイル名（例: css/style.css）
+        content: ファイルの内容
+
+    Returns:
+        ハッシュ付きのファイル名（例: css/style.0123456789ab.css）
+    """
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+def build_static_assets(static_folder: str) -> Dict[str, str]:
+    """静的ファイルをハッシュ付きの名前で dist にコピーし、対応表を書き出す
+
+    dist は毎回作り直す。CSS内の url() などファイル内の参照は書き換えない。
+
+    Args:
+        static_folder: static フォルダのパス
+
+    Returns:
+        {元のファイル名: ハッシュ付きのファイル名}（static フォルダからの相対パス）
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest: Dict[str, str] = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if not (root == static_folder and d == DIST_DIR))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                content = f.read()
+            hashed = f'{DIST_DIR}/{fingerprint_name(filename, content)}'
+            target = os.path.join(static_folder, *hashed.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(path, target)
+            manifest[filename] = hashed
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder: str) -> Dict[str, str]:
+    """build_static_assets で書き出した対応表を読み込む（ない場合は空）"""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class StaticAssets:
+    """本番用のテンプレートと静的ファイルの設定
+
+    PRODUCTION_MODE の場合、テンプレートのバイトコードを TEMPLATE_BYTECODE_CACHE_DIR に
+    保存してワーカー間で共有し、`url_for('static', ...)` を `flask assets build` で作成した
+    ハッシュ付きのファイル名に置き換える。ハッシュ付きのファイルは内容が変わらないため、
+    immutable として長期間キャッシュさせる。
+    """
+
+    def init_app(self, app) -> None:
+        manifest: Dict[str, str] = {}
+        if app.config.get('PRODUCTION_MODE'):
+            cache_dir = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+                app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+            if app.static_folder:
+                manifest = load_manifest(app.static_folder)
+        app.extensions['static_assets'] = manifest
+
+        app.url_defaults(self._fingerprint_url)
+        app.after_request(self._cache_headers)
+
+    @staticmethod
+    def _fingerprint_url(endpoint: str, values: dict) -> None:
+        if endpoint != 'static':
+            return
+        hashed = current_app.extensions['static_assets'].get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+    @staticmethod
+    def _cache_headers(response):
+        if request.endpoint == 'static' and response.status_code in (200, 304):
+            filename = (request.view_args or {}).get('filename', '')
+            if filename.startswith(f'{DIST_DIR}/'):
+                max_age = current_app.config.get('STATIC_MAX_AGE', 31536000)
+                response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+        return response
+
+    def warm_templates(self, app) -> int:
+        """全てのテンプレートをコンパイルしてバイトコードキャッシュに保存
+
+        Args:
+            app: アプリケーション
+
+        Returns:
+            コンパイルしたテンプレートの数
+        """
+        names = app.jinja_env.list_templates()
+        for name in names:
+            app.jinja_env.get_template(name)
+        return len(names)
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,160 @@
+import json
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class MemoryCache:
+    """プロセス内のTTL付きLRUキャッシュ
+
+    最大件数、または max_bytes を指定した場合は合計サイズを超えると、
+    最も長く使われていないエントリから削除する。
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 60.0,
+                 max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        # キー -> (有効期限, 値, サイズ)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """キーに対応する値を取得（期限切れの場合はNone）"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """値を保存"""
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        size = _sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """値を削除"""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """全ての値を削除"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数などの統計情報を取得"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._data),
+            'bytes': self._bytes,
+        }
+
+
+def _sizeof(value: Any) -> int:
+    """キャッシュする値のおおよそのバイト数"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class RedisCache:
+    """Redis等の共有キャッシュサービスを使うキャッシュ
+
+    値はJSONで保存するため、JSONに変換できる値のみ扱える。
+    redis パッケージはこのバックエンドを使う場合のみ必要。
+    """
+
+    def __init__(self, url: str, namespace: str, default_ttl: float = 60.0):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("共有キャッシュを使用するには redis パッケージをインストールしてください")
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    def get(self, key: str) -> Optional[Any]:
+        """キーに対応する値を取得（期限切れの場合はNone）"""
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """値を保存"""
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self._key(key), json.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str) -> None:
+        """値を削除"""
+        self.client.delete(self._key(key))
+
+    def clear(self) -> None:
+        """名前空間内の全ての値を削除"""
+        for key in self.client.scan_iter(match=self._key('*')):
+            self.client.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数などの統計情報を取得"""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': 0, 'entries': -1, 'bytes': -1}
+
+
+def create_cache(url: Optional[str], namespace: str, max_entries: int, default_ttl: float,
+                 max_bytes: Optional[int] = None):
+    """設定に応じたキャッシュバックエンドを作成
+
+    Args:
+        url: 共有キャッシュのURL（省略時はプロセス内キャッシュ）
+        namespace: 共有キャッシュ上のキーの接頭辞
+        max_entries: プロセス内キャッシュの最大件数
+        default_ttl: 既定の有効期間（秒）
+        max_bytes: プロセス内キャッシュの合計サイズの上限（バイト、省略可）
+
+    Returns:
+        キャッシュバックエンド
+    """
+    if url:
+        return RedisCache(url, namespace, default_ttl)
+    return MemoryCache(max_entries, default_ttl, max_bytes)
@@ -0,0 +1,233 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup, ScriptInfo, with_appcontext
+
+from app.repository.email_outbox_repository import EmailOutboxRepository
+
+
+outbox_cli = AppGroup('outbox', help='メールアウトボックスの操作')
+
+
+@outbox_cli.command('worker')
+@click.option('--concurrency', default=4, show_default=True, help='並列送信数')
+@click.option('--batch-size', default=50, show_default=True, help='1回に取得する件数')
+@click.option('--poll-interval', default=1.0, show_default=True, help='待機間隔（秒）')
+@click.option('--once', is_flag=True, help='1バッチのみ処理して終了')
+def outbox_worker(concurrency, batch_size, poll_interval, once):
+    """アウトボックスのメールを送信するワーカーを起動"""
+    from app.services.email_worker import EmailOutboxWorker
+
+    worker = EmailOutboxWorker(current_app._get_current_object(), concurrency=concurrency,
+                               batch_size=batch_size, poll_interval=poll_interval)
+    if once:
+        sent, failed = worker.run_once()
+        click.echo(f"送信 {sent} 件, 失敗 {failed} 件")
+        return
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        click.echo("ワーカーを停止しました")
+
+
+@outbox_cli.command('stats')
+def outbox_stats():
+    """状態ごとの件数を表示"""
+    counts = EmailOutboxRepository.count_by_status()
+    for status in ('pending', 'sent', 'dead'):
+        click.echo(f"{status}: {counts.get(status, 0)}")
+
+
+@outbox_cli.command('requeue-dead')
+def outbox_requeue_dead():
+    """デッドレターのメールを再送信待ちに戻す"""
+    count = EmailOutboxRepository.requeue_dead()
+    click.echo(f"{count} 件を再送信待ちに戻しました")
+
+
+@click.command('purge')
+@click.option('--batch-size', default=500, show_default=True, help='1バッチで処理する最大件数')
+@click.option('--pause', default=0.1, show_default=True, help='バッチ間の待機時間（秒）')
+@click.option('--unverified-days', type=int, default=None,
+              help='未検証ユーザーを削除するまでの日数（省略時は PURGE_UNVERIFIED_AFTER）')
+@with_appcontext
+def purge(batch_size, pause, unverified_days):
+    """放置された未検証ユーザーと期限切れの検証トークンを削除"""
+    from datetime import timedelta
+    from app.repository.user_repository import UserRepository
+    from app.services.purge_service import PurgeService
+
+    unverified_after = timedelta(days=unverified_days) if unverified_days is not None else None
+    deleted_users, cleared_tokens = PurgeService(UserRepository()).purge(
+        batch_size=batch_size, pause=pause, unverified_after=unverified_after)
+    click.echo(f"未検証ユーザー {deleted_users} 件, 期限切れトークン {cleared_tokens} 件を削除しました")
+
+
+search_cli = AppGroup('search', help='投稿の検索索引の操作')
+
+
+@search_cli.command('reindex')
+@click.option('--batch-size', default=500, show_default=True, help='1バッチで処理する最大件数')
+def search_reindex(batch_size):
+    """全ての投稿の検索索引を作り直す"""
+    from app.repository.search_repository import SearchRepository
+
+    last_id, count = 0, 0
+    while True:
+        next_id = SearchRepository.reindex_posts(last_id, batch_size)
+        if next_id == last_id:
+            break
+        last_id = next_id
+        count += 1
+    click.echo(f"{count} バッチの索引を作り直しました（最後の投稿ID: {last_id}）")
+
+
+notifications_cli = AppGroup('notifications', help='通知の操作')
+
+
+@notifications_cli.command('digest')
+@click.option('--batch-size', type=int, default=None,
+              help='1バッチで処理するユーザー数（省略時は NOTIFICATION_DIGEST_BATCH_SIZE）')
+def notifications_digest(batch_size):
+    """送信時期になったユーザーに通知のダイジェストメールを送信（cron などで定期的に実行する）"""
+    from app.repository.notification_repository import NotificationRepository
+    from app.repository.user_repository import UserRepository
+    from app.services.email_service import EmailService
+    from app.services.notification_service import NotificationService
+
+    service = NotificationService(NotificationRepository(), UserRepository(), EmailService())
+    sent = service.send_digests(batch_size=batch_size)
+    click.echo(f"ダイジェスト {sent} 件を送信しました")
+
+
+assets_cli = AppGroup('assets', help='テンプレートと静的ファイルの本番用ビルド')
+
+
+@assets_cli.command('build')
+@click.option('--skip-templates', is_flag=True, help='テンプレートのバイトコードを作成しない')
+def assets_build(skip_templates):
+    """静的ファイルにハッシュ付きの名前を付け、テンプレートをバイトコードキャッシュに保存"""
+    from app.assets import build_static_assets, static_assets
+
+    app = current_app._get_current_object()
+    manifest = build_static_assets(app.static_folder)
+    click.echo(f"静的ファイル {len(manifest)} 件にハッシュを付けました")
+    if skip_templates:
+        return
+    if app.jinja_env.bytecode_cache is None:
+        click.echo("PRODUCTION_MODE が無効なため、テンプレートのバイトコードは作成しません")
+        return
+    count = static_assets.warm_templates(app)
+    click.echo(f"テンプレート {count} 件をコンパイルしました（{app.config['TEMPLATE_BYTECODE_CACHE_DIR']}）")
+
+
+@click.command('startup-report')
+@click.option('--runs', default=3, show_default=True, help='起動時間を計測する回数')
+@click.option('--top', default=15, show_default=True, help='表示するパッケージ数')
+@click.option('--budget-ms', type=float, default=None,
+              help='起動時間の上限（ミリ秒、省略時は STARTUP_BUDGET_MS）')
+@with_appcontext
+def startup_report(runs, top, budget_ms):
+    """新しいプロセスでの起動時間と読み込みの内訳を表示（上限を超えた場合は終了コード1）"""
+    from app.startup import measure_cold_start
+
+    budget_ms = budget_ms if budget_ms is not None else current_app.config['STARTUP_BUDGET_MS']
+    report = measure_cold_start(runs=runs)
+
+    click.echo(f"{'package':<40}{'ms':>10}")
+    for name, elapsed in report.imports_ms[:top]:
+        click.echo(f"{name:<40}{elapsed:>10.1f}")
+    timings = ', '.join(f"{elapsed:.0f}" for elapsed in report.timings_ms)
+    click.echo(f"\n起動時間: 中央値 {report.median_ms:.0f} ms（{timings}）, 上限 {budget_ms:.0f} ms")
+
+    if report.median_ms > budget_ms:
+        raise click.ClickException("起動時間が上限を超えています")
+
+
+profile_cli = AppGroup('profile', help='リクエストのプロファイルの操作')
+
+
+@profile_cli.command('aggregate')
+@click.option('--endpoint', default=None, help='集計するエンドポイント（省略時は全て）')
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help='集計したスタックを collapsed 形式で書き出すファイル（flamegraph.pl などで描画できる）')
+@click.option('--top', default=20, show_default=True, help='表示する関数の数')
+def profile_aggregate(endpoint, output, top):
+    """記録したスタックを集計し、サンプル数の多い関数を表示"""
+    from app.profiling import aggregate_profiles, top_functions
+
+    stacks = aggregate_profiles(current_app.config['PROFILE_DIR'], endpoint)
+    if not stacks:
+        click.echo("記録されたプロファイルはありません")
+        return
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+    total = sum(stacks.values())
+    click.echo(f"{'self':>8}{'total':>8}  function（全 {total} サンプル）")
+    for frame, own, cumulative in top_functions(stacks, top):
+        click.echo(f"{own / total:>8.1%}{cumulative / total:>8.1%}  {frame}")
+
+
+query_plan_cli = AppGroup('query-plan', help='問い合わせの実行計画の検査')
+
+
+@query_plan_cli.command('check')
+@click.option('--verbose', is_flag=True, help='全ての問い合わせの実行計画を表示')
+def query_plan_check(verbose):
+    """リポジトリの問い合わせが全件走査していないかを検査（全件走査がある場合は終了コード1）"""
+    from app.query_plans import check_query_plans
+
+    results = check_query_plans()
+    for result in results:
+        if not result.plans:
+            status = 'SQLなし'
+        elif result.sequential_scans:
+            status = f"全件走査: {', '.join(sorted(set(result.sequential_scans)))}"
+        else:
+            status = 'OK'
+        click.echo(f"{result.name}: {status}")
+        if verbose or not result.ok:
+            for plan in result.plans:
+                for line in plan:
+                    click.echo(f"    {line}")
+
+    if any(result.sequential_scans for result in results):
+        raise click.ClickException("全件走査している問い合わせがあります")
+
+
+class MigrateGroup(click.Group):
+    """Flask-Migrate の `flask db` コマンドを初回利用時に読み込むグループ
+
+    Flask-Migrate は読み込み時に alembic を読み込むため、Webワーカーの起動時には読み込まない。
+    """
+
+    def list_commands(self, ctx):
+        return self._group(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._group(ctx).get_command(ctx, name)
+
+    @staticmethod
+    def _group(ctx):
+        from flask_migrate.cli import db as migrate_group
+        from app import migrate
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if 'migrate' not in app.extensions:
+            migrate.init_app(app)
+        return migrate_group
+
+
+def register_commands(app):
+    """CLIコマンドをアプリケーションに登録"""
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(purge)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(profile_cli)
+    app.cli.add_command(query_plan_cli)
+    app.cli.add_command(startup_report)
+    app.cli.add_command(MigrateGroup('db', help='データベースのマイグレーション（Flask-Migrate）'))
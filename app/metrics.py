@@ -0,0 +1,198 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+from flask import Response, current_app, g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+
+# レイテンシ用のヒストグラムのバケット境界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# ヒット数などを公開するキャッシュ（app.extensions のキー）
+CACHE_EXTENSIONS = ('user_cache', 'post_fragment_cache')
+
+
+def _format_labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in pairs)
+    return '{' + body + '}'
+
+
+class Counter:
+    """ラベルごとに値を加算するカウンタ"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(labels)} {value}')
+        return lines
+
+
+class Histogram:
+    """ラベルごとに観測値の分布を記録するヒストグラム"""
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # ラベル -> [バケットごとの件数..., 合計値, 件数]
+        self._values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(labels, list(data)) for labels, data in self._values.items()]
+        for labels, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(labels, [("le", "+Inf")])} {data[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {data[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {data[-1]}')
+        return lines
+
+
+class Metrics:
+    """リクエスト・SQL・テンプレート・メール送信の計測
+
+    METRICS_ENABLED が有効な場合のみフックを登録し、/metrics で
+    Prometheus のテキスト形式で公開する。無効な場合は何も登録しない。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.request_duration = Histogram(
+            'flask_sns_request_duration_seconds', 'エンドポイントごとのリクエスト処理時間')
+        self.sql_statements = Counter(
+            'flask_sns_sql_statements_total', 'エンドポイントごとのSQL文の実行数')
+        self.sql_duration = Counter(
+            'flask_sns_sql_duration_seconds_total', 'エンドポイントごとのSQL実行時間の合計')
+        self.template_duration = Histogram(
+            'flask_sns_template_render_seconds', 'テンプレートごとの描画時間')
+        self.email_duration = Histogram(
+            'flask_sns_email_send_seconds', 'バックエンドごとのメール送信時間')
+
+    def init_app(self, app) -> None:
+        if not app.config.get('METRICS_ENABLED', False):
+            return
+        self.enabled = True
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+        with app.app_context():
+            from app import db
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self._metrics_view)
+
+    def observe_email(self, backend: str, seconds: float) -> None:
+        """メール送信時間を記録"""
+        if self.enabled:
+            self.email_duration.observe(seconds, backend=backend)
+
+    def render(self) -> str:
+        """Prometheus のテキスト形式で出力"""
+        lines = []
+        for metric in (self.request_duration, self.sql_statements, self.sql_duration,
+                       self.template_duration, self.email_duration):
+            lines.extend(metric.render())
+
+        for key in ('hits', 'misses', 'evictions'):
+            lines.append(f'# TYPE flask_sns_cache_{key}_total counter')
+            for name in CACHE_EXTENSIONS:
+                cache = current_app.extensions.get(name)
+                if cache is not None:
+                    lines.append(f'flask_sns_cache_{key}_total{{cache="{name}"}} {cache.stats()[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def _before_request():
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql_count = 0
+        g._metrics_sql_time = 0.0
+
+    def _after_request(self, response):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or 'unknown'
+        self.request_duration.observe(
+            time.perf_counter() - start, endpoint=endpoint, method=request.method,
+            status=str(response.status_code))
+        self.sql_statements.inc(g.pop('_metrics_sql_count', 0), endpoint=endpoint)
+        self.sql_duration.inc(g.pop('_metrics_sql_time', 0.0), endpoint=endpoint)
+        return response
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('_metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if has_request_context() and '_metrics_start' in g:
+            g._metrics_sql_count += 1
+            g._metrics_sql_time += elapsed
+        else:
+            self.sql_statements.inc(1, endpoint='background')
+            self.sql_duration.inc(elapsed, endpoint='background')
+
+    @staticmethod
+    def _before_render(sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault('_metrics_render_starts', []).append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if has_request_context():
+            starts = g.get('_metrics_render_starts')
+            if starts:
+                self.template_duration.observe(
+                    time.perf_counter() - starts.pop(), template=template.name or 'string')
+
+
+metrics = Metrics()
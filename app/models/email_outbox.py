@@ -0,0 +1,40 @@
+from datetime import datetime
+import json
+from app import db
+
+
+class EmailOutbox(db.Model):
+    """送信待ちメール（アウトボックス）モデル"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipients_json = db.Column(db.Text, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text)
+
+    # 配信状態
+    status = db.Column(db.String(16), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    @property
+    def recipients(self):
+        return json.loads(self.recipients_json)
+
+    @recipients.setter
+    def recipients(self, value):
+        self.recipients_json = json.dumps(list(value))
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status}>'
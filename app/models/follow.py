@@ -0,0 +1,17 @@
+from datetime import datetime
+from app import db
+
+
+class Follow(db.Model):
+    """フォロー関係（follower_id のユーザーが followee_id のユーザーをフォロー）"""
+    __tablename__ = 'follow'
+    __table_args__ = (
+        db.Index('ix_follow_followee_follower', 'followee_id', 'follower_id'),
+    )
+
+    follower_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    followee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Follow {self.follower_id} -> {self.followee_id}>'
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from app import db
+
+
+# 通知メールの頻度ごとのまとめる期間（'off' の場合は通知を記録しない）
+DIGEST_WINDOWS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+FREQUENCY_OFF = 'off'
+NOTIFICATION_FREQUENCIES = tuple(DIGEST_WINDOWS) + (FREQUENCY_OFF,)
+
+
+class Notification(db.Model):
+    """ユーザーへの通知（一定期間ごとにまとめてダイジェストメールで送信する）"""
+    __tablename__ = 'notification'
+    __table_args__ = (
+        # 未送信の通知のみを対象とする部分インデックス
+        db.Index('ix_notification_pending_user_created', 'user_id', 'created_at',
+                 postgresql_where=db.text('digested_at IS NULL'),
+                 sqlite_where=db.text('digested_at IS NULL')),
+    )
+
+    KIND_FOLLOW = 'follow'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(32), nullable=False)
+    # 通知のきっかけとなったユーザー（フォローしたユーザーなど）
+    actor_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # ダイジェストに含めた日時（未送信の場合はNone）
+    digested_at = db.Column(db.DateTime)
+
+    actor = db.relationship('User', foreign_keys=[actor_id])
+
+    def __repr__(self):
+        return f'<Notification {self.id} {self.kind} for User {self.user_id}>'
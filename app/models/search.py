@@ -0,0 +1,182 @@
+import sqlite3
+import unicodedata
+from typing import Dict, List
+
+from sqlalchemy import DDL, event
+
+from app import db
+from app.models.user import Post
+
+
+def normalize_text(text: str) -> str:
+    """検索用に文字列を正規化（全角英数の半角化・小文字化）"""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def ngram_counts(text: str) -> Dict[str, int]:
+    """本文を索引用の語（2文字のn-gram）ごとの出現回数に分解
+
+    空白で区切られた語ごとに2文字ずつ切り出す。各語の末尾の1文字も
+    1文字の語として含め、1文字での検索（前方一致）にも使えるようにする。
+
+    Args:
+        text: 投稿本文
+
+    Returns:
+        {語: 出現回数}
+    """
+    counts: Dict[str, int] = {}
+    for word in normalize_text(text).split():
+        grams = [word[i:i + 2] for i in range(len(word) - 1)] + [word[-1]]
+        for gram in grams:
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+# トライグラム索引で検索できる語の最小文字数
+TRIGRAM_MIN_LENGTH = 3
+# SQLite の FTS5 で trigram トークナイザが使えるかどうか（3.34.0 以降）
+SQLITE_TRIGRAM_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def query_terms(query: str) -> List[str]:
+    """検索語を正規化し、空白で区切った語のリストに分解
+
+    Args:
+        query: 検索語
+
+    Returns:
+        重複を除いた語のリスト（投稿は正規化した本文が全ての語を含む場合に一致する）
+    """
+    return list(dict.fromkeys(normalize_text(query).split()))
+
+
+def matches_terms(body: str, terms: List[str]) -> bool:
+    """正規化した本文が全ての語を含むかどうか"""
+    normalized = normalize_text(body)
+    return all(term in normalized for term in terms)
+
+
+def query_ngrams(query: str) -> List[str]:
+    """検索語を、全て含む投稿を探すための語のリストに分解
+
+    Args:
+        query: 検索語（空白区切りで複数指定した場合は全てを含む投稿を探す）
+
+    Returns:
+        重複を除いた語のリスト（1文字の語は前方一致で探す）
+    """
+    grams: List[str] = []
+    for word in normalize_text(query).split():
+        candidates = [word] if len(word) == 1 else [word[i:i + 2] for i in range(len(word) - 1)]
+        for gram in candidates:
+            if gram not in grams:
+                grams.append(gram)
+    return grams
+
+
+class PostSearchTerm(db.Model):
+    """投稿本文のn-gram転置索引
+
+    トライグラム索引で検索できない短い語（2文字以下）や、トライグラム索引を
+    使えないデータベースでの検索に使う。投稿の作成・更新・削除と同じトランザクション内で更新する。
+    """
+    __tablename__ = 'post_search_term'
+    __table_args__ = (
+        db.Index('ix_post_search_term_post_id', 'post_id'),
+    )
+
+    term = db.Column(db.String(2), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+    # 投稿内での出現回数（検索結果の順位付けに使用）
+    count = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<PostSearchTerm {self.term!r} post={self.post_id}>'
+
+
+class PostSearchText(db.Model):
+    """トライグラム索引を付けた、正規化済みの投稿本文
+
+    PostgreSQL では pg_trgm の GIN インデックスで、SQLite では FTS5（trigram
+    トークナイザ）の外部コンテンツテーブル post_search_fts で部分一致を検索する。
+    投稿の作成・更新・削除と同じトランザクション内で更新する。
+    """
+    __tablename__ = 'post_search_text'
+    __table_args__ = (
+        db.Index('ix_post_search_text_body_trgm', 'body',
+                 postgresql_using='gin', postgresql_ops={'body': 'gin_trgm_ops'}),
+    )
+
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+    body = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<PostSearchText post={self.post_id}>'
+
+
+# SQLite の FTS5 索引（post_search_text の内容をトリガーで反映する）
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE post_search_fts USING fts5("
+    "body, content='post_search_text', content_rowid='post_id', tokenize='trigram')",
+    "CREATE TRIGGER post_search_text_ai AFTER INSERT ON post_search_text BEGIN "
+    "INSERT INTO post_search_fts(rowid, body) VALUES (new.post_id, new.body); END",
+    "CREATE TRIGGER post_search_text_ad AFTER DELETE ON post_search_text BEGIN "
+    "INSERT INTO post_search_fts(post_search_fts, rowid, body) VALUES ('delete', old.post_id, old.body); END",
+    "CREATE TRIGGER post_search_text_au AFTER UPDATE ON post_search_text BEGIN "
+    "INSERT INTO post_search_fts(post_search_fts, rowid, body) VALUES ('delete', old.post_id, old.body); "
+    "INSERT INTO post_search_fts(rowid, body) VALUES (new.post_id, new.body); END",
+]
+SQLITE_FTS_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS post_search_text_au",
+    "DROP TRIGGER IF EXISTS post_search_text_ad",
+    "DROP TRIGGER IF EXISTS post_search_text_ai",
+    "DROP TABLE IF EXISTS post_search_fts",
+]
+
+event.listen(PostSearchText.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+for _statement in SQLITE_FTS_DDL:
+    event.listen(PostSearchText.__table__, 'after_create', DDL(_statement).execute_if(
+        callable_=lambda ddl, target, bind, **kw: bind.dialect.name == 'sqlite' and SQLITE_TRIGRAM_AVAILABLE))
+for _statement in SQLITE_FTS_DROP_DDL:
+    event.listen(PostSearchText.__table__, 'before_drop', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+def index_rows(post_id: int, body: str) -> List[dict]:
+    """投稿の n-gram 転置索引の行を作成"""
+    return [
+        {'term': term, 'post_id': post_id, 'count': count}
+        for term, count in ngram_counts(body).items()
+    ]
+
+
+def _index(connection, post: Post) -> None:
+    rows = index_rows(post.id, post.body)
+    if rows:
+        connection.execute(PostSearchTerm.__table__.insert(), rows)
+    connection.execute(PostSearchText.__table__.insert(),
+                       {'post_id': post.id, 'body': normalize_text(post.body)})
+
+
+def _unindex(connection, post: Post) -> None:
+    for table in (PostSearchTerm.__table__, PostSearchText.__table__):
+        connection.execute(table.delete().where(table.c.post_id == post.id))
+
+
+@event.listens_for(Post, 'after_insert')
+def _index_post(mapper, connection, post):
+    _index(connection, post)
+
+
+@event.listens_for(Post, 'after_update')
+def _reindex_post(mapper, connection, post):
+    if not db.inspect(post).attrs.body.history.has_changes():
+        return
+    _unindex(connection, post)
+    _index(connection, post)
+
+
+@event.listens_for(Post, 'before_delete')
+def _unindex_post(mapper, connection, post):
+    _unindex(connection, post)
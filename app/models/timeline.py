@@ -0,0 +1,20 @@
+from datetime import datetime
+from app import db
+
+
+class TimelineEntry(db.Model):
+    """ホームタイムラインのエントリ（投稿時にフォロワーごとへ展開される）"""
+    __tablename__ = 'timeline_entry'
+    __table_args__ = (
+        db.Index('ix_timeline_entry_user_timestamp', 'user_id', 'timestamp', 'post_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), primary_key=True)
+    # 並び替え用に投稿日時を非正規化して保持
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    post = db.relationship('Post')
+
+    def __repr__(self):
+        return f'<TimelineEntry user={self.user_id} post={self.post_id}>'
@@ -1,16 +1,32 @@
 from datetime import datetime, timedelta
+import hashlib
 import secrets
+import time
+from typing import Optional, Tuple
+from flask import current_app
 from flask_login import UserMixin
+from itsdangerous import URLSafeSerializer, BadSignature
 from app import db, login_manager
 
 
 @login_manager.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    from app.repository.user_cache import user_cache
+    return user_cache.load(int(id))
 
 
 class User(UserMixin, db.Model):
     """ユーザーモデル"""
+    __table_args__ = (
+        # 期限切れトークンの削除用（トークンを持つユーザーのみを対象とする部分インデックス）
+        db.Index('ix_user_token_expires_at', 'verification_token_expires_at',
+                 postgresql_where=db.text('verification_token_expires_at IS NOT NULL'),
+                 sqlite_where=db.text('verification_token_expires_at IS NOT NULL')),
+        # 放置された未検証ユーザーの削除用（未検証ユーザーのみを対象とする部分インデックス）
+        db.Index('ix_user_unverified_created_at', 'created_at',
+                 postgresql_where=db.text('email_verified = false'),
+                 sqlite_where=db.text('email_verified = 0')),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), index=True, unique=True, nullable=False)
     username = db.Column(db.String(64), index=True, unique=True)
@@ -27,6 +43,12 @@ class User(UserMixin, db.Model):
     # 検証用トークン
     verification_token = db.Column(db.String(64), index=True, unique=True)
     verification_token_expires_at = db.Column(db.DateTime)
+    # 署名付きトークンの世代（ログイン成功時に進めて使用済みトークンを無効化）
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # 通知メールの頻度（hourly / daily / off）
+    notification_frequency = db.Column(db.String(16), nullable=False, default='daily',
+                                       server_default='daily')
     
     def __repr__(self):
         return f'<User {self.email}>'
@@ -36,6 +58,8 @@ class User(UserMixin, db.Model):
         self.email_verified = True
         self.verification_token = None
         self.verification_token_expires_at = None
+        # 発行済みの署名付きトークンを使用済みにする
+        self.token_version = (self.token_version or 0) + 1
     
     def generate_verification_token(self, expires_in=86400):
         """新しい検証トークンを生成"""
@@ -43,6 +67,40 @@ class User(UserMixin, db.Model):
         self.verification_token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
         return self.verification_token
 
+    def generate_signed_token(self, expires_in=86400):
+        """データベースに保存しない署名付き検証トークンを生成"""
+        payload = {
+            'uid': self.id,
+            'v': self.token_version or 0,
+            # 削除されたユーザーのIDが再利用された場合に別のユーザーとして通らないようにする
+            'eh': User.email_digest(self.email),
+            'exp': int(time.time()) + expires_in,
+        }
+        return User._token_serializer().dumps(payload)
+
+    @staticmethod
+    def email_digest(email) -> str:
+        """署名付きトークンに含めるメールアドレスのハッシュ値"""
+        return hashlib.sha256(email.lower().encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def load_signed_token(token) -> Optional[Tuple[int, int, str]]:
+        """署名付き検証トークンを検証し、(ユーザーID, トークン世代, メールアドレスのハッシュ値) を返す"""
+        try:
+            payload = User._token_serializer().loads(token)
+        except BadSignature:
+            return None
+        if not isinstance(payload, dict) or payload.get('exp', 0) < time.time():
+            return None
+        try:
+            return (int(payload['uid']), int(payload['v']), str(payload['eh']))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _token_serializer():
+        return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='email-verification')
+
     @staticmethod
     def verify_reset_token(token):
         """検証トークンによりユーザーを検索"""
@@ -52,18 +110,26 @@ class User(UserMixin, db.Model):
         return user
 
     def update_last_seen(self):
-        """最終ログイン時間を更新"""
-        self.last_seen = datetime.utcnow()
-        db.session.add(self)
-        db.session.commit()
+        """最終ログイン時間を更新（書き込みはバッファでまとめて行う）"""
+        from app.repository.last_seen_buffer import last_seen_buffer
+        last_seen_buffer.touch(self.id)
 
 
 class Post(db.Model):
-    """投稿モデル（ダミー）"""
+    """投稿モデル"""
+    __table_args__ = (
+        db.Index('ix_post_fanned_out_timestamp', 'fanned_out', 'timestamp', 'id'),
+        db.Index('ix_post_user_timestamp_id', 'user_id', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     body = db.Column(db.String(500), nullable=False)
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # フォロワーのタイムラインへ展開済みか（Falseの場合は読み込み時に取得）
+    fanned_out = db.Column(db.Boolean, nullable=False, default=True)
+
+    author = db.relationship('User', backref=db.backref('posts', lazy='dynamic'))
     
     def __repr__(self):
         return f'<Post {self.id} by User {self.user_id}>'
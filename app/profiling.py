@@ -0,0 +1,230 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from flask import g, request
+
+
+# 収集したスタックのファイルの拡張子（flamegraph.pl などで読める collapsed 形式）
+PROFILE_SUFFIX = '.collapsed'
+# 記録するスタックの最大の深さ
+MAX_STACK_DEPTH = 128
+
+
+def collapse_stack(frame) -> str:
+    """フレームを呼び出し元から順に ';' で連結した文字列に変換
+
+    Args:
+        frame: 最も内側のフレーム
+
+    Returns:
+        collapsed 形式のスタック（例: "dispatch (flask/app.py:1);home (app/routes/timeline.py:40)"）
+    """
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        filename = code.co_filename
+        # site-packages 以下はパッケージからの相対パスで表示する
+        for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+            index = filename.rfind(marker)
+            if index != -1:
+                filename = filename[index + len(marker):]
+                break
+        names.append(f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def _gevent_patched() -> bool:
+    """gevent により threading が置き換えられているかどうか（gunicorn の gevent ワーカー）"""
+    if 'gevent.monkey' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+
+class StackSampler:
+    """登録されたスレッドのスタックを一定間隔で記録する統計的プロファイラ
+
+    1つの監視スレッドが interval 秒ごとに sys._current_frames() から対象スレッドの
+    スタックを取得して数える。計測対象のコードには手を加えないため、オーバーヘッドは
+    サンプル数に比例し、処理時間にはほとんど影響しない。
+
+    gevent のワーカーではリクエストはグリーンレットで処理されるため、監視には
+    置き換え前の本物のOSスレッドを使い（グリーンレットでは処理中に実行されない）、
+    対象のグリーンレットが実行中であればOSスレッドのフレームを、待機中であれば
+    グリーンレットの gr_frame を記録する。
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.green = _gevent_patched()
+        if self.green:
+            from gevent.monkey import get_original
+            self._get_ident = get_original('_thread', 'get_ident')
+            self._sleep = get_original('time', 'sleep')
+            self._start_thread = get_original('_thread', 'start_new_thread')
+            self._lock = get_original('_thread', 'allocate_lock')()
+        else:
+            self._get_ident = threading.get_ident
+            self._sleep = time.sleep
+            self._start_thread = None
+            self._lock = threading.Lock()
+        # 記録中の対象 -> (OSスレッドID, グリーンレット, スタックごとのサンプル数)
+        self._active: Dict[object, Tuple[int, object, Counter]] = {}
+        self._started = False
+
+    def start(self) -> object:
+        """現在のスレッド（gevent ではグリーンレット）の記録を開始
+
+        Returns:
+            stop に渡す記録の識別子
+        """
+        greenlet = None
+        if self.green:
+            import gevent
+            greenlet = gevent.getcurrent()
+        key = object()
+        with self._lock:
+            self._active[key] = (self._get_ident(), greenlet, Counter())
+            if not self._started:
+                self._started = True
+                if self._start_thread is not None:
+                    self._start_thread(self._run, ())
+                else:
+                    threading.Thread(target=self._run, name='stack-sampler', daemon=True).start()
+        return key
+
+    def stop(self, key: object) -> Counter:
+        """記録を終了し、スタックごとのサンプル数を取得"""
+        with self._lock:
+            entry = self._active.pop(key, None)
+        return entry[2] if entry is not None else Counter()
+
+    def _run(self) -> None:
+        own = self._get_ident()
+        while True:
+            self._sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, greenlet, stacks in self._active.values():
+                    frame = self._frame_of(ident, greenlet, frames)
+                    if frame is not None and ident != own:
+                        stacks[collapse_stack(frame)] += 1
+            del frames
+
+    @staticmethod
+    def _frame_of(ident: int, greenlet, frames):
+        if greenlet is None:
+            return frames.get(ident)
+        if greenlet.dead:
+            return None
+        # 待機中のグリーンレットは gr_frame、実行中（gr_frame が None）はOSスレッドのフレーム
+        return greenlet.gr_frame or frames.get(ident)
+
+
+def aggregate_profiles(directory: str, endpoint: Optional[str] = None) -> Counter:
+    """記録したスタックのファイルを集計
+
+    Args:
+        directory: PROFILE_DIR
+        endpoint: 集計するエンドポイント（省略時は全て）
+
+    Returns:
+        {スタック: サンプル数}
+    """
+    stacks: Counter = Counter()
+    if not os.path.isdir(directory):
+        return stacks
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(PROFILE_SUFFIX):
+            continue
+        # ファイル名は "<エンドポイント>.<プロセスID>.collapsed"
+        file_endpoint = name[:-len(PROFILE_SUFFIX)].rsplit('.', 1)[0]
+        if endpoint is not None and file_endpoint != endpoint:
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+    return stacks
+
+
+def top_functions(stacks: Counter, limit: int) -> List[Tuple[str, int, int]]:
+    """関数ごとのサンプル数を集計
+
+    Args:
+        stacks: aggregate_profiles の結果
+        limit: 取得件数
+
+    Returns:
+        [(関数, 自身で実行中のサンプル数, 呼び出し先を含むサンプル数)]（自身のサンプル数の降順）
+    """
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [(frame, count, total[frame]) for frame, count in own.most_common(limit)]
+
+
+class RequestProfiler:
+    """リクエストのサンプリングプロファイラ
+
+    PROFILE_ENABLED が有効な場合のみフックを登録する（無効な場合は何も登録しない）。
+    対象のリクエストの処理中はスタックを記録し、PROFILE_SAMPLE_RATE の割合で
+    抽選されたリクエスト、または PROFILE_SLOW_MS 以上かかったリクエストのみ
+    エンドポイントごとのファイルに追記する。
+    """
+
+    def __init__(self):
+        self.sampler: Optional[StackSampler] = None
+        self._write_lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        if not app.config.get('PROFILE_ENABLED', False):
+            return
+        self.sampler = StackSampler(app.config.get('PROFILE_INTERVAL_MS', 5) / 1000)
+        self.directory = app.config['PROFILE_DIR']
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.01)
+        self.slow_seconds = app.config.get('PROFILE_SLOW_MS', 500) / 1000
+        self.endpoints = set(app.config.get('PROFILE_ENDPOINTS') or [])
+        os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self) -> None:
+        if self.endpoints and request.endpoint not in self.endpoints:
+            return
+        g._profile_start = time.perf_counter()
+        g._profile_sampled = random.random() < self.sample_rate
+        g._profile_key = self.sampler.start()
+
+    def _teardown_request(self, exc=None) -> None:
+        start = g.pop('_profile_start', None)
+        if start is None:
+            return
+        stacks = self.sampler.stop(g.pop('_profile_key'))
+        elapsed = time.perf_counter() - start
+        if stacks and (g.pop('_profile_sampled', False) or elapsed >= self.slow_seconds):
+            self._write(request.endpoint or 'unknown', stacks)
+
+    def _write(self, endpoint: str, stacks: Counter) -> None:
+        path = os.path.join(self.directory, f'{endpoint}.{os.getpid()}{PROFILE_SUFFIX}')
+        lines = ''.join(f'{stack} {count}\n' for stack, count in stacks.items())
+        with self._write_lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,200 @@
+import json
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from flask import current_app
+
+
+# 送信待ちのイベントが溢れた購読者に送るイベント（クライアントは再読み込みする）
+RESET_EVENT = {'event': 'reset', 'data': {}}
+
+
+class Subscription:
+    """1つの接続の購読
+
+    イベントは上限付きのキューに積む。読み出しが追いつかずに溢れた場合は
+    積んだイベントを捨ててリセットのイベントのみを残し、遅い接続が
+    メモリを使い続けないようにする。
+    """
+
+    def __init__(self, hub, user_id: int, queue_size: int):
+        self.hub = hub
+        self.user_id = user_id
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._drain()
+            self._queue.put_nowait(RESET_EVENT)
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """次のイベントを取得（timeout 秒以内になければNone）"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class MemoryHub:
+    """プロセス内の購読者にイベントを配信するハブ"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """ユーザー宛てのイベントを購読"""
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def connection_count(self) -> int:
+        """購読中の接続数"""
+        return self._count
+
+    def publish(self, event: Dict[str, Any], user_ids: Iterable[int]) -> None:
+        """複数ユーザーにイベントを配信
+
+        Args:
+            event: {'event': イベント名, 'data': JSONに変換できる値}
+            user_ids: 配信先のユーザーID
+        """
+        self.dispatch(event, user_ids)
+
+    def dispatch(self, event: Dict[str, Any], user_ids: Iterable[int]) -> None:
+        """このプロセスの購読者にイベントを配信"""
+        with self._lock:
+            subscriptions = [s for user_id in user_ids for s in self._subscribers.get(user_id, ())]
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class RedisHub(MemoryHub):
+    """Redis の Pub/Sub を経由して全ワーカーの購読者に配信するハブ
+
+    イベントは配信先のユーザーIDと共に1つのチャンネルへ1回だけ送信し、
+    各ワーカーの受信スレッドが自プロセスの購読者に振り分ける。
+    redis パッケージはこのバックエンドを使う場合のみ必要。
+    """
+
+    def __init__(self, url: str, channel: str = 'timeline', queue_size: int = 100):
+        super().__init__(queue_size)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("共有Pub/Subを使用するには redis パッケージをインストールしてください")
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener: Optional[threading.Thread] = None
+
+    def subscribe(self, user_id: int) -> Subscription:
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name='redis-hub', daemon=True)
+                    self._listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, event: Dict[str, Any], user_ids: Iterable[int]) -> None:
+        self.client.publish(self.channel, json.dumps({'event': event, 'user_ids': list(user_ids)}))
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    self.dispatch(payload['event'], payload['user_ids'])
+            except Exception as e:
+                print(f"Pub/Sub受信エラー: {str(e)}")
+                time.sleep(1)
+
+
+def create_hub(url: Optional[str], queue_size: int):
+    """設定に応じたハブを作成
+
+    Args:
+        url: 共有Pub/SubのURL（省略時はプロセス内のハブ）
+        queue_size: 接続ごとの送信待ちイベントの上限
+
+    Returns:
+        ハブ
+    """
+    if url:
+        return RedisHub(url, queue_size=queue_size)
+    return MemoryHub(queue_size)
+
+
+class TimelineStream:
+    """ホームタイムラインの新着投稿の配信"""
+
+    def init_app(self, app) -> None:
+        # プロセス内のハブは同じワーカーの接続にしか配信できない
+        if app.config.get('STREAM_ENABLED') and not app.config.get('STREAM_URL') \
+                and app.config.get('WEB_CONCURRENCY', 1) > 1:
+            raise RuntimeError(
+                "複数のワーカーで新着投稿の配信（STREAM_ENABLED）を有効にする場合は STREAM_URL を指定してください")
+        app.extensions['timeline_hub'] = create_hub(
+            app.config.get('STREAM_URL'), app.config.get('STREAM_QUEUE_SIZE', 100))
+
+    @property
+    def hub(self):
+        return current_app.extensions['timeline_hub']
+
+    def subscribe(self, user_id: int) -> Optional[Subscription]:
+        """ユーザーのタイムラインの新着を購読
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            購読、接続数が STREAM_MAX_CONNECTIONS に達している場合はNone
+        """
+        if self.hub.connection_count() >= current_app.config.get('STREAM_MAX_CONNECTIONS', 1000):
+            return None
+        return self.hub.subscribe(user_id)
+
+    def publish_post(self, post, user_ids: Iterable[int]) -> None:
+        """新着投稿をタイムラインの所有者に配信
+
+        Args:
+            post: 投稿インスタンス
+            user_ids: 投稿が追加されたタイムラインの所有者のユーザーID
+        """
+        if not current_app.config.get('STREAM_ENABLED', False):
+            return
+        from app.services.fragment_cache import post_fragment_cache
+
+        html = post_fragment_cache.render_posts([post])[post.id]
+        self.hub.publish({'event': 'post', 'data': {'id': post.id, 'html': str(html)}}, user_ids)
+
+
+timeline_stream = TimelineStream()
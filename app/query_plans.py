@@ -0,0 +1,162 @@
+import json
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Tuple
+
+from sqlalchemy import event
+
+from app import db
+
+
+# 検査する問い合わせ（名前, リポジトリの呼び出し）
+# 引数はどの行にも一致しない値にしているため、更新系の呼び出しもデータを変更しない
+def _query_cases() -> List[Tuple[str, Callable[[], object]]]:
+    from app.repository.user_repository import UserRepository
+    from app.repository.timeline_repository import TimelineRepository
+    from app.repository.follow_repository import FollowRepository
+    from app.repository.notification_repository import NotificationRepository
+    from app.repository.search_repository import SearchRepository
+
+    never = datetime(1970, 1, 1)
+    return [
+        ('UserRepository.find_by_email', lambda: UserRepository.find_by_email('query-plan@example.invalid')),
+        ('UserRepository.find_by_id', lambda: UserRepository.find_by_id(0)),
+        ('UserRepository.find_by_ids', lambda: UserRepository.find_by_ids([0, -1])),
+        ('UserRepository.find_by_emails', lambda: UserRepository.find_by_emails(['query-plan@example.invalid'])),
+        ('UserRepository.find_by_username', lambda: UserRepository.find_by_username('query-plan')),
+        ('UserRepository.find_by_verification_token',
+         lambda: UserRepository.find_by_verification_token('query-plan-token')),
+        ('UserRepository.delete_unverified_before', lambda: UserRepository.delete_unverified_before(never, 1)),
+        ('UserRepository.clear_expired_tokens', lambda: UserRepository.clear_expired_tokens(never, 1)),
+        ('TimelineRepository.find_timeline_posts', lambda: TimelineRepository.find_timeline_posts(0, 20)),
+        ('TimelineRepository.find_timeline_posts (cursor)',
+         lambda: TimelineRepository.find_timeline_posts(0, 20, (never, 0))),
+        ('TimelineRepository.find_timeline_head', lambda: TimelineRepository.find_timeline_head(0, [0])),
+        ('TimelineRepository.find_unfanned_posts', lambda: TimelineRepository.find_unfanned_posts([0], 20)),
+        ('TimelineRepository.find_posts_by_user', lambda: TimelineRepository.find_posts_by_user(0, 20)),
+        ('TimelineRepository.add_author_posts', lambda: TimelineRepository.add_author_posts(0, 0, 20)),
+        ('TimelineRepository.remove_author_posts', lambda: TimelineRepository.remove_author_posts(0, 0)),
+        ('FollowRepository.count_followers', lambda: FollowRepository.count_followers(0)),
+        ('FollowRepository.find_followee_ids', lambda: FollowRepository.find_followee_ids([0])),
+        ('FollowRepository.find_follower_ids', lambda: FollowRepository.find_follower_ids([0])),
+        ('NotificationRepository.find_due_user_ids',
+         lambda: NotificationRepository.find_due_user_ids('daily', never, 1)),
+        ('NotificationRepository.find_pending', lambda: NotificationRepository.find_pending([0])),
+        ('SearchRepository.find_candidate_ids', lambda: SearchRepository.find_candidate_ids(['query-plan'], 20)),
+        ('SearchRepository.find_post_ids', lambda: SearchRepository.find_post_ids(['qp', 'p'], 20)),
+    ]
+
+
+class PlanResult(NamedTuple):
+    """1つの問い合わせの実行計画の検査結果"""
+    name: str
+    # 発行されたSQLごとの実行計画（1行1ノード）
+    plans: List[List[str]]
+    # 全件走査しているテーブル
+    sequential_scans: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.plans) and not self.sequential_scans
+
+
+def capture_statements(func: Callable[[], object]) -> List[Tuple[str, object]]:
+    """関数の実行中に発行されたSQLと引数を取得
+
+    Args:
+        func: 実行する関数
+
+    Returns:
+        [(SQL, 引数)]
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        func()
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+    return statements
+
+
+def explain(statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """SQLの実行計画を取得
+
+    PostgreSQL では全件走査を無効にして計画を立てるため、インデックスで
+    処理できない問い合わせのみ Seq Scan になる（行数が少ない環境でも判定できる）。
+
+    Args:
+        statement: SQL
+        parameters: SQLの引数
+
+    Returns:
+        (実行計画の各行, 全件走査しているテーブル)
+    """
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        row = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+        plan = row if isinstance(row, list) else json.loads(row)
+        return _postgresql_plan(plan[0]['Plan'])
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        return _sqlite_plan(rows)
+    raise RuntimeError(f"実行計画の検査に対応していないデータベースです: {dialect}")
+
+
+def _postgresql_plan(node, depth: int = 0) -> Tuple[List[str], List[str]]:
+    label = node['Node Type']
+    if 'Index Name' in node:
+        label += f" using {node['Index Name']}"
+    if 'Relation Name' in node:
+        label += f" on {node['Relation Name']}"
+    lines, scans = ['  ' * depth + label], []
+    if node['Node Type'] == 'Seq Scan':
+        scans.append(node['Relation Name'])
+    for child in node.get('Plans', []):
+        child_lines, child_scans = _postgresql_plan(child, depth + 1)
+        lines.extend(child_lines)
+        scans.extend(child_scans)
+    return lines, scans
+
+
+def _sqlite_plan(rows) -> Tuple[List[str], List[str]]:
+    tables = set(db.metadata.tables)
+    lines, scans = [], []
+    for row in rows:
+        detail = row[-1]
+        lines.append(detail)
+        # "SCAN <テーブル>" はインデックスを使わない全件走査（"USING ... INDEX" 付きはインデックスの走査）
+        words = detail.split()
+        if len(words) >= 2 and words[0] == 'SCAN' and 'USING' not in words:
+            table = words[1].strip('"')
+            if table in tables:
+                scans.append(table)
+    return lines, scans
+
+
+def check_query_plans() -> List[PlanResult]:
+    """リポジトリの問い合わせの実行計画を検査（終了時にロールバックする）
+
+    Returns:
+        問い合わせごとの検査結果
+    """
+    results = []
+    try:
+        for name, func in _query_cases():
+            plans, scans = [], []
+            for statement, parameters in capture_statements(func):
+                lines, sequential = explain(statement, parameters)
+                plans.append(lines)
+                scans.extend(sequential)
+            results.append(PlanResult(name, plans, scans))
+    finally:
+        db.session.rollback()
+    return results
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from flask import current_app, request
+
+
+# ロックを分割する数（キーのハッシュで振り分けて競合を減らす）
+LOCK_STRIPES = 64
+
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+@lru_cache(maxsize=32)
+def parse_rule(rule: str) -> Tuple[int, float]:
+    """'回数/秒数' 形式の制限を (バケット容量, 1秒あたりの補充量) に変換
+
+    Args:
+        rule: 例えば '20/60' は60秒あたり20回（最大20回まで連続可）
+
+    Returns:
+        (バケット容量, 1秒あたりの補充量)
+    """
+    count, period = rule.split('/', 1)
+    return (int(count), int(count) / float(period))
+
+
+class MemoryTokenBucket:
+    """プロセス内のトークンバケット
+
+    キーをロックごとに分割して保持し、各分割は最大件数を超えると
+    最も長く使われていないキーから削除する。
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys_per_stripe = max(1, max_keys // LOCK_STRIPES)
+        self._stripes = [(threading.Lock(), OrderedDict()) for _ in range(LOCK_STRIPES)]
+
+    def consume(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        """トークンを1つ消費
+
+        Returns:
+            (許可されたかどうか, 再試行までの秒数)
+        """
+        lock, buckets = self._stripes[hash(key) % LOCK_STRIPES]
+        now = time.monotonic()
+        with lock:
+            tokens, updated = buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                allowed, retry_after = True, 0.0
+                tokens -= 1
+            else:
+                allowed, retry_after = False, (1 - tokens) / rate
+            buckets[key] = (tokens, now)
+            if len(buckets) > self.max_keys_per_stripe:
+                buckets.popitem(last=False)
+        return (allowed, retry_after)
+
+
+class RedisTokenBucket:
+    """Redis上で複数ワーカー間で共有するトークンバケット
+
+    redis パッケージはこのバックエンドを使う場合のみ必要。
+    """
+
+    def __init__(self, url: str, namespace: str = 'rate_limit'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("共有レート制限を使用するには redis パッケージをインストールしてください")
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def consume(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        """トークンを1つ消費
+
+        Returns:
+            (許可されたかどうか, 再試行までの秒数)
+        """
+        allowed, retry_after = self._script(
+            keys=[f'{self.namespace}:{key}'], args=[capacity, rate, time.time()])
+        return (bool(int(allowed)), float(retry_after))
+
+
+class RateLimiter:
+    """登録・ログインリンク送信のレート制限
+
+    送信元IPと宛先メールアドレスのそれぞれにトークンバケットを持ち、
+    どちらかが尽きた場合はリポジトリやメール送信の前に拒否する。
+    """
+
+    def init_app(self, app) -> None:
+        url = app.config.get('RATE_LIMIT_URL')
+        app.extensions['rate_limiter'] = RedisTokenBucket(url) if url else MemoryTokenBucket()
+
+    def check_auth_request(self, email: Optional[str]) -> Optional[int]:
+        """認証系リクエストがレート制限内か確認
+
+        Args:
+            email: 宛先メールアドレス（未入力の場合はIPのみで判定）
+
+        Returns:
+            制限を超えた場合は再試行までの秒数、制限内の場合はNone
+        """
+        if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+            return None
+        backend = current_app.extensions['rate_limiter']
+
+        checks = [(f'ip:{request.remote_addr}', current_app.config['RATE_LIMIT_AUTH_PER_IP'])]
+        if email:
+            checks.append((f'email:{email.strip().lower()}', current_app.config['RATE_LIMIT_AUTH_PER_EMAIL']))
+
+        for key, rule in checks:
+            capacity, rate = parse_rule(rule)
+            allowed, retry_after = backend.consume(key, capacity, rate)
+            if not allowed:
+                return max(1, int(retry_after + 0.999))
+        return None
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,149 @@
+from typing import Optional, List, Dict
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.email_outbox import EmailOutbox
+from app.repository.unit_of_work import commit
+
+
+class EmailOutboxRepository:
+    """メールアウトボックスを操作するリポジトリクラス"""
+
+    @staticmethod
+    def enqueue(subject: str, recipients: List[str], body: str,
+                html_body: Optional[str] = None) -> EmailOutbox:
+        """送信待ちメールを追加
+
+        Args:
+            subject: メールの件名
+            recipients: 宛先メールアドレスのリスト
+            body: プレーンテキスト本文
+            html_body: HTML本文（省略可）
+
+        Returns:
+            追加されたアウトボックスエントリ
+        """
+        return EmailOutboxRepository.enqueue_many([(subject, recipients, body, html_body)])[0]
+
+    @staticmethod
+    def enqueue_many(messages) -> List[EmailOutbox]:
+        """複数の送信待ちメールを1トランザクションで追加
+
+        Args:
+            messages: (件名, 宛先リスト, 本文, HTML本文) を持つメールのリスト
+
+        Returns:
+            追加されたアウトボックスエントリのリスト
+        """
+        now = datetime.utcnow()
+        entries = []
+        for subject, recipients, body, html_body in messages:
+            entry = EmailOutbox(subject=subject, body=body, html_body=html_body,
+                                next_attempt_at=now)
+            entry.recipients = recipients
+            entries.append(entry)
+        db.session.add_all(entries)
+        commit()
+        return entries
+
+    @staticmethod
+    def claim_batch(limit: int, lease_seconds: int) -> List[int]:
+        """送信可能なメールを取得し、リース期間中は他のワーカーから見えなくする
+
+        リース中にワーカーが停止した場合、リース期限後に再び取得対象となる。
+
+        Args:
+            limit: 取得件数
+            lease_seconds: リース期間（秒）
+
+        Returns:
+            取得したアウトボックスエントリのIDリスト
+        """
+        now = datetime.utcnow()
+        entries = EmailOutbox.query.filter(
+            EmailOutbox.status == EmailOutbox.STATUS_PENDING,
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(
+            EmailOutbox.next_attempt_at, EmailOutbox.id
+        ).limit(limit).with_for_update(skip_locked=True).all()
+
+        lease_until = now + timedelta(seconds=lease_seconds)
+        for entry in entries:
+            entry.attempts += 1
+            entry.next_attempt_at = lease_until
+        ids = [entry.id for entry in entries]
+        db.session.commit()
+        return ids
+
+    @staticmethod
+    def find_by_id(entry_id: int) -> Optional[EmailOutbox]:
+        """IDによりアウトボックスエントリを検索
+
+        Args:
+            entry_id: 検索するエントリID
+
+        Returns:
+            アウトボックスエントリ、見つからない場合はNone
+        """
+        return db.session.get(EmailOutbox, entry_id)
+
+    @staticmethod
+    def mark_sent(entry: EmailOutbox) -> None:
+        """送信完了に設定
+
+        Args:
+            entry: 更新するアウトボックスエントリ
+        """
+        entry.status = EmailOutbox.STATUS_SENT
+        entry.sent_at = datetime.utcnow()
+        entry.last_error = None
+        db.session.commit()
+
+    @staticmethod
+    def mark_failed(entry: EmailOutbox, error: str, max_attempts: int,
+                    backoff_base: int, backoff_max: int) -> None:
+        """送信失敗を記録し、再試行を予約するかデッドレターに移す
+
+        Args:
+            entry: 更新するアウトボックスエントリ
+            error: エラー内容
+            max_attempts: 最大試行回数
+            backoff_base: 再試行間隔の基準値（秒）
+            backoff_max: 再試行間隔の上限（秒）
+        """
+        entry.last_error = error
+        if entry.attempts >= max_attempts:
+            entry.status = EmailOutbox.STATUS_DEAD
+        else:
+            delay = min(backoff_base * (2 ** (entry.attempts - 1)), backoff_max)
+            entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        db.session.commit()
+
+    @staticmethod
+    def requeue_dead() -> int:
+        """デッドレターのメールを再送信待ちに戻す
+
+        Returns:
+            戻した件数
+        """
+        count = EmailOutbox.query.filter(
+            EmailOutbox.status == EmailOutbox.STATUS_DEAD
+        ).update({
+            EmailOutbox.status: EmailOutbox.STATUS_PENDING,
+            EmailOutbox.attempts: 0,
+            EmailOutbox.next_attempt_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def count_by_status() -> Dict[str, int]:
+        """状態ごとの件数を取得
+
+        Returns:
+            {状態: 件数}
+        """
+        rows = db.session.query(
+            EmailOutbox.status, db.func.count(EmailOutbox.id)
+        ).group_by(EmailOutbox.status).all()
+        return {status: count for status, count in rows}
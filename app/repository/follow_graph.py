@@ -0,0 +1,106 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, List
+
+from flask import current_app
+
+from app.cache import MemoryCache, create_cache
+from app.repository.follow_repository import FollowRepository
+
+
+# 隣接リストの配列の型（符号付き64ビット整数）
+ID_TYPECODE = 'q'
+
+
+class FollowGraph:
+    """フォロー関係の隣接リストのキャッシュ
+
+    ユーザーごとのフォロー先・フォロワーのIDを昇順の整数配列（array）で保持する。
+    初回参照時にデータベースから読み込み、フォロー・解除時は該当ユーザーの配列を
+    差し替えて更新する。プロセス内キャッシュでは他のワーカーでの変更は
+    FOLLOW_GRAPH_TTL 秒後に取り込む。FOLLOW_GRAPH_URL で共有キャッシュを指定した
+    場合は、フォロー・解除時に該当ユーザーのエントリを削除して全ワーカーに反映する。
+    """
+
+    def init_app(self, app) -> None:
+        url = app.config.get('FOLLOW_GRAPH_URL')
+        max_entries = app.config.get('FOLLOW_GRAPH_MAX_ENTRIES', 100000)
+        ttl = app.config.get('FOLLOW_GRAPH_TTL', 10)
+        app.extensions['follow_graph'] = {
+            'followees': create_cache(url, 'follow_graph:followees', max_entries, ttl),
+            'followers': create_cache(url, 'follow_graph:followers', max_entries, ttl),
+        }
+
+    def followees(self, user_id: int) -> array:
+        """ユーザーのフォロー先IDの配列を取得"""
+        return self.followees_many([user_id])[user_id]
+
+    def followers(self, user_id: int) -> array:
+        """ユーザーのフォロワーIDの配列を取得"""
+        return self._load('followers', FollowRepository.find_follower_ids, [user_id])[user_id]
+
+    def followees_many(self, user_ids: List[int]) -> Dict[int, array]:
+        """複数ユーザーのフォロー先IDの配列を取得（キャッシュにない分は1回の問い合わせで読み込む）"""
+        return self._load('followees', FollowRepository.find_followee_ids, user_ids)
+
+    def add_edge(self, follower_id: int, followee_id: int) -> None:
+        """フォロー関係の追加をキャッシュに反映"""
+        self._update('followees', follower_id, followee_id, insert=True)
+        self._update('followers', followee_id, follower_id, insert=True)
+
+    def remove_edge(self, follower_id: int, followee_id: int) -> None:
+        """フォロー関係の削除をキャッシュに反映"""
+        self._update('followees', follower_id, followee_id, insert=False)
+        self._update('followers', followee_id, follower_id, insert=False)
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数などの統計情報を取得"""
+        caches = current_app.extensions['follow_graph'].values()
+        totals: Dict[str, int] = {}
+        for cache in caches:
+            for key, value in cache.stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    @staticmethod
+    def _load(kind: str, loader, user_ids: List[int]) -> Dict[int, array]:
+        cache = current_app.extensions['follow_graph'][kind]
+        result: Dict[int, array] = {}
+        missing = []
+        for user_id in user_ids:
+            ids = cache.get(str(user_id))
+            if ids is None:
+                missing.append(user_id)
+            else:
+                # 共有キャッシュからはJSONのリストとして取得される
+                result[user_id] = ids if isinstance(ids, array) else array(ID_TYPECODE, ids)
+        if missing:
+            for user_id, ids in loader(missing).items():
+                result[user_id] = array(ID_TYPECODE, ids)
+                cache.set(str(user_id), result[user_id] if isinstance(cache, MemoryCache)
+                          else result[user_id].tolist())
+        return result
+
+    @staticmethod
+    def _update(kind: str, user_id: int, other_id: int, insert: bool) -> None:
+        cache = current_app.extensions['follow_graph'][kind]
+        if not isinstance(cache, MemoryCache):
+            # 共有キャッシュは他のワーカーと同時に書き換えないよう、削除して次回に読み込み直す
+            cache.delete(str(user_id))
+            return
+        # 読み込み中の配列を書き換えないよう、新しい配列に差し替える
+        ids = cache.get(str(user_id))
+        if ids is None:
+            return
+        index = bisect_left(ids, other_id)
+        present = index < len(ids) and ids[index] == other_id
+        if insert and not present:
+            ids = ids[:index] + array(ID_TYPECODE, [other_id]) + ids[index:]
+        elif not insert and present:
+            ids = ids[:index] + ids[index + 1:]
+        else:
+            return
+        cache.set(str(user_id), ids)
+
+
+follow_graph = FollowGraph()
@@ -0,0 +1,103 @@
+from typing import Dict, List
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.follow import Follow
+from app.repository.user_repository import IN_CLAUSE_CHUNK_SIZE
+from app.repository.unit_of_work import commit
+from app.routing import replica_reads
+
+
+class FollowRepository:
+    """フォロー関係を操作するリポジトリクラス"""
+
+    @staticmethod
+    def follow(follower_id: int, followee_id: int) -> bool:
+        """フォロー関係を追加
+
+        Args:
+            follower_id: フォローするユーザーのID
+            followee_id: フォローされるユーザーのID
+
+        Returns:
+            追加した場合はTrue、既にフォローしていた場合はFalse
+        """
+        if db.session.get(Follow, (follower_id, followee_id)) is not None:
+            return False
+        db.session.add(Follow(follower_id=follower_id, followee_id=followee_id))
+        try:
+            commit()
+        except IntegrityError:
+            # 同時に同じフォローが追加された場合
+            db.session.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def unfollow(follower_id: int, followee_id: int) -> bool:
+        """フォロー関係を削除
+
+        Args:
+            follower_id: フォローしているユーザーのID
+            followee_id: フォローされているユーザーのID
+
+        Returns:
+            削除した場合はTrue、フォローしていなかった場合はFalse
+        """
+        result = db.session.execute(db.delete(Follow).where(
+            Follow.follower_id == follower_id, Follow.followee_id == followee_id))
+        commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    def count_followers(user_id: int) -> int:
+        """フォロワー数を取得（投稿の展開に使うため、常にプライマリから読み込む）
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            フォロワー数
+        """
+        return db.session.query(db.func.count()).select_from(Follow).filter(
+            Follow.followee_id == user_id).scalar()
+
+    @staticmethod
+    @replica_reads
+    def find_followee_ids(user_ids: List[int]) -> Dict[int, List[int]]:
+        """複数ユーザーのフォロー先IDを一括取得
+
+        Args:
+            user_ids: ユーザーIDのリスト
+
+        Returns:
+            {ユーザーID: フォロー先IDの昇順リスト}（フォロー先がない場合は空リスト）
+        """
+        return FollowRepository._adjacency(Follow.follower_id, Follow.followee_id, user_ids)
+
+    @staticmethod
+    @replica_reads
+    def find_follower_ids(user_ids: List[int]) -> Dict[int, List[int]]:
+        """複数ユーザーのフォロワーIDを一括取得
+
+        Args:
+            user_ids: ユーザーIDのリスト
+
+        Returns:
+            {ユーザーID: フォロワーIDの昇順リスト}（フォロワーがない場合は空リスト）
+        """
+        return FollowRepository._adjacency(Follow.followee_id, Follow.follower_id, user_ids)
+
+    @staticmethod
+    def _adjacency(key_column, value_column, user_ids: List[int]) -> Dict[int, List[int]]:
+        """隣接リストをIN句のチャンクごとにまとめて取得"""
+        result: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+        ids = list(result)
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK_SIZE):
+            rows = db.session.query(key_column, value_column).filter(
+                key_column.in_(ids[start:start + IN_CLAUSE_CHUNK_SIZE])
+            ).order_by(key_column, value_column).all()
+            for key, value in rows:
+                result[key].append(value)
+        return result
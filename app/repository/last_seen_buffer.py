@@ -0,0 +1,124 @@
+import atexit
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from flask import current_app
+from sqlalchemy import text
+
+from app import db
+from app.models.user import User
+
+
+class LastSeenBuffer:
+    """最終アクセス日時の書き込みをまとめるバッファ
+
+    アクセスのたびにコミットする代わりにメモリ上に記録し、バックグラウンドの
+    スレッドが LAST_SEEN_FLUSH_INTERVAL 秒ごとに1回の一括UPDATEとして書き込む。
+    LAST_SEEN_FLUSH_THRESHOLD 件に達した場合とプロセス終了時にも書き込む。
+    書き込みエラーはログに出力して次回に持ち越し、リクエストには影響させない。
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._app = None
+
+    def init_app(self, app) -> None:
+        # 終了時の書き込みは最後に初期化したアプリで1回だけ行う
+        if self._app is None:
+            atexit.register(self._flush_at_exit)
+        self._app = app
+
+    def touch(self, user_id: int, seen_at: Optional[datetime] = None) -> None:
+        """ユーザーの最終アクセス日時を記録
+
+        Args:
+            user_id: ユーザーID
+            seen_at: アクセス日時（省略時は現在時刻）
+        """
+        seen_at = seen_at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or previous < seen_at:
+                self._pending[user_id] = seen_at
+            app = current_app._get_current_object()
+            due = len(self._pending) >= app.config['LAST_SEEN_FLUSH_THRESHOLD']
+            if self._thread is None:
+                # 定期書き込みのスレッドは最初の記録時に起動する
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name='last-seen-flush', daemon=True)
+                self._thread.start()
+        if due:
+            self._flush_quietly(app)
+
+    def flush(self) -> int:
+        """記録済みの最終アクセス日時をデータベースに書き込む
+
+        Returns:
+            更新したユーザー数
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            self._write(pending)
+        except Exception:
+            # 書き込めなかった分は次回に持ち越す
+            with self._lock:
+                for user_id, seen_at in pending.items():
+                    previous = self._pending.get(user_id)
+                    if previous is None or previous < seen_at:
+                        self._pending[user_id] = seen_at
+            raise
+        return len(pending)
+
+    @staticmethod
+    def _write(pending: Dict[int, datetime]) -> None:
+        rows = [{'id': user_id, 'last_seen': seen_at} for user_id, seen_at in pending.items()]
+        # リクエスト中のセッションとは独立したトランザクションで書き込む
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'postgresql':
+                values = ', '.join(
+                    f'(CAST(:id_{i} AS INTEGER), CAST(:ts_{i} AS TIMESTAMP))'
+                    for i in range(len(rows)))
+                params = {}
+                for i, row in enumerate(rows):
+                    params[f'id_{i}'] = row['id']
+                    params[f'ts_{i}'] = row['last_seen']
+                connection.execute(text(
+                    f'UPDATE "user" SET last_seen = v.ts FROM (VALUES {values}) AS v(id, ts) '
+                    f'WHERE "user".id = v.id'
+                ), params)
+            else:
+                connection.execute(
+                    User.__table__.update().where(
+                        User.__table__.c.id == db.bindparam('user_id')
+                    ).values(last_seen=db.bindparam('seen_at')),
+                    [{'user_id': row['id'], 'seen_at': row['last_seen']} for row in rows]
+                )
+
+    def _flush_quietly(self, app) -> None:
+        try:
+            self.flush()
+        except Exception:
+            app.logger.exception('最終アクセス日時の書き込みエラー')
+
+    def _run(self, app) -> None:
+        interval = app.config['LAST_SEEN_FLUSH_INTERVAL']
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                self._flush_quietly(app)
+
+    def _flush_at_exit(self) -> None:
+        app = self._app
+        with app.app_context():
+            self._flush_quietly(app)
+
+
+last_seen_buffer = LastSeenBuffer()
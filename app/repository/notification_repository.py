@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.notification import Notification
+from app.models.user import User
+from app.repository.user_repository import IN_CLAUSE_CHUNK_SIZE
+
+
+class NotificationRepository:
+    """通知を操作するリポジトリクラス"""
+
+    @staticmethod
+    def add(user_id: int, kind: str, actor_id: Optional[int] = None) -> Notification:
+        """通知を追加（コミットは行わない）
+
+        Args:
+            user_id: 通知先のユーザーID
+            kind: 通知の種類
+            actor_id: 通知のきっかけとなったユーザーのID
+
+        Returns:
+            追加された通知インスタンス
+        """
+        notification = Notification(user_id=user_id, kind=kind, actor_id=actor_id,
+                                    created_at=datetime.utcnow())
+        db.session.add(notification)
+        return notification
+
+    @staticmethod
+    def find_due_user_ids(frequency: str, cutoff: datetime, limit: int, after_user_id: int = 0) -> List[int]:
+        """ダイジェストを送信する時期になったユーザーのIDを昇順に取得
+
+        Args:
+            frequency: 対象のユーザーの通知頻度
+            cutoff: この日時以前の未送信の通知があるユーザーを対象とする
+            limit: 取得件数
+            after_user_id: このIDより大きいユーザーを対象とする（前のバッチの最後のID）
+
+        Returns:
+            ユーザーIDのリスト
+        """
+        rows = db.session.query(Notification.user_id).join(
+            User, User.id == Notification.user_id
+        ).filter(
+            Notification.user_id > after_user_id,
+            Notification.digested_at.is_(None),
+            Notification.created_at <= cutoff,
+            User.notification_frequency == frequency
+        ).group_by(Notification.user_id).order_by(Notification.user_id).limit(limit).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def find_pending(user_ids: List[int]) -> Dict[int, List[Notification]]:
+        """複数ユーザーの未送信の通知を一括取得
+
+        Args:
+            user_ids: ユーザーIDのリスト
+
+        Returns:
+            {ユーザーID: 古い順の通知のリスト}
+        """
+        result: Dict[int, List[Notification]] = {user_id: [] for user_id in user_ids}
+        if not user_ids:
+            return result
+        notifications = Notification.query.options(
+            joinedload(Notification.actor)
+        ).filter(
+            Notification.user_id.in_(user_ids),
+            Notification.digested_at.is_(None)
+        ).order_by(Notification.user_id, Notification.created_at, Notification.id).all()
+        for notification in notifications:
+            result[notification.user_id].append(notification)
+        return result
+
+    @staticmethod
+    def mark_digested(notification_ids: List[int], now: datetime) -> None:
+        """通知をダイジェストに含めたものとして記録（コミットは行わない）
+
+        Args:
+            notification_ids: 通知IDのリスト
+            now: 記録する日時
+        """
+        for start in range(0, len(notification_ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = notification_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+            db.session.execute(
+                db.update(Notification).where(Notification.id.in_(chunk))
+                .values(digested_at=now).execution_options(synchronize_session=False))
@@ -0,0 +1,194 @@
+from typing import Dict, List
+
+from sqlalchemy import and_, distinct, func, literal, select, text, union_all
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.user import Post
+from app.models.search import (
+    SQLITE_TRIGRAM_AVAILABLE, TRIGRAM_MIN_LENGTH, PostSearchTerm, PostSearchText,
+    index_rows, normalize_text, query_ngrams,
+)
+from app.routing import replica_reads
+
+
+# 1文字の語を前方一致で探す際の上限（この文字を付けた値未満を対象にする）
+_PREFIX_UPPER_BOUND = '\uffff'
+
+
+class SearchRepository:
+    """投稿の検索索引を操作するリポジトリクラス"""
+
+    @staticmethod
+    def find_candidate_ids(terms: List[str], limit: int, offset: int = 0) -> List[int]:
+        """全ての語を含む可能性がある投稿のIDを取得
+
+        全ての語が3文字以上の場合はトライグラム索引（PostgreSQL は pg_trgm、
+        SQLite は FTS5）を使い、それ以外は2文字のn-gram転置索引を使う。
+        n-gram転置索引の結果には語を含まない投稿も混ざるため、呼び出し側で本文を確認すること。
+
+        Args:
+            terms: 正規化した検索語のリスト（query_terms で分解したもの）
+            limit: 取得件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            投稿IDのリスト
+        """
+        if not terms:
+            return []
+        if all(len(term) >= TRIGRAM_MIN_LENGTH for term in terms):
+            dialect = db.engine.dialect.name
+            if dialect == 'postgresql':
+                return SearchRepository.find_post_ids_trigram(terms, limit, offset)
+            if dialect == 'sqlite' and SQLITE_TRIGRAM_AVAILABLE:
+                return SearchRepository.find_post_ids_fts(terms, limit, offset)
+        return SearchRepository.find_post_ids(query_ngrams(' '.join(terms)), limit, offset)
+
+    @staticmethod
+    @replica_reads
+    def find_post_ids_trigram(terms: List[str], limit: int, offset: int = 0) -> List[int]:
+        """pg_trgm の GIN インデックスで全ての語を含む投稿のIDを関連度順に取得（PostgreSQL）
+
+        関連度は検索語との類似度（similarity）で、同じ場合は新しい投稿を優先する。
+
+        Args:
+            terms: 3文字以上の正規化した検索語のリスト
+            limit: 取得件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            投稿IDのリスト
+        """
+        rows = db.session.execute(
+            select(PostSearchText.post_id)
+            .where(*[PostSearchText.body.contains(term, autoescape=True) for term in terms])
+            .order_by(func.similarity(PostSearchText.body, ' '.join(terms)).desc(),
+                      PostSearchText.post_id.desc())
+            .limit(limit).offset(offset)
+        ).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    @replica_reads
+    def find_post_ids_fts(terms: List[str], limit: int, offset: int = 0) -> List[int]:
+        """FTS5 の trigram 索引で全ての語を含む投稿のIDを関連度順に取得（SQLite）
+
+        Args:
+            terms: 3文字以上の正規化した検索語のリスト
+            limit: 取得件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            投稿IDのリスト
+        """
+        # 各語をフレーズとして指定する（空白区切りは AND）
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        rows = db.session.execute(text(
+            'SELECT rowid FROM post_search_fts WHERE post_search_fts MATCH :match '
+            'ORDER BY rank, rowid DESC LIMIT :limit OFFSET :offset'
+        ), {'match': match, 'limit': limit, 'offset': offset}).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    @replica_reads
+    def find_post_ids(grams: List[str], limit: int, offset: int = 0) -> List[int]:
+        """n-gram転置索引で全ての語を含む投稿のIDを関連度順に取得
+
+        関連度は検索語の出現回数の合計で、同じ場合は新しい投稿を優先する。
+        n-gramの並び順は確認しないため、語を含まない投稿が混ざることがある。
+
+        Args:
+            grams: 検索する語のリスト（query_ngrams で分解したもの）
+            limit: 取得件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            投稿IDのリスト
+        """
+        if not grams:
+            return []
+
+        parts = []
+        for index, gram in enumerate(grams):
+            if len(gram) == 1:
+                condition = and_(PostSearchTerm.term >= gram,
+                                 PostSearchTerm.term < gram + _PREFIX_UPPER_BOUND)
+            else:
+                condition = PostSearchTerm.term == gram
+            parts.append(select(
+                PostSearchTerm.post_id, PostSearchTerm.count, literal(index).label('gram')
+            ).where(condition))
+        matches = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+
+        rows = db.session.execute(
+            select(matches.c.post_id)
+            .group_by(matches.c.post_id)
+            .having(func.count(distinct(matches.c.gram)) == len(grams))
+            .order_by(func.sum(matches.c.count).desc(), matches.c.post_id.desc())
+            .limit(limit).offset(offset)
+        ).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    @replica_reads
+    def find_bodies(post_ids: List[int]) -> Dict[int, str]:
+        """指定したIDの投稿の本文を取得
+
+        Args:
+            post_ids: 投稿IDのリスト
+
+        Returns:
+            {投稿ID: 本文}
+        """
+        if not post_ids:
+            return {}
+        rows = db.session.query(Post.id, Post.body).filter(Post.id.in_(post_ids)).all()
+        return {row.id: row.body for row in rows}
+
+    @staticmethod
+    @replica_reads
+    def find_posts(post_ids: List[int]) -> List[Post]:
+        """指定したIDの投稿を、IDの並び順のまま取得
+
+        Args:
+            post_ids: 投稿IDのリスト
+
+        Returns:
+            投稿インスタンスのリスト
+        """
+        if not post_ids:
+            return []
+        posts = Post.query.options(
+            joinedload(Post.author)
+        ).filter(Post.id.in_(post_ids)).all()
+        by_id = {post.id: post for post in posts}
+        return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+    @staticmethod
+    def reindex_posts(after_id: int, limit: int) -> int:
+        """既存の投稿の索引を作り直す（1バッチ分、バッチごとにコミット）
+
+        Args:
+            after_id: このIDより大きい投稿を対象にする
+            limit: 1バッチで処理する最大件数
+
+        Returns:
+            処理した最後の投稿ID（対象がない場合は after_id）
+        """
+        rows = db.session.query(Post.id, Post.body).filter(
+            Post.id > after_id
+        ).order_by(Post.id).limit(limit).all()
+        if not rows:
+            return after_id
+
+        post_ids = [row.id for row in rows]
+        for model in (PostSearchTerm, PostSearchText):
+            db.session.execute(db.delete(model).where(model.post_id.in_(post_ids)))
+        terms = [term for row in rows for term in index_rows(row.id, row.body)]
+        if terms:
+            db.session.execute(db.insert(PostSearchTerm), terms)
+        db.session.execute(db.insert(PostSearchText), [
+            {'post_id': row.id, 'body': normalize_text(row.body)} for row in rows])
+        db.session.commit()
+        return post_ids[-1]
@@ -0,0 +1,209 @@
+from typing import Optional, List, Tuple
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.user import Post
+from app.models.timeline import TimelineEntry
+from app.repository import unit_of_work
+from app.routing import replica_reads
+
+
+# キーセットページネーションのカーソル（投稿日時, 投稿ID）
+Cursor = Tuple[datetime, int]
+
+
+def _older_than(timestamp_column, id_column, before: Cursor):
+    """(timestamp, id) が指定カーソルより古い行を選ぶ条件式"""
+    timestamp, post_id = before
+    return or_(
+        timestamp_column < timestamp,
+        and_(timestamp_column == timestamp, id_column < post_id)
+    )
+
+
+class TimelineRepository:
+    """投稿とホームタイムラインを操作するリポジトリクラス"""
+
+    @staticmethod
+    def create_post(user_id: int, body: str, fanned_out: bool = True) -> Post:
+        """新しい投稿を作成（コミットは行わない）
+
+        Args:
+            user_id: 投稿者のユーザーID
+            body: 投稿本文
+            fanned_out: フォロワーのタイムラインへ展開するかどうか
+
+        Returns:
+            作成された投稿インスタンス
+        """
+        post = Post(user_id=user_id, body=body, timestamp=datetime.utcnow(),
+                    fanned_out=fanned_out)
+        db.session.add(post)
+        db.session.flush()
+        return post
+
+    @staticmethod
+    def add_timeline_entries(user_ids: List[int], post: Post) -> None:
+        """複数ユーザーのタイムラインに投稿を一括追加（コミットは行わない）
+
+        Args:
+            user_ids: 追加先のユーザーIDのリスト
+            post: 追加する投稿
+        """
+        if not user_ids:
+            return
+        rows = [
+            {'user_id': user_id, 'post_id': post.id, 'timestamp': post.timestamp}
+            for user_id in user_ids
+        ]
+        db.session.execute(db.insert(TimelineEntry), rows)
+
+    @staticmethod
+    def add_author_posts(user_id: int, author_id: int, limit: int) -> None:
+        """投稿者の最近の展開済み投稿をユーザーのタイムラインに追加（フォロー時、コミットは行わない）
+
+        Args:
+            user_id: 追加先のユーザーID
+            author_id: 投稿者のユーザーID
+            limit: 追加する最大件数
+        """
+        rows = db.session.query(Post.id, Post.timestamp).filter(
+            Post.user_id == author_id,
+            Post.fanned_out.is_(True)
+        ).order_by(Post.timestamp.desc(), Post.id.desc()).limit(limit).all()
+        if not rows:
+            return
+        existing = {row[0] for row in db.session.query(TimelineEntry.post_id).filter(
+            TimelineEntry.user_id == user_id,
+            TimelineEntry.post_id.in_([row.id for row in rows])
+        )}
+        entries = [
+            {'user_id': user_id, 'post_id': row.id, 'timestamp': row.timestamp}
+            for row in rows if row.id not in existing
+        ]
+        if entries:
+            db.session.execute(db.insert(TimelineEntry), entries)
+
+    @staticmethod
+    def remove_author_posts(user_id: int, author_id: int) -> None:
+        """投稿者の投稿をユーザーのタイムラインから削除（フォロー解除時、コミットは行わない）
+
+        Args:
+            user_id: 削除元のユーザーID
+            author_id: 投稿者のユーザーID
+        """
+        db.session.execute(db.delete(TimelineEntry).where(
+            TimelineEntry.user_id == user_id,
+            TimelineEntry.post_id.in_(db.select(Post.id).where(Post.user_id == author_id))
+        ))
+
+    @staticmethod
+    @replica_reads
+    def find_timeline_posts(user_id: int, limit: int,
+                            before: Optional[Cursor] = None) -> List[Post]:
+        """展開済みのホームタイムラインを新しい順に取得
+
+        Args:
+            user_id: タイムラインの所有者のユーザーID
+            limit: 取得件数
+            before: このカーソルより古い投稿のみを取得（省略時は先頭から）
+
+        Returns:
+            投稿インスタンスのリスト
+        """
+        query = Post.query.join(
+            TimelineEntry, TimelineEntry.post_id == Post.id
+        ).filter(
+            TimelineEntry.user_id == user_id
+        )
+        if before is not None:
+            query = query.filter(
+                _older_than(TimelineEntry.timestamp, TimelineEntry.post_id, before))
+        return query.options(
+            joinedload(Post.author)
+        ).order_by(
+            TimelineEntry.timestamp.desc(), TimelineEntry.post_id.desc()
+        ).limit(limit).all()
+
+    @staticmethod
+    @replica_reads
+    def find_timeline_head(user_id: int, author_ids: List[int]) -> Tuple[Optional[int], Optional[int]]:
+        """ホームタイムラインの先頭の投稿IDを取得（投稿自体は読み込まない）
+
+        Args:
+            user_id: タイムラインの所有者のユーザーID
+            author_ids: 展開されていない投稿を取り込む投稿者IDのリスト
+
+        Returns:
+            (展開済みの先頭の投稿ID, 展開されていない先頭の投稿ID)、ない場合はそれぞれNone
+        """
+        fanned = db.session.query(TimelineEntry.post_id).filter(
+            TimelineEntry.user_id == user_id
+        ).order_by(
+            TimelineEntry.timestamp.desc(), TimelineEntry.post_id.desc()
+        ).limit(1).scalar()
+        unfanned = None
+        if author_ids:
+            unfanned = db.session.query(Post.id).filter(
+                Post.fanned_out.is_(False),
+                Post.user_id.in_(author_ids)
+            ).order_by(Post.timestamp.desc(), Post.id.desc()).limit(1).scalar()
+        return (fanned, unfanned)
+
+    @staticmethod
+    @replica_reads
+    def find_unfanned_posts(author_ids: Optional[List[int]], limit: int,
+                            before: Optional[Cursor] = None) -> List[Post]:
+        """展開されていない投稿（フォロワーの多い投稿者の投稿）を新しい順に取得
+
+        Args:
+            author_ids: 対象の投稿者IDのリスト（Noneの場合は全投稿者）
+            limit: 取得件数
+            before: このカーソルより古い投稿のみを取得（省略時は先頭から）
+
+        Returns:
+            投稿インスタンスのリスト
+        """
+        query = Post.query.filter(Post.fanned_out.is_(False))
+        if before is not None:
+            query = query.filter(_older_than(Post.timestamp, Post.id, before))
+        if author_ids is not None:
+            if not author_ids:
+                return []
+            query = query.filter(Post.user_id.in_(author_ids))
+        return query.options(
+            joinedload(Post.author)
+        ).order_by(
+            Post.timestamp.desc(), Post.id.desc()
+        ).limit(limit).all()
+
+    @staticmethod
+    @replica_reads
+    def find_posts_by_user(user_id: int, limit: int,
+                           before: Optional[Cursor] = None) -> List[Post]:
+        """ユーザーの投稿を新しい順に取得
+
+        Args:
+            user_id: 投稿者のユーザーID
+            limit: 取得件数
+            before: このカーソルより古い投稿のみを取得（省略時は先頭から）
+
+        Returns:
+            投稿インスタンスのリスト
+        """
+        query = Post.query.filter(Post.user_id == user_id)
+        if before is not None:
+            query = query.filter(_older_than(Post.timestamp, Post.id, before))
+        return query.options(
+            joinedload(Post.author)
+        ).order_by(
+            Post.timestamp.desc(), Post.id.desc()
+        ).limit(limit).all()
+
+    @staticmethod
+    def commit() -> None:
+        """保留中の変更をコミット（作業単位の内側ではフラッシュのみ）"""
+        unit_of_work.commit()
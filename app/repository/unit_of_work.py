@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from typing import Callable
+
+from app import db
+
+
+_DEPTH_KEY = 'unit_of_work_depth'
+_CALLBACKS_KEY = 'unit_of_work_callbacks'
+
+
+def in_unit_of_work() -> bool:
+    """作業単位（unit of work）の内側かどうか"""
+    return db.session.info.get(_DEPTH_KEY, 0) > 0
+
+
+@contextmanager
+def unit_of_work():
+    """ブロック内のリポジトリ操作を1つのトランザクションにまとめる
+
+    ブロック内でのリポジトリのコミットはフラッシュに置き換えられ、
+    ブロックを抜けた時点で1回だけコミットする。例外が発生した場合は
+    ロールバックする。入れ子にした場合は最も外側のブロックでコミットする。
+    """
+    info = db.session.info
+    depth = info.get(_DEPTH_KEY, 0)
+    info[_DEPTH_KEY] = depth + 1
+    if depth == 0:
+        info[_CALLBACKS_KEY] = []
+    try:
+        yield
+        if depth == 0:
+            db.session.commit()
+    except BaseException:
+        if depth == 0:
+            db.session.rollback()
+            info[_CALLBACKS_KEY] = []
+        raise
+    finally:
+        info[_DEPTH_KEY] = depth
+        if depth == 0:
+            callbacks = info.pop(_CALLBACKS_KEY, [])
+            for callback in callbacks:
+                callback()
+
+
+def commit() -> None:
+    """作業単位の外側ではコミットし、内側ではフラッシュのみ行う"""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """コミット後に実行する処理を登録
+
+    作業単位の外側では即座に実行する。
+
+    Args:
+        callback: 実行する処理
+    """
+    if in_unit_of_work():
+        db.session.info[_CALLBACKS_KEY].append(callback)
+    else:
+        callback()
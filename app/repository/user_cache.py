@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+
+from app import db
+from app.cache import create_cache
+from app.models.user import User
+from app.routing import replica_read
+
+
+class UserCache:
+    """flask_login のユーザーローダー用キャッシュ
+
+    ユーザー行のスナップショット（カラム値の辞書）を保持し、リクエストごとに
+    `session.merge(load=False)` でセッションに載せるため、キャッシュヒット時は
+    SQLを発行しない。UserRepository の更新系メソッドが該当エントリを無効化する。
+    無効化はキャッシュを共有するワーカーにのみ届くため、複数ワーカーでは
+    USER_CACHE_URL で共有キャッシュを指定して使用する。
+    """
+
+    def init_app(self, app) -> None:
+        app.extensions['user_cache'] = create_cache(
+            app.config.get('USER_CACHE_URL'), 'user',
+            app.config.get('USER_CACHE_MAX_ENTRIES', 10000),
+            app.config.get('USER_CACHE_TTL', 300))
+
+    @property
+    def backend(self):
+        return current_app.extensions['user_cache']
+
+    def load(self, user_id: int) -> Optional[User]:
+        """キャッシュを経由してユーザーを取得
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            現在のセッションに属するユーザーインスタンス、見つからない場合はNone
+        """
+        if not current_app.config.get('USER_CACHE_ENABLED', False):
+            with replica_read():
+                return db.session.get(User, user_id)
+
+        data = self.backend.get(str(user_id))
+        if data is None:
+            with replica_read():
+                user = db.session.get(User, user_id)
+            if user is not None:
+                self.backend.set(str(user_id), self._snapshot(user))
+            return user
+        return self._restore(data)
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        """ユーザーのキャッシュを無効化
+
+        Args:
+            user_id: ユーザーID
+        """
+        if user_id is not None and current_app.config.get('USER_CACHE_ENABLED', False):
+            self.backend.delete(str(user_id))
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数などの統計情報を取得"""
+        return self.backend.stats()
+
+    @staticmethod
+    def _snapshot(user: User) -> Dict[str, Any]:
+        data = {}
+        for column in User.__table__.columns:
+            value = getattr(user, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            data[column.key] = value
+        return data
+
+    @staticmethod
+    def _restore(data: Dict[str, Any]) -> User:
+        values = {}
+        for column in User.__table__.columns:
+            value = data.get(column.key)
+            if value is not None and isinstance(column.type, db.DateTime):
+                value = datetime.fromisoformat(value)
+            values[column.key] = value
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+user_cache = UserCache()
@@ -1,12 +1,31 @@
+import hmac
 from typing import Optional, List
 from datetime import datetime, timedelta
 
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
 from app import db
 from app.models.user import User
+from app.repository.user_cache import user_cache
+from app.repository.username_index import username_index
+from app.repository.unit_of_work import unit_of_work, commit, on_commit
+from app.routing import replica_reads
+
+
+# IN句に渡す値の最大数
+IN_CLAUSE_CHUNK_SIZE = 500
 
 
 class UserRepository:
-    """ユーザーデータを操作するリポジトリクラス"""
+    """ユーザーデータを操作するリポジトリクラス
+
+    更新系メソッドは通常は即座にコミットするが、`unit_of_work()` の内側では
+    コミットをブロックの終了時まで遅延し、1つのトランザクションにまとめる。
+    """
+    
+    unit_of_work = staticmethod(unit_of_work)
     
     @staticmethod
     def create_user(email: str) -> User:
@@ -20,10 +39,11 @@ class UserRepository:
         """
         user = User(email=email)
         db.session.add(user)
-        db.session.commit()
+        commit()
         return user
     
     @staticmethod
+    @replica_reads
     def find_by_email(email: str) -> Optional[User]:
         """メールアドレスによりユーザーを検索
 
@@ -36,6 +56,7 @@ class UserRepository:
         return User.query.filter_by(email=email).first()
     
     @staticmethod
+    @replica_reads
     def find_by_id(user_id: int) -> Optional[User]:
         """IDによりユーザーを検索
 
@@ -48,6 +69,33 @@ class UserRepository:
         return User.query.get(user_id)
     
     @staticmethod
+    @replica_reads
+    def find_by_ids(user_ids: List[int]) -> List[User]:
+        """複数のIDによりユーザーを一括検索
+
+        Args:
+            user_ids: 検索するユーザーIDのリスト
+
+        Returns:
+            見つかったユーザーインスタンスのリスト（順序は不定）
+        """
+        return UserRepository._find_in(User.id, user_ids)
+    
+    @staticmethod
+    @replica_reads
+    def find_by_emails(emails: List[str]) -> List[User]:
+        """複数のメールアドレスによりユーザーを一括検索
+
+        Args:
+            emails: 検索するメールアドレスのリスト
+
+        Returns:
+            見つかったユーザーインスタンスのリスト（順序は不定）
+        """
+        return UserRepository._find_in(User.email, emails)
+    
+    @staticmethod
+    @replica_reads
     def find_by_username(username: str) -> Optional[User]:
         """ユーザー名によりユーザーを検索
 
@@ -59,22 +107,74 @@ class UserRepository:
         """
         return User.query.filter_by(username=username).first()
     
+    @staticmethod
+    def is_username_taken(username: str, exclude_user_id: Optional[int] = None) -> bool:
+        """ユーザー名が使用済みかどうか
+
+        使用済みユーザー名の索引に含まれない場合はデータベースに問い合わせない。
+
+        Args:
+            username: 確認するユーザー名
+            exclude_user_id: 使用者から除外するユーザーID（自分自身のユーザー名の場合）
+
+        Returns:
+            使用済みの場合はTrue
+        """
+        if not username_index.might_be_taken(username):
+            return False
+        user = UserRepository.find_by_username(username)
+        return user is not None and user.id != exclude_user_id
+    
     @staticmethod
     def find_by_verification_token(token: str) -> Optional[User]:
         """検証トークンによりユーザーを検索
 
+        署名付きトークンは署名と有効期限をデータベースに触れずに検証し、
+        主キーでユーザーを取得してトークン世代とメールアドレスを照合する。
+
         Args:
             token: 検索する検証トークン
 
         Returns:
             ユーザーインスタンス、見つからない場合やトークンが期限切れの場合はNone
         """
+        if '.' in token:
+            claims = User.load_signed_token(token)
+            if claims is None:
+                return None
+            user_id, version, email_digest = claims
+            user = User.query.get(user_id)
+            if user is None or (user.token_version or 0) != version:
+                return None
+            if not hmac.compare_digest(User.email_digest(user.email), email_digest):
+                return None
+            return user
+        
         now = datetime.utcnow()
         return User.query.filter(
             User.verification_token == token,
             User.verification_token_expires_at > now
         ).first()
     
+    @staticmethod
+    def bulk_create(emails: List[str]) -> List[User]:
+        """複数のユーザーを1トランザクションで作成
+
+        Args:
+            emails: 作成するユーザーのメールアドレスのリスト（既存のものは除外）
+
+        Returns:
+            作成されたユーザーインスタンスのリスト
+        """
+        existing = {user.email for user in UserRepository.find_by_emails(emails)}
+        users = []
+        for email in dict.fromkeys(emails):
+            if email not in existing:
+                users.append(User(email=email))
+        db.session.add_all(users)
+        commit()
+        return users
+    
     @staticmethod
     def save(user: User) -> User:
         """ユーザー情報を保存
@@ -86,11 +186,12 @@ class UserRepository:
             保存されたユーザーインスタンス
         """
         db.session.add(user)
-        db.session.commit()
+        commit()
+        UserRepository._invalidate_cache(user)
         return user
     
     @staticmethod
-    def update_username(user: User, username: str) -> User:
+    def update_username(user: User, username: str) -> Optional[User]:
         """ユーザー名を更新
 
         Args:
@@ -98,11 +199,19 @@ class UserRepository:
             username: 新しいユーザー名
 
         Returns:
-            更新されたユーザーインスタンス
+            更新されたユーザーインスタンス、ユーザー名が既に使用されていた場合はNone
         """
         user.username = username
         db.session.add(user)
-        db.session.commit()
+        try:
+            commit()
+        except IntegrityError:
+            # 同時に同じユーザー名が設定された場合（一意制約で検出）
+            db.session.rollback()
+            username_index.add(username)
+            return None
+        UserRepository._invalidate_cache(user)
+        on_commit(lambda: username_index.add(username))
         return user
     
     @staticmethod
@@ -117,13 +226,18 @@ class UserRepository:
         """
         user.set_verified()
         db.session.add(user)
-        db.session.commit()
+        commit()
+        UserRepository._invalidate_cache(user)
         return user
     
     @staticmethod
     def generate_verification_token(user: User, expires_in: int = 86400) -> str:
         """検証トークンを生成
 
+        VERIFICATION_TOKEN_MODE が 'signed' の場合は署名付きトークンを返し、
+        トークン自体は保存しない。未検証ユーザーの場合のみ有効期限を保存し、
+        有効なトークンを持つユーザーが削除の対象にならないようにする。
+
         Args:
             user: トークンを生成するユーザー
             expires_in: 有効期限（秒）
@@ -131,7 +245,86 @@ class UserRepository:
         Returns:
             生成されたトークン
         """
+        if current_app.config.get('VERIFICATION_TOKEN_MODE') == 'signed':
+            if user.id is None:
+                db.session.flush()
+            token = user.generate_signed_token(expires_in)
+            if not user.email_verified:
+                user.verification_token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
+                db.session.add(user)
+                commit()
+                UserRepository._invalidate_cache(user)
+            return token
+        
         token = user.generate_verification_token(expires_in)
         db.session.add(user)
-        db.session.commit()
+        commit()
+        UserRepository._invalidate_cache(user)
         return token
+    
+    @staticmethod
+    def delete_unverified_before(cutoff: datetime, limit: int,
+                                 now: Optional[datetime] = None) -> int:
+        """指定日時より前に作成された未検証ユーザーを最大limit件削除
+
+        再登録により有効な検証トークンを持つユーザーは、作成日時が古くても削除しない。
+
+        Args:
+            cutoff: この日時より前に作成されたユーザーを対象とする
+            limit: 1回に削除する最大件数
+            now: トークンの有効期限の基準日時（省略時は現在時刻）
+
+        Returns:
+            削除した件数
+        """
+        now = now or datetime.utcnow()
+        # 部分インデックスの条件（email_verified = false）と同じ形で指定し、
+        # トークンの条件はインデックスで絞り込んだ行に対してのみ評価させる
+        ids = db.select(User.id).where(
+            User.email_verified == False,  # noqa: E712
+            User.created_at < cutoff,
+            or_(User.verification_token_expires_at.is_(None),
+                User.verification_token_expires_at < now)
+        ).limit(limit).scalar_subquery()
+        result = db.session.execute(
+            db.delete(User).where(User.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def clear_expired_tokens(now: datetime, limit: int) -> int:
+        """期限切れの検証トークンを最大limit件削除
+
+        Args:
+            now: 基準日時
+            limit: 1回に更新する最大件数
+
+        Returns:
+            更新した件数
+        """
+        ids = db.select(User.id).where(
+            User.verification_token_expires_at < now
+        ).limit(limit).scalar_subquery()
+        result = db.session.execute(
+            db.update(User).where(User.id.in_(ids)).values(
+                verification_token=None,
+                verification_token_expires_at=None
+            ).execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def _find_in(column, values: List) -> List[User]:
+        """IN句で一括検索（値が多い場合は分割して検索）"""
+        values = list(dict.fromkeys(values))
+        users = []
+        for start in range(0, len(values), IN_CLAUSE_CHUNK_SIZE):
+            chunk = values[start:start + IN_CLAUSE_CHUNK_SIZE]
+            users.extend(User.query.filter(column.in_(chunk)).all())
+        return users
+    
+    @staticmethod
+    def _invalidate_cache(user: User) -> None:
+        """コミット後にユーザーキャッシュを無効化"""
+        user_id = user.id
+        on_commit(lambda: user_cache.invalidate(user_id))
@@ -0,0 +1,132 @@
+import hashlib
+import math
+import threading
+import time
+from typing import List, Optional
+
+from flask import current_app
+
+from app import db
+from app.models.user import User
+from app.routing import replica_read
+
+
+# フィルタの最小容量と誤判定率
+MIN_CAPACITY = 10000
+FALSE_POSITIVE_RATE = 0.01
+
+
+class BloomFilter:
+    """使用済みユーザー名の有無を判定するブルームフィルタ
+
+    「含まれない」という判定は確実で、「含まれる」という判定は
+    false_positive_rate の確率で誤る。
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        # ダブルハッシュ法で hash_count 個の位置を求める
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+
+class UsernameIndex:
+    """使用済みユーザー名のプロセス内索引
+
+    起動後の初回参照時に全ユーザー名をブルームフィルタに読み込む。フィルタに
+    含まれないユーザー名は使用可能と判定してデータベースに問い合わせず、
+    含まれる場合のみデータベースで確認する。他のワーカーでの変更は
+    USERNAME_INDEX_REFRESH_SECONDS ごとの再読み込みで取り込む。再読み込みは
+    1つのスレッドのみが行い、その間、他のスレッドは読み込み済みのフィルタを使う。
+    最終的な重複の判定はデータベースの一意制約で行う。
+    """
+
+    def init_app(self, app) -> None:
+        app.extensions['username_index'] = {
+            'filter': None, 'loaded_at': 0.0, 'lock': threading.Lock(), 'reload_lock': threading.Lock(),
+        }
+
+    @property
+    def state(self):
+        return current_app.extensions['username_index']
+
+    def might_be_taken(self, username: str) -> bool:
+        """ユーザー名が使用済みの可能性があるかどうか
+
+        Args:
+            username: 確認するユーザー名
+
+        Returns:
+            使用済みの可能性がある場合はTrue（Falseの場合は確実に未使用）
+        """
+        if not current_app.config.get('USERNAME_INDEX_ENABLED', True):
+            return True
+        return username in self._filter()
+
+    def add(self, username: Optional[str]) -> None:
+        """使用済みのユーザー名を追加
+
+        Args:
+            username: 追加するユーザー名
+        """
+        bloom = self.state['filter']
+        if username and bloom is not None:
+            with self.state['lock']:
+                bloom.add(username)
+
+    def reload(self) -> None:
+        """データベースから全てのユーザー名を読み込み直す"""
+        with replica_read():
+            usernames = [row[0] for row in db.session.query(User.username).filter(
+                User.username.isnot(None)).yield_per(10000)]
+        bloom = self._build(usernames)
+        with self.state['lock']:
+            self.state['filter'] = bloom
+            self.state['loaded_at'] = time.monotonic()
+
+    def _filter(self) -> BloomFilter:
+        state = self.state
+        if not self._is_stale(state):
+            return state['filter']
+        if state['filter'] is None:
+            # 初回は読み込みの完了を待つ（他のスレッドが読み込んだ場合は読み込まない）
+            with state['reload_lock']:
+                if state['filter'] is None:
+                    self.reload()
+        elif state['reload_lock'].acquire(blocking=False):
+            try:
+                if self._is_stale(state):
+                    self.reload()
+            finally:
+                state['reload_lock'].release()
+        return state['filter']
+
+    @staticmethod
+    def _is_stale(state) -> bool:
+        refresh_seconds = current_app.config.get('USERNAME_INDEX_REFRESH_SECONDS', 300)
+        return state['filter'] is None or time.monotonic() - state['loaded_at'] > refresh_seconds
+
+    @staticmethod
+    def _build(usernames: List[str]) -> BloomFilter:
+        # 再読み込みまでに追加される分の余裕を持たせる
+        bloom = BloomFilter(max(len(usernames) * 2, MIN_CAPACITY))
+        for username in usernames:
+            bloom.add(username)
+        return bloom
+
+
+username_index = UsernameIndex()
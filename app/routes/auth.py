@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, make_response, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, EmailField, SubmitField
@@ -6,7 +6,8 @@ from wtforms.validators import DataRequired, Email, Length, ValidationError
 
 from app.repository.user_repository import UserRepository
 from app.services.email_service import EmailService
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, USERNAME_PATTERN
+from app.rate_limit import rate_limiter
 
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -23,11 +24,21 @@ class SetupAccountForm(FlaskForm):
     
     def validate_username(self, username):
         # 使用不可の文字をチェック
-        import re
-        if not re.match(r'^[a-zA-Z0-9_]+$', username.data):
+        if not USERNAME_PATTERN.match(username.data):
             raise ValidationError('ユーザー名には英数字とアンダースコアのみ使用できます')
 
 
+RATE_LIMIT_MESSAGE = 'リクエストが多すぎます。しばらく待ってから再度お試しください'
+
+
+def _rate_limited(template, retry_after, **context):
+    """レート制限超過時のレスポンス"""
+    flash(RATE_LIMIT_MESSAGE, 'danger')
+    response = make_response(render_template(template, **context), 429)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
 # サービスのインスタンス化
 user_repository = UserRepository()
 email_service = EmailService()
@@ -41,6 +52,11 @@ def register():
         return redirect(url_for('timeline.home'))
     
     form = RegisterForm()
+    if request.method == 'POST':
+        retry_after = rate_limiter.check_auth_request(request.form.get('email'))
+        if retry_after:
+            return _rate_limited('auth/register.html', retry_after, form=form)
+    
     if form.validate_on_submit():
         success, message, user = auth_service.register_user(form.email.data)
         flash(message, 'success' if success else 'danger')
@@ -59,13 +75,17 @@ def login():
     # メールリンクでのログインを促すページを表示
     if request.method == 'POST':
         email = request.form.get('email')
+        retry_after = rate_limiter.check_auth_request(email)
+        if retry_after:
+            return _rate_limited('auth/login.html', retry_after)
         if email:
             user = user_repository.find_by_email(email)
             if user and user.email_verified:
-                # トークン生成・送信
-                token = user_repository.generate_verification_token(user)
-                login_url = url_for('auth.verify_email', token=token, _external=True)
-                email_service.send_verification_email(user.email, login_url)
+                # トークン生成・送信（送信はコミット後に行う）
+                with user_repository.unit_of_work():
+                    token = user_repository.generate_verification_token(user)
+                    login_url = url_for('auth.verify_email', token=token, _external=True)
+                    email_service.send_verification_email(user.email, login_url)
                 flash('ログイン用のメールを送信しました。メール内のリンクをクリックしてログインしてください', 'info')
             else:
                 flash('このメールアドレスは登録されていないか、確認が完了していません', 'warning')
@@ -114,6 +134,15 @@ def setup_account():
     return render_template('auth/setup_account.html', form=form)
 
 
+@bp.route('/username-available')
+@login_required
+def username_available():
+    """ユーザー名が使用可能か確認（入力中の確認用のJSON API）"""
+    username = request.args.get('username', '').strip()
+    available, message = auth_service.check_username(username)
+    return jsonify({'username': username, 'available': available, 'message': message})
+
+
 @bp.route('/logout')
 @login_required
 def logout():
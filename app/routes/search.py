@@ -0,0 +1,27 @@
+from flask import Blueprint, render_template, request
+from flask_login import login_required
+
+from app.repository.search_repository import SearchRepository
+from app.services.search_service import SearchService
+from app.services.fragment_cache import post_fragment_cache
+
+bp = Blueprint('search', __name__)
+
+
+# サービスのインスタンス化
+search_repository = SearchRepository()
+search_service = SearchService(search_repository)
+
+
+@bp.route('/search')
+@login_required
+def search():
+    """投稿の検索"""
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    
+    posts, has_next = search_service.search(query, page)
+    post_html = post_fragment_cache.render_posts(posts)
+    
+    return render_template('search/results.html', query=query, posts=posts,
+                           post_html=post_html, page=page, has_next=has_next)
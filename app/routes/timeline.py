@@ -1,12 +1,34 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+import json
+
+from flask import Blueprint, Response, abort, current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
+from flask_wtf import FlaskForm
+from wtforms import TextAreaField, SubmitField
+from wtforms.validators import DataRequired, Length
 
 from app.models.user import Post
 from app.repository.user_repository import UserRepository
+from app.repository.timeline_repository import TimelineRepository
+from app.repository.follow_repository import FollowRepository
+from app.services.timeline_service import TimelineService, serialize_post, is_valid_cursor
+from app.services.follow_service import FollowService
+from app.services.fragment_cache import post_fragment_cache
+from app.pubsub import timeline_stream
 
 bp = Blueprint('timeline', __name__)
 
+
+# フォーム
+class PostForm(FlaskForm):
+    body = TextAreaField('投稿', validators=[DataRequired(), Length(max=500)])
+    submit = SubmitField('投稿')
+
+
+# サービスのインスタンス化
 user_repository = UserRepository()
+timeline_repository = TimelineRepository()
+timeline_service = TimelineService(timeline_repository)
+follow_service = FollowService(FollowRepository(), user_repository, timeline_repository)
 
 
 @bp.route('/')
@@ -27,28 +49,83 @@ def home():
         flash('ユーザー名を設定してください', 'warning')
         return redirect(url_for('auth.setup_account'))
     
-    # ダミーの投稿データを作成
-    posts = [
-        {
-            'author': {'username': 'Akira'},
-            'body': 'こんにちは！Flaskでのアプリ開発楽しいですね！',
-            'timestamp': '2時間前'
-        },
-        {
-            'author': {'username': 'Yuki'},
-            'body': 'PostgreSQLとの連携に苦戦してます...',
-            'timestamp': '4時間前'
-        },
-        {
-            'author': {'username': 'Takeshi'},
-            'body': 'Dockerが便利すぎてびっくり！',
-            'timestamp': '1日前'
-        },
-        {
-            'author': {'username': current_user.username},
-            'body': 'はじめまして！よろしくお願いします。',
-            'timestamp': 'たった今'
-        }
-    ]
+    cursor = request.args.get('cursor')
+    if not is_valid_cursor(cursor):
+        abort(400)
+    posts, next_cursor = timeline_service.home_timeline(current_user, cursor)
+    post_html = post_fragment_cache.render_posts(posts)
+    suggestions = follow_service.suggestions(current_user)
+    form = PostForm()
+    
+    return render_template('timeline/home.html', posts=posts, post_html=post_html,
+                           form=form, next_cursor=next_cursor, suggestions=suggestions)
+
+
+@bp.route('/home.json')
+@login_required
+def home_json():
+    """ホームタイムライン（JSON、If-None-Match による条件付きGETに対応）"""
+    cursor = request.args.get('cursor')
+    if not is_valid_cursor(cursor):
+        abort(400)
+    etag = timeline_service.home_etag(current_user, cursor)
+    if request.if_none_match.contains(etag):
+        # 変更がなければ投稿を読み込まずにヘッダーのみを返す
+        response = Response(status=304)
+    else:
+        posts, next_cursor = timeline_service.home_timeline(current_user, cursor)
+        response = jsonify({'posts': [serialize_post(post) for post in posts],
+                            'next_cursor': next_cursor})
+    response.set_etag(etag)
+    # 閲覧者ごとの内容のため共有キャッシュには保存させず、毎回再検証させる
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+@bp.route('/home/stream')
+@login_required
+def home_stream():
+    """ホームタイムラインの新着投稿を配信（Server-Sent Events）"""
+    if not current_app.config.get('STREAM_ENABLED', False):
+        abort(404)
+    subscription = timeline_stream.subscribe(current_user.id)
+    if subscription is None:
+        return Response('接続数が上限に達しています', status=503, headers={'Retry-After': '30'})
+    heartbeat = current_app.config['STREAM_HEARTBEAT_SECONDS']
+    
+    def generate():
+        # 接続中はデータベース接続やリクエストコンテキストを保持しない
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    # アイドル接続の切断を防ぐためのハートビート
+                    yield ': heartbeat\n\n'
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/post', methods=['POST'])
+@login_required
+def create_post():
+    """新規投稿"""
+    if not current_user.username:
+        return redirect(url_for('auth.setup_account'))
+    
+    form = PostForm()
+    if form.validate_on_submit():
+        success, message, post = timeline_service.publish(current_user, form.body.data)
+        flash(message, 'success' if success else 'danger')
+    else:
+        for errors in form.errors.values():
+            for error in errors:
+                flash(error, 'danger')
     
-    return render_template('timeline/home.html', posts=posts)
+    return redirect(url_for('timeline.home'))
@@ -0,0 +1,82 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
+from flask_login import login_required, current_user
+
+from app.repository.user_repository import UserRepository
+from app.repository.follow_repository import FollowRepository
+from app.repository.timeline_repository import TimelineRepository
+from app.services.follow_service import FollowService
+from app.services.timeline_service import TimelineService, is_valid_cursor
+from app.services.fragment_cache import post_fragment_cache
+from app.services.notification_service import NotificationService
+from app.services.email_service import EmailService
+from app.repository.notification_repository import NotificationRepository
+from app.models.notification import NOTIFICATION_FREQUENCIES
+
+bp = Blueprint('users', __name__, url_prefix='/users')
+
+
+# サービスのインスタンス化
+user_repository = UserRepository()
+follow_repository = FollowRepository()
+timeline_repository = TimelineRepository()
+notification_service = NotificationService(NotificationRepository(), user_repository, EmailService())
+follow_service = FollowService(follow_repository, user_repository, timeline_repository,
+                               notification_service)
+timeline_service = TimelineService(timeline_repository)
+
+
+def _find_user_or_404(username):
+    user = user_repository.find_by_username(username)
+    if user is None:
+        abort(404)
+    return user
+
+
+@bp.route('/settings/notifications', methods=['POST'])
+@login_required
+def notification_settings():
+    """通知メールの頻度の変更"""
+    success, message = notification_service.update_frequency(
+        current_user, request.form.get('frequency', ''))
+    flash(message, 'success' if success else 'warning')
+    return redirect(url_for('users.profile', username=current_user.username))
+
+
+@bp.route('/<username>')
+@login_required
+def profile(username):
+    """ユーザーのプロフィールと投稿一覧"""
+    user = _find_user_or_404(username)
+    cursor = request.args.get('cursor')
+    if not is_valid_cursor(cursor):
+        abort(400)
+    
+    posts, next_cursor = timeline_service.user_timeline(user, cursor)
+    post_html = post_fragment_cache.render_posts(posts)
+    following_count, follower_count = follow_service.counts(user)
+    is_following = follow_service.is_following(current_user, user)
+    
+    return render_template('users/profile.html', user=user, posts=posts, post_html=post_html,
+                           next_cursor=next_cursor, following_count=following_count,
+                           follower_count=follower_count, is_following=is_following,
+                           frequencies=NOTIFICATION_FREQUENCIES)
+
+
+@bp.route('/<username>/follow', methods=['POST'])
+@login_required
+def follow(username):
+    """フォロー"""
+    user = _find_user_or_404(username)
+    success, message = follow_service.follow(current_user, user)
+    flash(message, 'success' if success else 'warning')
+    return redirect(url_for('users.profile', username=user.username))
+
+
+@bp.route('/<username>/unfollow', methods=['POST'])
+@login_required
+def unfollow(username):
+    """フォロー解除"""
+    user = _find_user_or_404(username)
+    success, message = follow_service.unfollow(current_user, user)
+    flash(message, 'success' if success else 'warning')
+    return redirect(url_for('users.profile', username=user.username))
@@ -0,0 +1,98 @@
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+# セッション（Flaskのセッション）に保存する、プライマリに固定する期限のキー
+STICKY_SESSION_KEY = '_primary_until'
+
+_USE_REPLICA_KEY = 'use_replica'
+_WROTE_KEY = 'wrote'
+
+
+class RoutingSession(Session):
+    """読み取り専用の処理をリードレプリカへ振り分けるセッション
+
+    `replica_read()` の内側の問い合わせのみレプリカへ送り、それ以外と書き込みは
+    プライマリへ送る。次の場合は読み取りでもプライマリを使う（read-your-writes）。
+
+    - 同じセッション内で既に書き込みを行った場合
+    - 同じユーザーが REPLICA_STICKY_SECONDS 秒以内に書き込みを行った場合
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_USE_REPLICA_KEY) and not self._flushing \
+                and not self.info.get(_WROTE_KEY) and not _is_sticky():
+            replicas = [engine for key, engine in self._db.engines.items()
+                        if isinstance(key, str) and key.startswith(REPLICA_BIND_PREFIX)]
+            if replicas:
+                return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_sticky() -> bool:
+    return has_request_context() and flask_session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+
+@contextmanager
+def replica_read():
+    """ブロック内の読み取りをリードレプリカへ振り分ける"""
+    from app import db
+
+    info = db.session.info
+    previous = info.get(_USE_REPLICA_KEY, False)
+    info[_USE_REPLICA_KEY] = True
+    try:
+        yield
+    finally:
+        info[_USE_REPLICA_KEY] = previous
+
+
+def replica_reads(func):
+    """関数内の読み取りをリードレプリカへ振り分けるデコレータ"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_read():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app, db) -> None:
+    """レプリカの接続先を登録し、書き込み後にプライマリへ固定するフックを設定
+
+    Args:
+        app: Flaskアプリケーション
+        db: SQLAlchemy拡張（init_app より前に呼ぶこと）
+    """
+    replicas = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not replicas:
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, uri in enumerate(replicas):
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    @app.after_request
+    def stick_to_primary(response):
+        if db.session.info.get(_WROTE_KEY):
+            flask_session[STICKY_SESSION_KEY] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_wrote_on_flush(session, flush_context):
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_wrote_on_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE_KEY] = True
@@ -1,3 +1,4 @@
+import re
 from typing import Optional, Tuple, Dict, Any
 from datetime import datetime, timedelta
 from flask import current_app, url_for
@@ -7,6 +8,10 @@ from app.repository.user_repository import UserRepository
 from app.services.email_service import EmailService
 
 
+# ユーザー名に使用できる文字
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]+$')
+
+
 class AuthService:
     """認証関連の処理を行うサービスクラス"""
     
@@ -25,12 +30,30 @@ class AuthService:
         """
         # 既存ユーザーチェック
         existing_user = self.user_repository.find_by_email(email)
+        if existing_user and existing_user.email_verified:
+            return (False, "このメールアドレスは既に登録されています", None)
+        
+        # ユーザー作成・トークン生成（アウトボックス使用時はメールの追加も）を1トランザクションで行い、
+        # 即時送信の場合はコミット後に送信する
+        with self.user_repository.unit_of_work():
+            user, verification_url = self._prepare_verification(email, existing_user)
+            self.email_service.send_verification_email(user.email, verification_url)
+        
+        return (True, "確認メールを送信しました。メール内のリンクをクリックして登録を完了してください", user)
+    
+    def _prepare_verification(self, email: str, existing_user: Optional[User]) -> Tuple[User, str]:
+        """登録対象のユーザーを用意し、検証用URLを生成
+        
+        Args:
+            email: 登録するメールアドレス
+            existing_user: 未検証の既存ユーザー（いない場合はNone）
+            
+        Returns:
+            (ユーザーインスタンス, 検証用URL)
+        """
         if existing_user:
-            if existing_user.email_verified:
-                return (False, "このメールアドレスは既に登録されています", None)
-            else:
-                # 未検証の場合は再度トークンを生成して送信
-                user = existing_user
+            # 未検証の場合は再度トークンを生成して送信
+            user = existing_user
         else:
             # 新規ユーザー作成
             user = self.user_repository.create_user(email)
@@ -38,12 +61,7 @@ class AuthService:
         # 検証トークン生成
         expiry_seconds = int(current_app.config['EMAIL_VERIFICATION_EXPIRY'].total_seconds())
         token = self.user_repository.generate_verification_token(user, expiry_seconds)
-        
-        # 検証メール送信
-        verification_url = url_for('auth.verify_email', token=token, _external=True)
-        self.email_service.send_verification_email(user.email, verification_url)
-        
-        return (True, "確認メールを送信しました。メール内のリンクをクリックして登録を完了してください", user)
+        return (user, url_for('auth.verify_email', token=token, _external=True))
     
     def verify_email(self, token: str) -> Tuple[bool, str, Optional[User]]:
         """メールアドレス検証処理
@@ -80,13 +98,31 @@ class AuthService:
         if not user.email_verified:
             return (False, "メールアドレスが確認されていません", None)
         
-        # ユーザー名重複チェック
+        # ユーザー名重複チェック（再送信の場合に自分自身を使用者とみなさない）
         if username != user.username:  # 変更がある場合のみチェック
-            existing_user = self.user_repository.find_by_username(username)
-            if existing_user and existing_user.id != user.id:
+            if self.user_repository.is_username_taken(username, exclude_user_id=user.id):
                 return (False, "このユーザー名は既に使用されています", None)
         
-        # ユーザー名更新
-        user = self.user_repository.update_username(user, username)
+        # ユーザー名更新（同時に設定された場合は一意制約で検出）
+        updated = self.user_repository.update_username(user, username)
+        if updated is None:
+            return (False, "このユーザー名は既に使用されています", None)
+        
+        return (True, "アカウント設定が完了しました", updated)
+    
+    def check_username(self, username: str) -> Tuple[bool, str]:
+        """ユーザー名が使用可能か確認（入力中の確認用）
         
-        return (True, "アカウント設定が完了しました", user)
+        Args:
+            username: 確認するユーザー名
+            
+        Returns:
+            (使用可能フラグ, メッセージ)
+        """
+        if not 3 <= len(username) <= 20:
+            return (False, "ユーザー名は3文字以上20文字以下で入力してください")
+        if not USERNAME_PATTERN.match(username):
+            return (False, "ユーザー名には英数字とアンダースコアのみ使用できます")
+        if self.user_repository.is_username_taken(username):
+            return (False, "このユーザー名は既に使用されています")
+        return (True, "このユーザー名は使用できます")
@@ -1,9 +1,21 @@
-from typing import Optional, List
+import time
+from typing import Optional, List, NamedTuple
 from flask import current_app, render_template
 from flask_mailman import EmailMessage
-import resend
 
 from app import mail
+from app.metrics import metrics
+from app.repository.email_outbox_repository import EmailOutboxRepository
+from app.repository.unit_of_work import on_commit
+from app.services.email_transport import get_resend_transport, get_smtp_transport
+
+
+class OutgoingEmail(NamedTuple):
+    """送信するメール1通分の内容"""
+    subject: str
+    recipients: List[str]
+    body: str
+    html_body: Optional[str] = None
 
 
 class EmailService:
@@ -13,83 +25,170 @@ class EmailService:
     def send_email(subject: str, recipients: List[str], body: str, html_body: Optional[str] = None) -> None:
         """メール送信処理
         
+        EMAIL_OUTBOX_ENABLED が有効な場合はアウトボックスに追加するのみで、
+        実際の送信は `flask outbox worker` が行う。作業単位の内側で呼び出した場合、
+        送信はコミット後に行う（ロールバックされた内容のメールは送信しない）。
+        
+        Args:
+            subject: メールの件名
+            recipients: 宛先メールアドレスのリスト
+            body: プレーンテキスト本文
+            html_body: HTML本文（省略可）
+        """
+        EmailService.send_many([OutgoingEmail(subject, recipients, body, html_body)])
+    
+    @staticmethod
+    def send_many(messages: List[OutgoingEmail]) -> None:
+        """複数のメールをまとめて送信
+        
+        SMTPでは EMAIL_SEND_CONCURRENCY 本までの接続で同時に、Resendではバッチ送信APIで送信する。
+        アウトボックスへの追加は同じトランザクションで、即時送信はコミット後に行う。
+        
+        Args:
+            messages: 送信するメールのリスト
+        """
+        if not messages:
+            return
+        
+        if current_app.config.get('EMAIL_OUTBOX_ENABLED', False):
+            EmailOutboxRepository.enqueue_many(messages)
+            return
+        
+        on_commit(lambda: EmailService.deliver_many(messages))
+    
+    @staticmethod
+    def deliver(subject: str, recipients: List[str], body: str, html_body: Optional[str] = None,
+                raise_errors: bool = False) -> None:
+        """メールを即時に送信
+        
         Args:
             subject: メールの件名
             recipients: 宛先メールアドレスのリスト
             body: プレーンテキスト本文
             html_body: HTML本文（省略可）
+            raise_errors: 送信エラー時に例外を送出するかどうか
         """
+        EmailService.deliver_many([OutgoingEmail(subject, recipients, body, html_body)],
+                                  raise_errors=raise_errors)
+    
+    @staticmethod
+    def deliver_many(messages: List[OutgoingEmail], raise_errors: bool = False) -> None:
+        """複数のメールを即時に送信
+        
+        Args:
+            messages: 送信するメールのリスト
+            raise_errors: 送信エラー時に例外を送出するかどうか
+        """
+        start = time.perf_counter()
+        backend = EmailService._backend_name()
+        try:
+            EmailService._deliver_many(messages, raise_errors)
+        finally:
+            metrics.observe_email(backend, time.perf_counter() - start)
+    
+    @staticmethod
+    def _backend_name() -> str:
+        """使用する送信バックエンドの名前"""
+        if current_app.config.get('USE_RESEND', False):
+            return 'resend'
+        if current_app.config.get('MAIL_DEBUG', False):
+            return 'console'
+        return 'smtp'
+    
+    @staticmethod
+    def _deliver_many(messages: List[OutgoingEmail], raise_errors: bool) -> None:
         # 開発環境では実際のメール送信をスキップしてコンソールに出力（MAIL_DEBUGがTrueかつUSE_RESENDがFalseの場合）
         if current_app.config.get('MAIL_DEBUG', False) and not current_app.config.get('USE_RESEND', False):
-            print("\n" + "-" * 80)
-            print(f"送信メール（開発モード - 実際には送信されません）")
-            print(f"宛先: {', '.join(recipients)}")
-            print(f"件名: {subject}")
-            print("-" * 80)
-            print(body)
-            if html_body:
-                print("\nHTML本文:")
-                print(html_body)
-            print("-" * 80 + "\n")
-            
-            # 開発モードでも検証用URLを利用可能にするために、URLログを別に出力
-            if 'verify_email' in body:
-                # URLを抽出（シンプルな方法）
-                import re
-                urls = re.findall(r'https?://\S+', body)
-                if urls:
-                    print("\n検証URL (これをクリックしてテスト):")
-                    for url in urls:
-                        print(url)
-                    print("\n")
-            
+            for message in messages:
+                EmailService._print_email(message)
             return
         
         # Resendを使用する場合
         if current_app.config.get('USE_RESEND', False):
             resend_api_key = current_app.config.get('RESEND_API_KEY')
             if not resend_api_key:
+                if raise_errors:
+                    raise RuntimeError("RESEND_API_KEY is not configured")
                 print("Error: RESEND_API_KEY is not configured")
                 return
             
             from_email = current_app.config.get('RESEND_FROM_EMAIL')
+            transport = get_resend_transport(resend_api_key)
+            params_list = [EmailService._resend_params(from_email, message) for message in messages]
             
-            # Resend APIキーを設定
-            resend.api_key = resend_api_key
-            
-            # メール送信
+            # メール送信（キープアライブ接続を再利用）
             try:
-                params = {
-                    "from": from_email,
-                    "to": recipients,
-                    "subject": subject,
-                }
-                
-                # テキストまたはHTML本文を設定
-                if html_body:
-                    params["html"] = html_body
+                if len(params_list) == 1:
+                    response = transport.send(params_list[0])
+                    print(f"Resendメール送信成功: {response['id']}")
                 else:
-                    params["text"] = body
-                
-                response = resend.Emails.send(params)
-                print(f"Resendメール送信成功: {response['id']}")
+                    responses = transport.send_batch(params_list)
+                    print(f"Resendメール一括送信成功: {len(responses)} 件")
             except Exception as e:
+                if raise_errors:
+                    raise
                 print(f"Resendメール送信エラー: {str(e)}")
             
             return
         
-        # 標準のメール送信（Flask-Mailman）
+        # 標準のメール送信（Flask-Mailman、接続を再利用）
+        get_smtp_transport().send_messages(
+            [EmailService._build_message(message) for message in messages])
+    
+    @staticmethod
+    def _resend_params(from_email: str, message: OutgoingEmail) -> dict:
+        """Resend APIの送信パラメータを作成"""
+        params = {
+            "from": from_email,
+            "to": message.recipients,
+            "subject": message.subject,
+        }
+        
+        # テキストまたはHTML本文を設定
+        if message.html_body:
+            params["html"] = message.html_body
+        else:
+            params["text"] = message.body
+        return params
+    
+    @staticmethod
+    def _build_message(message: OutgoingEmail) -> EmailMessage:
+        """Flask-Mailmanのメッセージを作成"""
         msg = EmailMessage(
-            subject=subject,
-            body=body,
-            to=recipients
+            subject=message.subject,
+            body=message.body,
+            to=message.recipients
         )
         
-        if html_body:
+        if message.html_body:
             msg.content_subtype = 'html'
-            msg.body = html_body
+            msg.body = message.html_body
+        return msg
+    
+    @staticmethod
+    def _print_email(message: OutgoingEmail) -> None:
+        """開発モードでメール内容をコンソールに出力"""
+        print("\n" + "-" * 80)
+        print(f"送信メール（開発モード - 実際には送信されません）")
+        print(f"宛先: {', '.join(message.recipients)}")
+        print(f"件名: {message.subject}")
+        print("-" * 80)
+        print(message.body)
+        if message.html_body:
+            print("\nHTML本文:")
+            print(message.html_body)
+        print("-" * 80 + "\n")
         
-        msg.send()
+        # 開発モードでも検証用URLを利用可能にするために、URLログを別に出力
+        if 'verify_email' in message.body:
+            # URLを抽出（シンプルな方法）
+            import re
+            urls = re.findall(r'https?://\S+', message.body)
+            if urls:
+                print("\n検証URL (これをクリックしてテスト):")
+                for url in urls:
+                    print(url)
+                print("\n")
     
     @staticmethod
     def send_verification_email(recipient: str, verification_url: str) -> None:
@@ -99,6 +198,11 @@ class EmailService:
             recipient: 宛先メールアドレス
             verification_url: 検証用URL
         """
+        EmailService.send_many([EmailService._verification_email(recipient, verification_url)])
+    
+    @staticmethod
+    def _verification_email(recipient: str, verification_url: str) -> OutgoingEmail:
+        """メールアドレス検証メールの内容を作成"""
         subject = "【SNS】メールアドレスの確認"
         
         text_body = f"""
@@ -117,4 +221,4 @@ class EmailService:
 <p>このメールに心当たりがない場合は無視してください。</p>
         """
         
-        EmailService.send_email(subject, [recipient], text_body, html_body)
+        return OutgoingEmail(subject, [recipient], text_body, html_body)
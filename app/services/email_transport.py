@@ -0,0 +1,265 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from smtplib import SMTPServerDisconnected
+from typing import Callable, List, Dict, Any, Optional
+
+from flask import current_app
+
+from app import mail
+
+
+# requests / resend はワーカーの起動時間を抑えるため、
+# 使用する送信方法に応じて初回利用時に読み込む
+
+# Resend のバッチ送信APIが1回に受け付ける最大件数
+RESEND_BATCH_LIMIT = 100
+
+
+class SendPool:
+    """複数の送信を同時に行うためのスレッドプール
+
+    gevent ワーカー（gunicorn.conf.py）ではスレッドがグリーンレットになり、
+    送信の応答待ちの間も同じワーカーで他のリクエストを処理できる。
+    同時に送信する数は EMAIL_SEND_CONCURRENCY で制限する。
+    """
+
+    def __init__(self, concurrency: int, name: str):
+        self.concurrency = max(1, concurrency)
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def map(self, func: Callable[[List[Any]], Any], items: List[Any]) -> List[Any]:
+        """項目を同時実行数で分割し、それぞれを func で処理
+
+        Args:
+            func: 分割した項目のリストを受け取る関数
+            items: 処理する項目のリスト
+
+        Returns:
+            分割ごとの func の戻り値のリスト（いずれかが失敗した場合は全ての完了後に例外を送出）
+        """
+        workers = min(self.concurrency, len(items))
+        if workers <= 1:
+            return [func(items)]
+
+        app = current_app._get_current_object()
+
+        def run(chunk):
+            with app.app_context():
+                return func(chunk)
+
+        # 送信順が偏らないよう交互に振り分ける
+        futures = [self._pool().submit(run, items[i::workers]) for i in range(workers)]
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [future.result() for future in futures]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix=self.name)
+            return self._executor
+
+
+class SmtpTransport:
+    """スレッドごとにSMTP接続を保持して再利用する送信クラス
+
+    複数のメッセージは最大 concurrency 本の接続で同時に送信する（接続は
+    プールのスレッドごとに保持して再利用する）。接続はアイドル時間が
+    MAIL_KEEPALIVE_SECONDS を超えると張り直し、サーバー側で切断されていた
+    場合は1回だけ再接続し、送信できなかったメッセージから再送する
+    （送信済みのメッセージは再送しない）。
+    """
+
+    def __init__(self, keepalive_seconds: int, concurrency: int = 1):
+        self.keepalive_seconds = keepalive_seconds
+        self._local = threading.local()
+        self._pool = SendPool(concurrency, 'smtp-send')
+
+    def send_messages(self, messages: List[Any]) -> int:
+        """メッセージを同時実行数までの接続に分けて送信
+
+        Args:
+            messages: Flask-Mailman の EmailMessage のリスト
+
+        Returns:
+            送信したメッセージ数
+        """
+        if not messages:
+            return 0
+        return sum(self._pool.map(self._send_serially, messages))
+
+    def _send_serially(self, messages: List[Any]) -> int:
+        """メッセージを現在のスレッドの1つの接続で順に送信"""
+        sent = 0
+        index = 0
+        reconnected = False
+        while index < len(messages):
+            connection = self._connection()
+            try:
+                sent += connection.send_messages([messages[index]]) or 0
+            except SMTPServerDisconnected:
+                self.close()
+                if reconnected:
+                    raise
+                reconnected = True
+                continue
+            except Exception:
+                self.close()
+                raise
+            index += 1
+            self._local.last_used = time.monotonic()
+        return sent
+
+    def close(self) -> None:
+        """現在のスレッドの接続を閉じる"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        last_used = getattr(self._local, 'last_used', 0.0)
+        if connection is not None and time.monotonic() - last_used > self.keepalive_seconds:
+            self.close()
+            connection = None
+        if connection is None:
+            connection = mail.get_connection()
+            connection.open()
+            self._local.connection = connection
+            self._local.last_used = time.monotonic()
+        return connection
+
+
+class ResendTransport:
+    """HTTPのキープアライブ接続を再利用してResend APIを呼び出す送信クラス
+
+    resend パッケージは呼び出しごとに新しいHTTP接続を作るため、
+    スレッドごとに requests.Session を保持して同じエンドポイントへ直接送信する。
+    バッチ送信APIの上限を超える件数は、分割したリクエストを同時に送信する。
+    """
+
+    def __init__(self, api_key: str, concurrency: int = 1):
+        self.api_key = api_key
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._pool = SendPool(concurrency, 'resend-send')
+
+    @property
+    def session(self):
+        """現在のスレッドのHTTPセッション"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            session.headers.update(_resend_headers(self.api_key))
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def send(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """メールを1通送信
+
+        Args:
+            params: Resend の送信パラメータ
+
+        Returns:
+            APIのレスポンス
+        """
+        return self._post('/emails', params)
+
+    def send_batch(self, params_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """バッチ送信APIで複数のメールを送信
+
+        Args:
+            params_list: Resend の送信パラメータのリスト
+
+        Returns:
+            送信したメールごとのレスポンス
+        """
+        chunks = [params_list[start:start + RESEND_BATCH_LIMIT]
+                  for start in range(0, len(params_list), RESEND_BATCH_LIMIT)]
+        results = []
+        for responses in self._pool.map(self._send_chunks, chunks):
+            results.extend(responses)
+        return results
+
+    def _send_chunks(self, chunks: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """分割したバッチを現在のスレッドのセッションで順に送信"""
+        results = []
+        for chunk in chunks:
+            response = self._post('/emails/batch', chunk)
+            results.extend(response.get('data', []) if isinstance(response, dict) else response)
+        return results
+
+    def close(self) -> None:
+        """保持している接続を閉じる"""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+    def _post(self, path: str, payload: Any) -> Any:
+        import resend
+
+        return _resend_response(self.session.post(f"{resend.api_url}{path}", json=payload))
+
+
+def _resend_headers(api_key: str) -> Dict[str, str]:
+    import resend
+
+    return {
+        "Accept": "application/json",
+        "Authorization": f"Bearer {api_key}",
+        "User-Agent": f"resend-python:{resend.get_version()}",
+    }
+
+
+def _resend_response(response) -> Any:
+    """Resend APIのレスポンスを確認してJSONを返す"""
+    if response.status_code != 200:
+        from resend.exceptions import raise_for_code_and_type
+
+        try:
+            error = response.json()
+        except ValueError:
+            error = {}
+        raise_for_code_and_type(
+            code=error.get("statusCode", response.status_code),
+            message=error.get("message", response.text),
+            error_type=error.get("name"),
+        )
+    return response.json()
+
+
+def get_smtp_transport() -> SmtpTransport:
+    """現在のアプリケーションのSMTP送信クラスを取得"""
+    transports = current_app.extensions.setdefault('email_transports', {})
+    transport = transports.get('smtp')
+    if transport is None:
+        transport = transports.setdefault(
+            'smtp', SmtpTransport(current_app.config['MAIL_KEEPALIVE_SECONDS'],
+                                  current_app.config.get('EMAIL_SEND_CONCURRENCY', 1)))
+    return transport
+
+
+def get_resend_transport(api_key: str) -> ResendTransport:
+    """現在のアプリケーションのResend送信クラスを取得"""
+    transports = current_app.extensions.setdefault('email_transports', {})
+    transport = transports.get('resend')
+    if transport is None or transport.api_key != api_key:
+        transport = ResendTransport(api_key, current_app.config.get('EMAIL_SEND_CONCURRENCY', 1))
+        transports['resend'] = transport
+    return transport
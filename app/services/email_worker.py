@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.models.email_outbox import EmailOutbox
+from app.repository.email_outbox_repository import EmailOutboxRepository
+from app.services.email_service import EmailService
+
+
+class EmailOutboxWorker:
+    """アウトボックスのメールを送信するワーカー
+
+    取得（リース）は1スレッドで行い、送信はスレッドプールで並列に行う。
+    失敗したメールは指数バックオフで再試行し、最大試行回数を超えたものは
+    デッドレター（status='dead'）に移す。
+    """
+
+    def __init__(self, app, concurrency: int = 4, batch_size: int = 50,
+                 poll_interval: float = 1.0):
+        self.app = app
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def run_once(self) -> Tuple[int, int]:
+        """送信可能なメールを1バッチ分処理
+
+        Returns:
+            (送信成功件数, 送信失敗件数)
+        """
+        with self.app.app_context():
+            ids = EmailOutboxRepository.claim_batch(
+                self.batch_size, self.app.config['EMAIL_OUTBOX_LEASE_SECONDS'])
+        if not ids:
+            return (0, 0)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self._process, ids))
+        sent = sum(1 for ok in results if ok)
+        return (sent, len(results) - sent)
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """停止要求があるまでアウトボックスを処理し続ける
+
+        Args:
+            stop_event: セットされると処理を終了するイベント
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            sent, failed = self.run_once()
+            if sent or failed:
+                print(f"アウトボックス処理: 送信 {sent} 件, 失敗 {failed} 件")
+            else:
+                stop_event.wait(self.poll_interval)
+
+    def _process(self, entry_id: int) -> bool:
+        """1件のメールを送信し、結果を記録"""
+        with self.app.app_context():
+            entry = EmailOutboxRepository.find_by_id(entry_id)
+            if entry is None or entry.status != EmailOutbox.STATUS_PENDING:
+                return True
+            try:
+                EmailService.deliver(entry.subject, entry.recipients, entry.body,
+                                     entry.html_body, raise_errors=True)
+            except Exception as e:
+                config = self.app.config
+                EmailOutboxRepository.mark_failed(
+                    entry, str(e),
+                    max_attempts=config['EMAIL_OUTBOX_MAX_ATTEMPTS'],
+                    backoff_base=config['EMAIL_OUTBOX_BACKOFF_BASE'],
+                    backoff_max=config['EMAIL_OUTBOX_BACKOFF_MAX'])
+                return False
+            EmailOutboxRepository.mark_sent(entry)
+            return True
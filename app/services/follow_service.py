@@ -0,0 +1,114 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from typing import List, Optional, Tuple
+from flask import current_app
+
+from app.models.notification import Notification
+from app.models.user import User
+from app.repository.follow_repository import FollowRepository
+from app.repository.follow_graph import follow_graph
+from app.repository.timeline_repository import TimelineRepository
+from app.repository.unit_of_work import unit_of_work, on_commit
+from app.repository.user_repository import UserRepository
+from app.repository.notification_repository import NotificationRepository
+from app.services.email_service import EmailService
+from app.services.notification_service import NotificationService
+
+
+class FollowService:
+    """フォロー関連の処理を行うサービスクラス"""
+
+    def __init__(self, follow_repository: FollowRepository, user_repository: UserRepository,
+                 timeline_repository: TimelineRepository,
+                 notification_service: Optional[NotificationService] = None):
+        self.follow_repository = follow_repository
+        self.user_repository = user_repository
+        self.timeline_repository = timeline_repository
+        self.notification_service = notification_service or NotificationService(
+            NotificationRepository(), user_repository, EmailService())
+
+    def follow(self, user: User, target: User) -> Tuple[bool, str]:
+        """フォロー処理
+
+        フォロー先の最近の投稿をタイムラインに追加し、フォローされたユーザーに通知する。
+
+        Args:
+            user: フォローするユーザー
+            target: フォローされるユーザー
+
+        Returns:
+            (成功フラグ, メッセージ)
+        """
+        if user.id == target.id:
+            return (False, "自分自身はフォローできません")
+
+        with unit_of_work():
+            if not self.follow_repository.follow(user.id, target.id):
+                return (False, f"@{target.username} は既にフォローしています")
+            self.timeline_repository.add_author_posts(
+                user.id, target.id, current_app.config['TIMELINE_PAGE_SIZE'])
+            self.notification_service.notify(target, Notification.KIND_FOLLOW, user)
+            on_commit(lambda: follow_graph.add_edge(user.id, target.id))
+
+        return (True, f"@{target.username} をフォローしました")
+
+    def unfollow(self, user: User, target: User) -> Tuple[bool, str]:
+        """フォロー解除処理
+
+        フォロー先の投稿をタイムラインから削除する。
+
+        Args:
+            user: フォローを解除するユーザー
+            target: フォローを解除されるユーザー
+
+        Returns:
+            (成功フラグ, メッセージ)
+        """
+        with unit_of_work():
+            if not self.follow_repository.unfollow(user.id, target.id):
+                return (False, f"@{target.username} をフォローしていません")
+            self.timeline_repository.remove_author_posts(user.id, target.id)
+            on_commit(lambda: follow_graph.remove_edge(user.id, target.id))
+
+        return (True, f"@{target.username} のフォローを解除しました")
+
+    def is_following(self, user: User, target: User) -> bool:
+        """フォローしているかどうか"""
+        followees = follow_graph.followees(user.id)
+        index = bisect_left(followees, target.id)
+        return index < len(followees) and followees[index] == target.id
+
+    def counts(self, user: User) -> Tuple[int, int]:
+        """(フォロー数, フォロワー数) を取得"""
+        return (len(follow_graph.followees(user.id)), len(follow_graph.followers(user.id)))
+
+    def suggestions(self, user: User, limit: int = 5) -> List[User]:
+        """おすすめユーザー（フォロー先がフォローしているユーザー）を取得
+
+        フォロー先ごとのフォロー先の配列をまとめて数え上げ、多くのフォロー先から
+        フォローされているユーザーを優先する。
+
+        Args:
+            user: 対象のユーザー
+            limit: 取得件数
+
+        Returns:
+            ユーザーインスタンスのリスト
+        """
+        followees = follow_graph.followees(user.id)
+        if not len(followees):
+            return []
+
+        counts = Counter()
+        for ids in follow_graph.followees_many(followees.tolist()).values():
+            counts.update(ids)
+
+        excluded = set(followees)
+        excluded.add(user.id)
+        candidates = heapq.nlargest(
+            limit, ((count, -candidate) for candidate, count in counts.items() if candidate not in excluded))
+        user_ids = [-negated for _, negated in candidates]
+
+        users = {found.id: found for found in self.user_repository.find_by_ids(user_ids)}
+        return [users[user_id] for user_id in user_ids if user_id in users]
@@ -0,0 +1,86 @@
+import hashlib
+from typing import Dict, List
+
+from flask import current_app, render_template
+from markupsafe import Markup
+from sqlalchemy import event
+
+from app.cache import create_cache
+from app.models.user import Post
+
+
+POST_TEMPLATE = 'timeline/_post.html'
+
+
+class PostFragmentCache:
+    """描画済みの投稿HTMLを保持するフラグメントキャッシュ
+
+    投稿は作成後に変わらないため、投稿ID＋テンプレートのバージョンをキーに
+    描画結果を再利用する。テンプレートを変更するとバージョンが変わり、
+    古いエントリは参照されなくなる。投稿が更新・削除された場合は無効化する。
+    """
+
+    def init_app(self, app) -> None:
+        app.extensions['post_fragment_cache'] = create_cache(
+            app.config.get('FRAGMENT_CACHE_URL'), 'post_fragment',
+            app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 50000),
+            app.config.get('FRAGMENT_CACHE_TTL', 86400),
+            max_bytes=app.config.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    @property
+    def backend(self):
+        return current_app.extensions['post_fragment_cache']
+
+    def render_posts(self, posts: List[Post]) -> Dict[int, Markup]:
+        """投稿ごとのHTMLを取得（キャッシュにないものだけ描画する）
+
+        Args:
+            posts: 描画する投稿のリスト
+
+        Returns:
+            {投稿ID: 描画済みHTML}
+        """
+        enabled = current_app.config.get('FRAGMENT_CACHE_ENABLED', True)
+        version = self._template_version()
+        fragments = {}
+        for post in posts:
+            key = f'{version}:{post.id}'
+            html = self.backend.get(key) if enabled else None
+            if html is None:
+                html = render_template(POST_TEMPLATE, post=post)
+                if enabled:
+                    self.backend.set(key, html)
+            fragments[post.id] = Markup(html)
+        return fragments
+
+    def invalidate(self, post_id: int) -> None:
+        """投稿のキャッシュを無効化
+
+        Args:
+            post_id: 投稿ID
+        """
+        self.backend.delete(f'{self._template_version()}:{post_id}')
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数などの統計情報を取得"""
+        return self.backend.stats()
+
+    @staticmethod
+    def _template_version() -> str:
+        """投稿テンプレートのソースから求めたバージョン"""
+        versions = current_app.extensions.setdefault('post_fragment_versions', {})
+        version = versions.get(POST_TEMPLATE)
+        if version is None or current_app.debug:
+            source, _, _ = current_app.jinja_env.loader.get_source(current_app.jinja_env, POST_TEMPLATE)
+            version = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+            versions[POST_TEMPLATE] = version
+        return version
+
+
+post_fragment_cache = PostFragmentCache()
+
+
+@event.listens_for(Post, 'after_update')
+@event.listens_for(Post, 'after_delete')
+def _invalidate_post_fragment(mapper, connection, post):
+    post_fragment_cache.invalidate(post.id)
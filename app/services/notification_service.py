@@ -0,0 +1,169 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+
+from app.models.notification import DIGEST_WINDOWS, FREQUENCY_OFF, NOTIFICATION_FREQUENCIES, Notification
+from app.models.user import User
+from app.repository.notification_repository import NotificationRepository
+from app.repository.unit_of_work import unit_of_work
+from app.repository.user_repository import UserRepository
+from app.services.email_service import EmailService, OutgoingEmail
+
+
+DIGEST_TEXT_TEMPLATE = 'email/digest.txt'
+DIGEST_HTML_TEMPLATE = 'email/digest.html'
+
+# ダイジェストでの通知の種類ごとの見出し
+KIND_LABELS = {
+    Notification.KIND_FOLLOW: '新しいフォロワー',
+}
+
+
+class NotificationService:
+    """通知とダイジェストメール関連の処理を行うサービスクラス
+
+    通知は発生時に記録するのみで、ユーザーの通知頻度ごとの期間が過ぎた時点で
+    ユーザーごとに1通のダイジェストにまとめて送信する。メールの送信数は
+    通知の件数ではなくユーザー数に比例する。
+    """
+
+    def __init__(self, notification_repository: NotificationRepository,
+                 user_repository: UserRepository, email_service: EmailService):
+        self.notification_repository = notification_repository
+        self.user_repository = user_repository
+        self.email_service = email_service
+
+    def notify(self, user: User, kind: str, actor: Optional[User] = None) -> None:
+        """通知を記録（コミットは行わない。通知を受け取らない設定の場合は何もしない）
+
+        Args:
+            user: 通知先のユーザー
+            kind: 通知の種類
+            actor: 通知のきっかけとなったユーザー
+        """
+        if user.notification_frequency == FREQUENCY_OFF:
+            return
+        self.notification_repository.add(user.id, kind, actor.id if actor else None)
+
+    def update_frequency(self, user: User, frequency: str) -> Tuple[bool, str]:
+        """通知メールの頻度を変更
+
+        Args:
+            user: 対象のユーザー
+            frequency: 通知頻度（hourly / daily / off）
+
+        Returns:
+            (成功フラグ, メッセージ)
+        """
+        if frequency not in NOTIFICATION_FREQUENCIES:
+            return (False, "通知の頻度が正しくありません")
+        with unit_of_work():
+            user.notification_frequency = frequency
+            self.user_repository.save(user)
+            if frequency == FREQUENCY_OFF:
+                # 受け取らない設定にした時点で未送信の通知は破棄する
+                pending = self.notification_repository.find_pending([user.id])[user.id]
+                self.notification_repository.mark_digested(
+                    [notification.id for notification in pending], datetime.utcnow())
+        return (True, "通知の設定を変更しました")
+
+    def send_digests(self, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> int:
+        """送信時期になったユーザーにダイジェストメールを送信
+
+        テンプレートは1回だけ読み込んでコンパイルし、バッチごとに全ユーザー分の
+        メールを作成する。アウトボックス使用時は追加と送信済みの記録を1トランザクションで行う。
+        即時送信の場合はトランザクションの外で1通ずつ送信し、送信できたユーザーの通知のみ
+        送信済みにする（送信できなかった通知は次回の実行で再送する）。
+
+        Args:
+            now: 基準日時（省略時は現在時刻）
+            batch_size: 1バッチで処理するユーザー数（省略時は NOTIFICATION_DIGEST_BATCH_SIZE）
+
+        Returns:
+            送信したダイジェストの数
+        """
+        now = now or datetime.utcnow()
+        if batch_size is None:
+            batch_size = current_app.config['NOTIFICATION_DIGEST_BATCH_SIZE']
+        jinja_env = current_app.jinja_env
+        templates = (jinja_env.get_template(DIGEST_TEXT_TEMPLATE),
+                     jinja_env.get_template(DIGEST_HTML_TEMPLATE))
+
+        sent = 0
+        for frequency, window in DIGEST_WINDOWS.items():
+            # 送信できなかったユーザーを同じ実行で再び処理しないよう、ユーザーIDの順に進める
+            after_user_id = 0
+            while True:
+                user_ids = self.notification_repository.find_due_user_ids(
+                    frequency, now - window, batch_size, after_user_id)
+                if not user_ids:
+                    break
+                sent += self._send_batch(user_ids, now, templates)
+                if len(user_ids) < batch_size:
+                    break
+                after_user_id = user_ids[-1]
+        return sent
+
+    def _send_batch(self, user_ids: List[int], now: datetime, templates) -> int:
+        """1バッチ分のダイジェストを作成して送信し、送信した通知を送信済みにする"""
+        text_template, html_template = templates
+        max_items = current_app.config['NOTIFICATION_DIGEST_MAX_ITEMS']
+        users = {user.id: user for user in self.user_repository.find_by_ids(user_ids)}
+        pending = self.notification_repository.find_pending(user_ids)
+
+        digests: List[Tuple[List[int], OutgoingEmail]] = []
+        skipped_ids = []
+        for user_id, notifications in pending.items():
+            notification_ids = [notification.id for notification in notifications]
+            user = users.get(user_id)
+            # 無効なユーザーや未検証のメールアドレスには送信せず、通知のみ送信済みにする
+            if not notifications or user is None or not user.is_active or not user.email_verified:
+                skipped_ids.extend(notification_ids)
+                continue
+            context = {'user': user, 'groups': self._group(notifications, max_items),
+                       'count': len(notifications)}
+            digests.append((notification_ids, OutgoingEmail(
+                f"【SNS】新しいお知らせが{len(notifications)}件あります", [user.email],
+                text_template.render(context), html_template.render(context))))
+
+        if current_app.config.get('EMAIL_OUTBOX_ENABLED', False):
+            with unit_of_work():
+                self.notification_repository.mark_digested(
+                    skipped_ids + [i for ids, _ in digests for i in ids], now)
+                self.email_service.send_many([message for _, message in digests])
+            return len(digests)
+
+        # 送信中にトランザクションを開いたままにしないよう、先にコミットする
+        with unit_of_work():
+            self.notification_repository.mark_digested(skipped_ids, now)
+
+        sent = 0
+        delivered_ids = []
+        for notification_ids, message in digests:
+            try:
+                self.email_service.deliver_many([message], raise_errors=True)
+            except Exception as e:
+                print(f"ダイジェストメールの送信エラー: {str(e)}")
+                continue
+            sent += 1
+            delivered_ids.extend(notification_ids)
+
+        with unit_of_work():
+            self.notification_repository.mark_digested(delivered_ids, now)
+        return sent
+
+    @staticmethod
+    def _group(notifications: List[Notification], max_items: int) -> List[Dict]:
+        """通知を種類ごとにまとめる（種類ごとに max_items 人まで名前を表示）"""
+        groups: Dict[str, List[str]] = {}
+        for notification in notifications:
+            name = notification.actor.username if notification.actor else None
+            groups.setdefault(notification.kind, []).append(name)
+        return [
+            {
+                'label': KIND_LABELS.get(kind, kind),
+                'count': len(names),
+                'names': [name for name in names if name][:max_items],
+            }
+            for kind, names in groups.items()
+        ]
@@ -0,0 +1,51 @@
+import time
+from typing import Callable, Tuple
+from datetime import datetime, timedelta
+from flask import current_app
+
+from app.repository.user_repository import UserRepository
+
+
+class PurgeService:
+    """放置された登録と期限切れトークンを削除するサービスクラス
+
+    長時間のロックを避けるため、1バッチごとにコミットし、バッチ間で待機する。
+    """
+
+    def __init__(self, user_repository: UserRepository):
+        self.user_repository = user_repository
+
+    def purge(self, batch_size: int = 500, pause: float = 0.1,
+              unverified_after: timedelta = None) -> Tuple[int, int]:
+        """放置された未検証ユーザーと期限切れトークンを削除
+
+        Args:
+            batch_size: 1バッチで処理する最大件数
+            pause: バッチ間の待機時間（秒）
+            unverified_after: 未検証ユーザーを削除するまでの期間（省略時は PURGE_UNVERIFIED_AFTER）
+
+        Returns:
+            (削除したユーザー数, 削除したトークン数)
+        """
+        if unverified_after is None:
+            unverified_after = current_app.config['PURGE_UNVERIFIED_AFTER']
+        now = datetime.utcnow()
+
+        deleted_users = self._run_batches(
+            lambda: self.user_repository.delete_unverified_before(
+                now - unverified_after, batch_size, now),
+            batch_size, pause)
+        cleared_tokens = self._run_batches(
+            lambda: self.user_repository.clear_expired_tokens(now, batch_size),
+            batch_size, pause)
+        return (deleted_users, cleared_tokens)
+
+    @staticmethod
+    def _run_batches(batch: Callable[[], int], batch_size: int, pause: float) -> int:
+        total = 0
+        while True:
+            count = batch()
+            total += count
+            if count < batch_size:
+                return total
+            time.sleep(pause)
@@ -0,0 +1,72 @@
+from typing import List, Tuple
+from flask import current_app
+
+from app.models.user import Post
+from app.models.search import matches_terms, query_terms
+from app.repository.search_repository import SearchRepository
+
+
+# 検索語として扱う最大文字数（索引の参照回数を抑えるため）
+MAX_QUERY_LENGTH = 100
+# 本文の確認で除外される分を見込んで、必要な件数の何倍の候補を一度に取得するか
+CANDIDATE_FACTOR = 2
+
+
+class SearchService:
+    """投稿の全文検索を行うサービスクラス
+
+    トライグラム索引（3文字以上の語）または本文を2文字ずつのn-gramに分解した
+    転置索引で候補を絞り込むため、単語の区切りがない日本語でも部分一致で検索できる。
+    n-gramが揃っていても語を含まない投稿があるため、候補は正規化した本文が
+    全ての語を含むかを確認してから返す。
+    """
+
+    def __init__(self, search_repository: SearchRepository):
+        self.search_repository = search_repository
+
+    def search(self, query: str, page: int = 1) -> Tuple[List[Post], bool]:
+        """投稿を検索
+
+        Args:
+            query: 検索語（空白区切りで複数指定可）
+            page: ページ番号（1から）
+
+        Returns:
+            (関連度順に並んだ投稿インスタンスのリスト, 次ページがあるかどうか)
+        """
+        terms = query_terms((query or '')[:MAX_QUERY_LENGTH])
+        if not terms:
+            return ([], False)
+
+        page_size = current_app.config['SEARCH_PAGE_SIZE']
+        max_page = current_app.config['SEARCH_MAX_PAGE']
+        page = min(max(page, 1), max_page)
+
+        # 次ページの有無を判定するため1件多く取得する
+        start = (page - 1) * page_size
+        post_ids = self._find_matching_ids(terms, start + page_size + 1)[start:]
+        has_next = len(post_ids) > page_size and page < max_page
+        return (self.search_repository.find_posts(post_ids[:page_size]), has_next)
+
+    def _find_matching_ids(self, terms: List[str], count: int) -> List[int]:
+        """本文が全ての語を含む投稿のIDを、索引の順位のまま先頭から count 件まで取得
+
+        Args:
+            terms: 正規化した検索語のリスト
+            count: 取得件数
+
+        Returns:
+            投稿IDのリスト
+        """
+        batch_size = count * CANDIDATE_FACTOR
+        matched: List[int] = []
+        offset = 0
+        while len(matched) < count:
+            candidate_ids = self.search_repository.find_candidate_ids(terms, batch_size, offset)
+            bodies = self.search_repository.find_bodies(candidate_ids)
+            matched.extend(post_id for post_id in candidate_ids
+                           if post_id in bodies and matches_terms(bodies[post_id], terms))
+            if len(candidate_ids) < batch_size:
+                break
+            offset += batch_size
+        return matched[:count]
@@ -0,0 +1,234 @@
+import base64
+import binascii
+import hashlib
+from typing import Optional, Tuple, List
+from datetime import datetime
+from flask import current_app
+
+from app.models.user import User, Post
+from app.repository.timeline_repository import TimelineRepository, Cursor
+from app.repository.follow_graph import follow_graph
+from app.repository.follow_repository import FollowRepository
+from app.pubsub import timeline_stream
+
+
+def encode_cursor(post: Post) -> str:
+    """投稿の位置を表す不透明なカーソル文字列を生成
+
+    Args:
+        post: ページ末尾の投稿
+
+    Returns:
+        URLセーフなカーソル文字列
+    """
+    raw = f'{post.timestamp.isoformat()}|{post.id}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """カーソル文字列を (投稿日時, 投稿ID) に復元
+
+    Args:
+        cursor: encode_cursor で生成したカーソル文字列
+
+    Returns:
+        (投稿日時, 投稿ID)、不正な値の場合はNone
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+        timestamp, post_id = raw.split('|', 1)
+        timestamp, post_id = datetime.fromisoformat(timestamp), int(post_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+    # タイムゾーン付きの日時や範囲外のIDはクエリでエラーになるため不正とする
+    if timestamp.tzinfo is not None or not 0 < post_id < 2 ** 63:
+        return None
+    return (timestamp, post_id)
+
+
+def is_valid_cursor(cursor: Optional[str]) -> bool:
+    """カーソル文字列が省略されているか、復元できる値かどうかを判定
+
+    Args:
+        cursor: リクエストで指定されたカーソル文字列
+
+    Returns:
+        省略時または復元できる場合はTrue
+    """
+    return not cursor or decode_cursor(cursor) is not None
+
+
+def serialize_post(post: Post) -> dict:
+    """投稿をJSONに変換できる辞書に変換
+
+    Args:
+        post: 投稿インスタンス
+
+    Returns:
+        投稿の辞書
+    """
+    return {
+        'id': post.id,
+        'body': post.body,
+        'timestamp': post.timestamp.isoformat(),
+        'author': {'id': post.author.id, 'username': post.author.username},
+    }
+
+
+class FollowAudience:
+    """フォロー関係を配信先とするリゾルバ
+
+    投稿の展開先（フォロワー）は follow テーブルから取得する。フォローグラフの
+    キャッシュは他のワーカーでの変更の反映が遅れるため、展開先には使わない。
+    フォロー先はフォローグラフのキャッシュから取得する。
+    """
+
+    def __init__(self, graph=None, follow_repository=None):
+        self.graph = graph or follow_graph
+        self.follow_repository = follow_repository or FollowRepository
+
+    def follower_count(self, author_id: int) -> int:
+        """投稿者のフォロワー数を取得"""
+        return self.follow_repository.count_followers(author_id)
+
+    def followers_of(self, author_id: int) -> List[int]:
+        """投稿者のフォロワーIDのリストを取得"""
+        return self.follow_repository.find_follower_ids([author_id])[author_id]
+
+    def followees_of(self, user_id: int) -> List[int]:
+        """ユーザーがフォローしている投稿者IDのリストを取得"""
+        return self.graph.followees(user_id).tolist()
+
+
+class TimelineService:
+    """ホームタイムライン関連の処理を行うサービスクラス
+
+    投稿時に購読者ごとのタイムラインへ展開（fan-out on write）し、
+    ホームの表示はタイムラインテーブルの範囲読み込みのみで行う。
+    購読者数が TIMELINE_FANOUT_LIMIT を超える投稿者の投稿は展開せず、
+    読み込み時に取得してマージする。
+    """
+
+    def __init__(self, timeline_repository: TimelineRepository, audience=None):
+        self.timeline_repository = timeline_repository
+        self.audience = audience or FollowAudience()
+
+    def publish(self, author: User, body: str) -> Tuple[bool, str, Optional[Post]]:
+        """投稿処理
+
+        Args:
+            author: 投稿者
+            body: 投稿本文
+
+        Returns:
+            (成功フラグ, メッセージ, 投稿インスタンス)
+        """
+        body = (body or '').strip()
+        if not body:
+            return (False, "投稿内容を入力してください", None)
+
+        fanout_limit = current_app.config['TIMELINE_FANOUT_LIMIT']
+        fan_out = self.audience.follower_count(author.id) <= fanout_limit
+
+        post = self.timeline_repository.create_post(author.id, body, fanned_out=fan_out)
+        # 投稿の書き込み後のため、フォロワーはプライマリから読み込まれる
+        if fan_out:
+            recipients = set(self.audience.followers_of(author.id))
+        else:
+            recipients = set()
+        # 自分の投稿は常に自分のタイムラインに載せる
+        recipients.add(author.id)
+        self.timeline_repository.add_timeline_entries(sorted(recipients), post)
+        self.timeline_repository.commit()
+
+        # 接続中のタイムラインに新着を通知（失敗しても投稿は成功とする）
+        try:
+            timeline_stream.publish_post(post, recipients)
+        except Exception as e:
+            print(f"新着投稿の配信エラー: {str(e)}")
+
+        return (True, "投稿しました", post)
+
+    def home_timeline(self, user: User, cursor: Optional[str] = None,
+                      limit: Optional[int] = None) -> Tuple[List[Post], Optional[str]]:
+        """ホームタイムラインを1ページ分取得
+
+        「(timestamp, id) がカーソルより古い投稿」を条件とするキーセット方式のため、
+        深いページでも先頭ページと同じコストで読み込め、新しい投稿が追加されても
+        ページ境界はずれない。
+
+        Args:
+            user: タイムラインを表示するユーザー
+            cursor: 前ページの next_cursor（省略時は先頭ページ）
+            limit: 取得件数（省略時は TIMELINE_PAGE_SIZE）
+
+        Returns:
+            (新しい順に並んだ投稿インスタンスのリスト, 次ページのカーソル)
+        """
+        if limit is None:
+            limit = current_app.config['TIMELINE_PAGE_SIZE']
+        before = decode_cursor(cursor)
+
+        # 次ページの有無を判定するため1件多く取得する
+        posts = self.timeline_repository.find_timeline_posts(user.id, limit + 1, before)
+        pulled = self.timeline_repository.find_unfanned_posts(
+            self.audience.followees_of(user.id), limit + 1, before)
+        if pulled:
+            merged = {post.id: post for post in posts}
+            for post in pulled:
+                merged.setdefault(post.id, post)
+            posts = sorted(merged.values(), key=lambda p: (p.timestamp, p.id), reverse=True)
+
+        if len(posts) > limit:
+            posts = posts[:limit]
+            return (posts, encode_cursor(posts[-1]))
+        return (posts, None)
+
+    def home_etag(self, user: User, cursor: Optional[str] = None,
+                  limit: Optional[int] = None) -> str:
+        """ホームタイムラインのページの内容を表すETagを生成
+
+        先頭の投稿IDと閲覧者の状態（ユーザー名・フォロー先）から求めるため、
+        投稿の行を読み込まずに変更の有無を判定できる。
+
+        Args:
+            user: タイムラインを表示するユーザー
+            cursor: 前ページの next_cursor（省略時は先頭ページ）
+            limit: 取得件数（省略時は TIMELINE_PAGE_SIZE）
+
+        Returns:
+            ETagの値（引用符なし）
+        """
+        if limit is None:
+            limit = current_app.config['TIMELINE_PAGE_SIZE']
+        followees = self.audience.followees_of(user.id)
+        fanned, unfanned = self.timeline_repository.find_timeline_head(user.id, followees)
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (user.id, user.username, fanned, unfanned, cursor, limit):
+            digest.update(f'{part}|'.encode('utf-8'))
+        digest.update(','.join(map(str, followees)).encode('ascii'))
+        return digest.hexdigest()
+
+    def user_timeline(self, user: User, cursor: Optional[str] = None,
+                      limit: Optional[int] = None) -> Tuple[List[Post], Optional[str]]:
+        """ユーザー自身の投稿を1ページ分取得
+
+        Args:
+            user: 投稿者
+            cursor: 前ページの next_cursor（省略時は先頭ページ）
+            limit: 取得件数（省略時は TIMELINE_PAGE_SIZE）
+
+        Returns:
+            (新しい順に並んだ投稿インスタンスのリスト, 次ページのカーソル)
+        """
+        if limit is None:
+            limit = current_app.config['TIMELINE_PAGE_SIZE']
+
+        posts = self.timeline_repository.find_posts_by_user(user.id, limit + 1, decode_cursor(cursor))
+        if len(posts) > limit:
+            posts = posts[:limit]
+            return (posts, encode_cursor(posts[-1]))
+        return (posts, None)
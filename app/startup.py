@@ -0,0 +1,83 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+# 新しいプロセスでアプリケーションを作成し、所要時間（秒）を出力するスクリプト
+COLD_START_SCRIPT = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "from app import create_app\n"
+    "create_app()\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+_IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+
+class StartupReport(NamedTuple):
+    """起動時間の計測結果"""
+    # 各回の起動時間（ミリ秒）
+    timings_ms: List[float]
+    # パッケージごとの読み込み時間（ミリ秒、降順）
+    imports_ms: List[Tuple[str, float]]
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.timings_ms)
+
+
+def measure_cold_start(runs: int = 3, project_root: Optional[str] = None) -> StartupReport:
+    """新しいプロセスでのアプリケーション起動時間を計測
+
+    起動時間は `-X importtime` を付けずに runs 回計測し、読み込みの内訳は
+    `-X importtime` を付けた1回分から求める。
+
+    Args:
+        runs: 起動時間を計測する回数
+        project_root: アプリケーションのあるディレクトリ（省略時はこのパッケージの親）
+
+    Returns:
+        計測結果
+    """
+    cwd = project_root or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+    for _ in range(max(1, runs)):
+        result = _run([sys.executable, '-c', COLD_START_SCRIPT], cwd)
+        timings.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+
+    result = _run([sys.executable, '-X', 'importtime', '-c', COLD_START_SCRIPT], cwd)
+    return StartupReport(timings, summarize_import_times(result.stderr))
+
+
+def summarize_import_times(output: str) -> List[Tuple[str, float]]:
+    """`-X importtime` の出力をパッケージごとの読み込み時間に集計
+
+    各モジュール自身の時間（self）をトップレベルのパッケージごとに合計する。
+    アプリケーション内のモジュール（app.*）はモジュール単位で集計する。
+
+    Args:
+        output: `-X importtime` が標準エラーに出力した内容
+
+    Returns:
+        (パッケージ名, ミリ秒) のリスト（降順）
+    """
+    totals: Dict[str, float] = {}
+    for line in output.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, name = int(match.group(1)), match.group(4)
+        key = name if name.split('.')[0] == 'app' else name.split('.')[0]
+        totals[key] = totals.get(key, 0.0) + self_us / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def _run(command: List[str], cwd: str) -> subprocess.CompletedProcess:
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"アプリケーションの起動に失敗しました:\n{result.stderr[-2000:]}")
+    return result
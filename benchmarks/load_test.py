@@ -0,0 +1,238 @@
+"""認証・タイムラインの負荷テストとレイテンシ計測
+
+create_app() で構築した実際のアプリケーションに対してテストクライアントで
+リクエストを送り、エンドポイントごとのスループット、p50/p95/p99 レイテンシ、
+1リクエストあたりのSQL文の数を計測する。メールは Flask-Mailman の locmem
+バックエンドで捕捉する。
+
+使い方:
+    python benchmarks/load_test.py --users 50 --output baseline.json
+    python benchmarks/load_test.py --users 50 --compare baseline.json
+
+--database-url を省略した場合は一時ファイルのSQLiteを使用する。
+ローカルのPostgreSQLに対して実行する場合は空のデータベースを指定すること。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.repository.last_seen_buffer import last_seen_buffer  # noqa: E402
+
+
+VERIFY_URL_PATTERN = re.compile(r'/auth/verify/[^\s"<]+')
+
+# 比較時にリグレッションとみなす指標と方向（大きいほど悪いものは1、小さいほど悪いものは-1）
+COMPARED_METRICS = {
+    'p50_ms': 1,
+    'p95_ms': 1,
+    'p99_ms': 1,
+    'sql_per_request': 1,
+    'throughput_rps': -1,
+}
+
+
+def build_config(database_url: str):
+    class BenchmarkConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = database_url
+        MAIL_BACKEND = 'locmem'
+        RATE_LIMIT_ENABLED = False
+        MAIL_DEBUG = False
+        USE_RESEND = False
+        EMAIL_OUTBOX_ENABLED = False
+        SERVER_NAME = 'localhost'
+    return BenchmarkConfig
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近傍法によるパーセンタイル"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class LoadTest:
+    """1つのアプリケーションに対してユーザーの一連の操作を繰り返す負荷テスト"""
+
+    def __init__(self, app):
+        self.app = app
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statements: Dict[str, List[int]] = defaultdict(list)
+        self.elapsed: Dict[str, float] = defaultdict(float)
+        self._statement_count = 0
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count_statement)
+
+    def _count_statement(self, *args):
+        self._statement_count += 1
+
+    def request(self, client, label: str, method: str, url: str, **kwargs):
+        self._statement_count = 0
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f'{label} {url} が {response.status_code} を返しました')
+        self.latencies[label].append(elapsed * 1000)
+        self.statements[label].append(self._statement_count)
+        self.elapsed[label] += elapsed
+        return response
+
+    def _pop_verify_url(self, email: str) -> str:
+        outbox = self.app.extensions['mailman'].outbox
+        for index in range(len(outbox) - 1, -1, -1):
+            message = outbox[index]
+            if email in message.to:
+                del outbox[index]
+                return VERIFY_URL_PATTERN.search(message.body).group(0)
+        raise RuntimeError(f'{email} 宛ての検証メールが見つかりません')
+
+    def run_user(self, name: str, home_views: int, follow: str = None) -> None:
+        email = f'{name}@example.com'
+        client = self.app.test_client()
+
+        self.request(client, 'auth.register', 'POST', '/auth/register', data={'email': email})
+        self.request(client, 'auth.verify_email', 'GET', self._pop_verify_url(email))
+        self.request(client, 'auth.setup_account', 'POST', '/auth/setup',
+                     data={'username': name})
+        if follow:
+            self.request(client, 'users.follow', 'POST', f'/users/{follow}/follow')
+        self.request(client, 'timeline.create_post', 'POST', '/post',
+                     data={'body': f'ベンチマーク投稿 {name}'})
+        for _ in range(home_views):
+            self.request(client, 'timeline.home', 'GET', '/home')
+
+        client.get('/auth/logout')
+        self.request(client, 'auth.login', 'POST', '/auth/login', data={'email': email})
+        self.request(client, 'auth.verify_email', 'GET', self._pop_verify_url(email))
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        results = {}
+        for label in sorted(self.latencies):
+            latencies = self.latencies[label]
+            results[label] = {
+                'requests': len(latencies),
+                'throughput_rps': round(len(latencies) / self.elapsed[label], 2),
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'sql_per_request': round(sum(self.statements[label]) / len(latencies), 2),
+            }
+        return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """ベースラインと比較し、許容範囲を超えて悪化した指標を返す"""
+    regressions = []
+    for label, base in baseline['endpoints'].items():
+        now = current['endpoints'].get(label)
+        if now is None:
+            regressions.append(f'{label}: 計測結果がありません')
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            before, after = base[metric], now[metric]
+            if direction > 0:
+                # SQL文の数は許容範囲なしで比較する
+                limit = before if metric == 'sql_per_request' else before * (1 + tolerance)
+                worse = after > limit
+            else:
+                worse = after < before * (1 - tolerance)
+            if worse:
+                regressions.append(f'{label}: {metric} {before} -> {after}')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='使用するデータベースのURL（省略時は一時SQLite）')
+    parser.add_argument('--users', type=int, default=20, help='登録するユーザー数')
+    parser.add_argument('--home-views', type=int, default=5, help='ユーザーごとの /home の表示回数')
+    parser.add_argument('--warmup', type=int, default=2, help='計測前に実行するユーザー数')
+    parser.add_argument('--output', help='結果をJSONで書き出すファイル')
+    parser.add_argument('--compare', help='比較するベースラインのJSONファイル')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='レイテンシとスループットの許容悪化率')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url
+    temp_path = None
+    if database_url is None:
+        handle, temp_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        database_url = f'sqlite:///{temp_path}'
+    try:
+        return run(args, database_url)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+
+def run(args, database_url: str) -> int:
+    app = create_app(build_config(database_url))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    warmup = LoadTest(app)
+    for index in range(args.warmup):
+        warmup.run_user(f'warmup{index}', args.home_views,
+                        follow=f'warmup{index - 1}' if index else None)
+
+    load_test = LoadTest(app)
+    for index in range(args.users):
+        load_test.run_user(f'bench{index}', args.home_views,
+                           follow=f'bench{index - 1}' if index else None)
+
+    with app.app_context():
+        last_seen_buffer.flush()
+        db.engine.dispose()
+
+    result = {
+        'database': make_url(database_url).get_backend_name(),
+        'users': args.users,
+        'home_views': args.home_views,
+        'endpoints': load_test.report(),
+    }
+
+    print(f"{'endpoint':<24}{'reqs':>6}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'sql':>7}")
+    for label, stats in result['endpoints'].items():
+        print(f"{label:<24}{stats['requests']:>6}{stats['throughput_rps']:>10}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+              f"{stats['sql_per_request']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print('\nリグレッションを検出しました:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print('\nベースラインとの差は許容範囲内です')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
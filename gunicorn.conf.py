@@ -0,0 +1,19 @@
+import os
+
+
+# 本番用の gunicorn の設定（`gunicorn -c gunicorn.conf.py main:app`）
+# gevent ワーカーは1プロセスで多数の接続を保持できるため、新着投稿の配信（SSE）の
+# 長時間接続がワーカーを占有しない
+bind = f"0.0.0.0:{os.environ.get('PORT') or 5000}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or 4)
+# アプリ側でワーカー数に応じた設定の検査を行えるようにする（app.config['WEB_CONCURRENCY']）
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_class = 'gevent'
+# 1ワーカーあたりの同時接続数（STREAM_MAX_CONNECTIONS より大きくする）
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS') or 2000)
+
+
+def post_fork(server, worker):
+    # psycopg2 の問い合わせ中に他の接続の処理が止まらないようにする
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
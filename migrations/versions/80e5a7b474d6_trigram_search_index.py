@@ -0,0 +1,80 @@
+"""trigram search index (pg_trgm / FTS5)
+
+Revision ID: 80e5a7b474d6
+Revises: c021d37bc422
+Create Date: 2026-10-18 02:10:41.208315
+
+"""
+import sqlite3
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '80e5a7b474d6'
+down_revision = 'c021d37bc422'
+branch_labels = None
+depends_on = None
+
+# 既存の投稿を索引に登録する際の1バッチの件数
+BACKFILL_BATCH_SIZE = 1000
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE post_search_fts USING fts5("
+    "body, content='post_search_text', content_rowid='post_id', tokenize='trigram')",
+    "CREATE TRIGGER post_search_text_ai AFTER INSERT ON post_search_text BEGIN "
+    "INSERT INTO post_search_fts(rowid, body) VALUES (new.post_id, new.body); END",
+    "CREATE TRIGGER post_search_text_ad AFTER DELETE ON post_search_text BEGIN "
+    "INSERT INTO post_search_fts(post_search_fts, rowid, body) VALUES ('delete', old.post_id, old.body); END",
+    "CREATE TRIGGER post_search_text_au AFTER UPDATE ON post_search_text BEGIN "
+    "INSERT INTO post_search_fts(post_search_fts, rowid, body) VALUES ('delete', old.post_id, old.body); "
+    "INSERT INTO post_search_fts(rowid, body) VALUES (new.post_id, new.body); END",
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    post_search_text = op.create_table('post_search_text',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    if bind.dialect.name == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0):
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+    # 既存の投稿を正規化（全角英数の半角化・小文字化）して登録
+    post = sa.table('post', sa.column('id', sa.Integer), sa.column('body', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(post.c.id, post.c.body).where(post.c.id > last_id)
+            .order_by(post.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        op.bulk_insert(post_search_text, [
+            {'post_id': row.id, 'body': unicodedata.normalize('NFKC', row.body or '').lower()}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('post_search_text', schema=None) as batch_op:
+        batch_op.create_index('ix_post_search_text_body_trgm', ['body'], unique=False, postgresql_using='gin', postgresql_ops={'body': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('post_search_text', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_search_text_body_trgm', postgresql_using='gin', postgresql_ops={'body': 'gin_trgm_ops'})
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in ('DROP TRIGGER IF EXISTS post_search_text_au', 'DROP TRIGGER IF EXISTS post_search_text_ad',
+                          'DROP TRIGGER IF EXISTS post_search_text_ai', 'DROP TABLE IF EXISTS post_search_fts'):
+            op.execute(statement)
+    op.drop_table('post_search_text')
@@ -0,0 +1,33 @@
+import pytest
+
+from app import create_app, db
+from app.config import Config
+from app.repository.last_seen_buffer import last_seen_buffer
+
+
+class TestConfig(Config):
+    """テスト用の設定（インメモリのSQLite、メールは locmem に保存）"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_REPLICA_URIS = []
+    WTF_CSRF_ENABLED = False
+    MAIL_BACKEND = 'locmem'
+    MAIL_DEBUG = False
+    USE_RESEND = False
+    EMAIL_OUTBOX_ENABLED = False
+    RATE_LIMIT_ENABLED = False
+    METRICS_ENABLED = False
+    PROFILE_ENABLED = False
+    PRODUCTION_MODE = False
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        # 記録済みの最終アクセス日時はテーブルを削除する前に書き込む
+        last_seen_buffer.flush()
+        db.session.remove()
+        db.drop_all()
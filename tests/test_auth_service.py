@@ -0,0 +1,44 @@
+import pytest
+
+from app.models.user import User
+from app.repository.unit_of_work import unit_of_work
+from app.repository.user_repository import UserRepository
+from app.services.auth_service import AuthService
+from app.services.email_service import EmailService
+
+
+@pytest.fixture
+def auth_service(app):
+    with app.test_request_context():
+        yield AuthService(UserRepository(), EmailService())
+
+
+def test_verification_email_is_sent_after_commit(app, auth_service):
+    success, _, user = auth_service.register_user('new@example.com')
+
+    assert success
+    assert User.query.filter_by(email='new@example.com').count() == 1
+    outbox = app.extensions['mailman'].outbox
+    assert [message.to for message in outbox] == [['new@example.com']]
+
+
+def test_verification_email_is_not_sent_on_rollback(app, auth_service):
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            auth_service.register_user('rollback@example.com')
+            # 登録後に同じトランザクション内で失敗した場合
+            raise RuntimeError('failed after registration')
+
+    assert User.query.filter_by(email='rollback@example.com').count() == 0
+    assert not getattr(app.extensions['mailman'], 'outbox', [])
+
+
+def test_login_sends_link_after_commit(app):
+    user = UserRepository.create_user('login@example.com')
+    UserRepository.mark_email_verified(user)
+
+    response = app.test_client().post('/auth/login', data={'email': 'login@example.com'})
+
+    assert response.status_code == 200
+    outbox = app.extensions['mailman'].outbox
+    assert [message.to for message in outbox] == [['login@example.com']]
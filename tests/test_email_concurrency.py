@@ -0,0 +1,199 @@
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import create_app
+from app.services.email_service import EmailService, OutgoingEmail
+from tests.conftest import TestConfig
+
+
+# 1通（1リクエスト）あたりのサーバーの応答時間（秒）
+SERVER_DELAY = 0.2
+
+
+class InFlight:
+    """同時に処理中の件数の最大値を記録する"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.current -= 1
+
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    """DATAの受信ごとに SERVER_DELAY 秒待つ最小限のSMTPサーバー"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.connections = 0
+        self.recipients = []
+        self.in_flight = InFlight()
+        super().__init__(('127.0.0.1', 0), FakeSmtpHandler)
+
+
+class FakeSmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 fake ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode('ascii', 'replace').strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'EHLO':
+                self.reply('250 fake')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip(' <>'))
+                self.reply('250 ok')
+            elif command == 'DATA':
+                self.reply('354 end with .')
+                while self.rfile.readline().rstrip(b'\r\n') != b'.':
+                    pass
+                with server.in_flight:
+                    time.sleep(SERVER_DELAY)
+                server.recipients.extend(recipients)
+                recipients = []
+                self.reply('250 queued')
+            else:
+                # MAIL / RSET / NOOP / HELO
+                self.reply('250 ok')
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        with server.in_flight:
+            time.sleep(SERVER_DELAY)
+        server.requests.append((self.path, len(payload)))
+        body = json.dumps({'data': [{'id': f'id-{i}'} for i in range(len(payload))]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _messages(count):
+    return [OutgoingEmail('件名', [f'user{i}@example.com'], '本文') for i in range(count)]
+
+
+@pytest.fixture
+def smtp_server():
+    server = _serve(FakeSmtpServer())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def resend_server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeResendHandler)
+    server.daemon_threads = True
+    server.in_flight = InFlight()
+    server.requests = []
+    _serve(server)
+    monkeypatch.setattr('resend.api_url', f'http://127.0.0.1:{server.server_address[1]}')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _app(**config):
+    config_class = type('EmailConfig', (TestConfig,), config)
+    return create_app(config_class)
+
+
+def test_smtp_batch_is_sent_over_concurrent_reused_connections(smtp_server):
+    app = _app(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.server_address[1],
+               EMAIL_SEND_CONCURRENCY=4)
+
+    with app.app_context():
+        start = time.perf_counter()
+        EmailService.deliver_many(_messages(8), raise_errors=True)
+        elapsed = time.perf_counter() - start
+        EmailService.deliver_many(_messages(4), raise_errors=True)
+
+    assert sorted(smtp_server.recipients) == sorted(
+        [f'user{i}@example.com' for i in range(8)] + [f'user{i}@example.com' for i in range(4)])
+    assert smtp_server.in_flight.peak == 4
+    # 順に送る場合（8 × SERVER_DELAY）の半分未満で終わる
+    assert elapsed < 8 * SERVER_DELAY / 2
+    # 2回目の送信はプールのスレッドが保持する接続を再利用する
+    assert smtp_server.connections == 4
+
+
+def test_smtp_concurrency_of_one_sends_serially(smtp_server):
+    app = _app(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.server_address[1],
+               EMAIL_SEND_CONCURRENCY=1)
+
+    with app.app_context():
+        EmailService.deliver_many(_messages(3), raise_errors=True)
+
+    assert len(smtp_server.recipients) == 3
+    assert smtp_server.in_flight.peak == 1
+    assert smtp_server.connections == 1
+
+
+def test_resend_batches_over_limit_are_posted_concurrently(resend_server):
+    app = _app(USE_RESEND=True, RESEND_API_KEY='re_test', EMAIL_SEND_CONCURRENCY=4)
+
+    with app.app_context():
+        start = time.perf_counter()
+        EmailService.deliver_many(_messages(250), raise_errors=True)
+        elapsed = time.perf_counter() - start
+
+    assert sorted(resend_server.requests) == [('/emails/batch', 50), ('/emails/batch', 100),
+                                              ('/emails/batch', 100)]
+    assert resend_server.in_flight.peak == 3
+    assert elapsed < 3 * SERVER_DELAY
+
+
+def test_failed_chunk_is_raised_after_others_finish(smtp_server, monkeypatch):
+    app = _app(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.server_address[1],
+               EMAIL_SEND_CONCURRENCY=2)
+    messages = _messages(4)
+    messages[1] = OutgoingEmail('件名', ['broken@example.com'], '本文')
+
+    from app.services import email_transport
+    send = email_transport.SmtpTransport._send_serially
+
+    def failing_send(self, chunk):
+        if any('broken@example.com' in message.to for message in chunk):
+            raise RuntimeError('rejected')
+        return send(self, chunk)
+
+    monkeypatch.setattr(email_transport.SmtpTransport, '_send_serially', failing_send)
+    with app.app_context(), pytest.raises(RuntimeError):
+        EmailService.deliver_many(messages, raise_errors=True)
+
+    # 失敗しなかった側の分割（1通目と3通目）は送信される
+    assert sorted(smtp_server.recipients) == ['user0@example.com', 'user2@example.com']
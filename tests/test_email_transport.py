@@ -0,0 +1,61 @@
+from smtplib import SMTPServerDisconnected
+
+import pytest
+
+from app.services import email_transport
+from app.services.email_transport import SmtpTransport
+
+
+class FakeConnection:
+    """指定した件数を送信した後に一度だけ切断されるSMTP接続"""
+
+    def __init__(self, delivered, disconnect_after=None):
+        self.delivered = delivered
+        self.disconnect_after = disconnect_after
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.disconnect_after is not None and len(self.delivered) >= self.disconnect_after:
+            self.disconnect_after = None
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        self.delivered.extend(messages)
+        return len(messages)
+
+
+@pytest.fixture
+def connections(app, monkeypatch):
+    delivered = []
+    created = []
+
+    def get_connection():
+        # 最初の接続のみ途中で切断される
+        connection = FakeConnection(delivered, disconnect_after=2 if not created else None)
+        created.append(connection)
+        return connection
+
+    monkeypatch.setattr(email_transport.mail, 'get_connection', get_connection)
+    return delivered, created
+
+
+def test_reconnect_resends_only_undelivered_messages(connections):
+    delivered, created = connections
+    sent = SmtpTransport(keepalive_seconds=30).send_messages(['m1', 'm2', 'm3', 'm4'])
+
+    assert sent == 4
+    assert delivered == ['m1', 'm2', 'm3', 'm4']
+    assert len(created) == 2
+
+
+def test_second_disconnect_is_raised(app, monkeypatch):
+    class AlwaysDisconnected(FakeConnection):
+        def send_messages(self, messages):
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+
+    monkeypatch.setattr(email_transport.mail, 'get_connection', lambda: AlwaysDisconnected([]))
+    with pytest.raises(SMTPServerDisconnected):
+        SmtpTransport(keepalive_seconds=30).send_messages(['m1'])
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from smtplib import SMTPException
+
+from app import db
+from app.models.email_outbox import EmailOutbox
+from app.repository.email_outbox_repository import EmailOutboxRepository
+from app.services.email_worker import EmailOutboxWorker
+
+
+class FailingTransport:
+    """常に送信に失敗するSMTP送信クラス"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def send_messages(self, messages):
+        self.calls += 1
+        raise SMTPException('connection refused')
+
+    def close(self):
+        pass
+
+
+def _make_due(entry):
+    entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_failed_send_is_retried_with_backoff_then_dead(app):
+    app.config.update(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_BACKOFF_BASE=30,
+                      EMAIL_OUTBOX_BACKOFF_MAX=45)
+    transport = FailingTransport()
+    app.extensions['email_transports'] = {'smtp': transport}
+    entry = EmailOutboxRepository.enqueue('件名', ['a@example.com'], '本文')
+    worker = EmailOutboxWorker(app, concurrency=1)
+
+    # 1回目: 基準値（30秒）後に再試行
+    before = datetime.utcnow()
+    assert worker.run_once() == (0, 1)
+    entry = EmailOutboxRepository.find_by_id(entry.id)
+    assert entry.status == EmailOutbox.STATUS_PENDING
+    assert entry.attempts == 1
+    assert entry.last_error == 'connection refused'
+    assert before + timedelta(seconds=29) <= entry.next_attempt_at <= datetime.utcnow() + timedelta(seconds=31)
+
+    # 再試行時刻前は取得されない
+    assert worker.run_once() == (0, 0)
+
+    # 2回目: 60秒に倍増するが上限の45秒に抑えられる
+    _make_due(entry)
+    before = datetime.utcnow()
+    assert worker.run_once() == (0, 1)
+    entry = EmailOutboxRepository.find_by_id(entry.id)
+    assert entry.attempts == 2
+    assert before + timedelta(seconds=44) <= entry.next_attempt_at <= datetime.utcnow() + timedelta(seconds=46)
+
+    # 3回目: 最大試行回数に達したのでデッドレターに移る
+    _make_due(entry)
+    assert worker.run_once() == (0, 1)
+    entry = EmailOutboxRepository.find_by_id(entry.id)
+    assert entry.status == EmailOutbox.STATUS_DEAD
+    assert entry.attempts == 3
+    assert transport.calls == 3
+
+
+def test_successful_send_is_marked_sent(app):
+    entry = EmailOutboxRepository.enqueue('件名', ['a@example.com'], '本文')
+    assert EmailOutboxWorker(app, concurrency=1).run_once() == (1, 0)
+    entry = EmailOutboxRepository.find_by_id(entry.id)
+    assert entry.status == EmailOutbox.STATUS_SENT
+    assert entry.sent_at is not None
+    assert [message.to for message in app.extensions['mailman'].outbox] == [['a@example.com']]
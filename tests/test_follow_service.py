@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from app import create_app, db
+from app.models.follow import Follow
+from app.models.notification import Notification
+from app.models.timeline import TimelineEntry
+from app.models.user import Post, User
+from app.repository import follow_graph as follow_graph_module
+from app.repository.follow_graph import follow_graph
+from app.repository.follow_repository import FollowRepository
+from app.repository.timeline_repository import TimelineRepository
+from app.repository.user_repository import UserRepository
+from app.services.follow_service import FollowService
+from tests.conftest import TestConfig
+
+
+def _user(name):
+    user = User(email=f'{name}@example.com', username=name, email_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _service():
+    return FollowService(FollowRepository(), UserRepository(), TimelineRepository())
+
+
+def _timeline(user):
+    return sorted(entry.post_id for entry in TimelineEntry.query.filter_by(user_id=user.id))
+
+
+def test_follow_adds_posts_edge_and_notification(app):
+    alice, bob = _user('alice'), _user('bob')
+    post = Post(body='hello', author=bob)
+    db.session.add(post)
+    db.session.commit()
+    service = _service()
+    # キャッシュに載せた後のフォローも反映される
+    assert not service.is_following(alice, bob)
+
+    assert service.follow(alice, bob)[0]
+
+    assert service.is_following(alice, bob)
+    assert service.counts(alice) == (1, 0) and service.counts(bob) == (0, 1)
+    assert _timeline(alice) == [post.id]
+    assert [(n.user_id, n.kind, n.actor_id) for n in Notification.query.all()] == \
+        [(bob.id, Notification.KIND_FOLLOW, alice.id)]
+
+
+def test_follow_rejects_self_and_duplicates(app):
+    alice, bob = _user('alice'), _user('bob')
+    service = _service()
+
+    assert not service.follow(alice, alice)[0]
+    assert service.follow(alice, bob)[0]
+    assert not service.follow(alice, bob)[0]
+    assert Follow.query.count() == 1
+
+
+def test_unfollow_removes_posts_and_edge(app):
+    alice, bob = _user('alice'), _user('bob')
+    db.session.add(Post(body='hello', author=bob))
+    db.session.commit()
+    service = _service()
+    service.follow(alice, bob)
+
+    assert service.unfollow(alice, bob)[0]
+
+    assert not service.is_following(alice, bob)
+    assert service.counts(alice) == (0, 0) and service.counts(bob) == (0, 0)
+    assert _timeline(alice) == []
+    assert not service.unfollow(alice, bob)[0]
+
+
+def test_suggestions_rank_users_followed_by_followees(app):
+    me, a, b, c, x, y, z = [_user(name) for name in ('me', 'a', 'b', 'c', 'x', 'y', 'z')]
+    service = _service()
+    for followee in (a, b, c):
+        service.follow(me, followee)
+    # y は3人、x は2人、z は1人のフォロー先からフォローされている。me・フォロー済みの a は除外する
+    for follower, followees in ((a, [x, y]), (b, [x, y, me]), (c, [y, z, a])):
+        for followee in followees:
+            service.follow(follower, followee)
+
+    assert [user.username for user in service.suggestions(me)] == ['y', 'x', 'z']
+    assert [user.username for user in service.suggestions(me, limit=1)] == ['y']
+    assert service.suggestions(z) == []
+
+
+def test_other_workers_changes_are_picked_up_after_ttl(app, monkeypatch):
+    alice, bob = _user('alice'), _user('bob')
+    now = [1000.0]
+    monkeypatch.setattr('app.cache.time.monotonic', lambda: now[0])
+    assert len(follow_graph.followees(alice.id)) == 0
+    # 別のワーカーでフォローされた場合
+    db.session.add(Follow(follower_id=alice.id, followee_id=bob.id))
+    db.session.commit()
+
+    now[0] += app.config['FOLLOW_GRAPH_TTL'] + 1
+
+    assert follow_graph.followees(alice.id).tolist() == [bob.id]
+
+
+class SharedCache:
+    """ワーカー間で共有されるキャッシュ（値はRedisCacheと同様にJSONで保存する）"""
+
+    stores = {}
+
+    def __init__(self, url, namespace, max_entries, default_ttl, max_bytes=None):
+        self.data = self.stores.setdefault((url, namespace), {})
+
+    def get(self, key):
+        raw = self.data.get(key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = json.dumps(value)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    SharedCache.stores = {}
+    monkeypatch.setattr(follow_graph_module, 'create_cache', SharedCache)
+
+    class SharedGraphConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'shared.db'}"
+        FOLLOW_GRAPH_URL = 'redis://cache:6379/0'
+        FOLLOW_GRAPH_TTL = 300
+
+    # 同じデータベースと共有キャッシュを参照する2つのワーカー
+    worker_a, worker_b = create_app(SharedGraphConfig), create_app(SharedGraphConfig)
+    with worker_a.app_context():
+        db.create_all()
+    yield worker_a, worker_b
+    with worker_a.app_context():
+        db.drop_all()
+
+
+def test_shared_backend_reflects_follow_on_other_workers(workers):
+    worker_a, worker_b = workers
+    with worker_a.app_context():
+        alice_id, bob_id = _user('alice').id, _user('bob').id
+
+    with worker_b.app_context():
+        assert follow_graph.followees(alice_id).tolist() == []
+        assert follow_graph.followers(bob_id).tolist() == []
+    with worker_a.app_context():
+        alice, bob = db.session.get(User, alice_id), db.session.get(User, bob_id)
+        assert _service().follow(alice, bob)[0]
+    with worker_b.app_context():
+        assert follow_graph.followees(alice_id).tolist() == [bob_id]
+        assert follow_graph.followers(bob_id).tolist() == [alice_id]
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from app.repository.last_seen_buffer import LastSeenBuffer
+
+
+def test_touch_keeps_pending_when_write_fails(app, monkeypatch):
+    app.config['LAST_SEEN_FLUSH_THRESHOLD'] = 1
+    buffer = LastSeenBuffer()
+
+    def fail(pending):
+        raise RuntimeError('database is unavailable')
+
+    monkeypatch.setattr(buffer, '_write', fail)
+    seen_at = datetime(2024, 1, 1)
+
+    # 書き込みエラーは呼び出し元（リクエスト）に伝わらない
+    buffer.touch(1, seen_at)
+
+    assert buffer._pending == {1: seen_at}
+
+
+def test_write_errors_are_logged(app, monkeypatch, caplog):
+    app.config['LAST_SEEN_FLUSH_THRESHOLD'] = 1
+    buffer = LastSeenBuffer()
+
+    def fail(pending):
+        raise RuntimeError('database is unavailable')
+
+    monkeypatch.setattr(buffer, '_write', fail)
+
+    buffer.touch(1, datetime(2024, 1, 1))
+
+    assert '最終アクセス日時の書き込みエラー' in caplog.text
+
+
+def test_init_app_registers_exit_hook_once(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr('app.repository.last_seen_buffer.atexit.register', registered.append)
+    buffer = LastSeenBuffer()
+
+    buffer.init_app(app)
+    buffer.init_app(app)
+
+    assert len(registered) == 1
+    assert buffer._app is app
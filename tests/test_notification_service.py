@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.email_outbox import EmailOutbox
+from app.models.notification import Notification
+from app.models.user import User
+from app.repository.notification_repository import NotificationRepository
+from app.repository.user_repository import UserRepository
+from app.services.email_service import EmailService
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def service(app):
+    return NotificationService(NotificationRepository(), UserRepository(), EmailService())
+
+
+def _user_with_notification(email):
+    user = User(email=email, username=email.split('@')[0], email_verified=True,
+                notification_frequency='daily')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(Notification(user_id=user.id, kind=Notification.KIND_FOLLOW,
+                                created_at=datetime.utcnow() - timedelta(days=2)))
+    db.session.commit()
+    return user
+
+
+def _pending(user):
+    return Notification.query.filter_by(user_id=user.id, digested_at=None).count()
+
+
+def test_failed_digest_stays_pending(app, service, monkeypatch):
+    ok, failing = _user_with_notification('ok@example.com'), _user_with_notification('fail@example.com')
+    deliver_many = EmailService.deliver_many
+
+    def flaky(messages, raise_errors=False):
+        assert raise_errors
+        if messages[0].recipients == ['fail@example.com']:
+            raise ConnectionError('provider unavailable')
+        deliver_many(messages, raise_errors=raise_errors)
+
+    monkeypatch.setattr(EmailService, 'deliver_many', staticmethod(flaky))
+
+    assert service.send_digests(batch_size=1) == 1
+    assert _pending(ok) == 0
+    assert _pending(failing) == 1
+    assert [message.to for message in app.extensions['mailman'].outbox] == [['ok@example.com']]
+
+    # 次回の実行で再送する
+    monkeypatch.setattr(EmailService, 'deliver_many', staticmethod(deliver_many))
+    assert service.send_digests() == 1
+    assert _pending(failing) == 0
+
+
+def test_outbox_enqueues_with_digest_marking(app, service):
+    app.config['EMAIL_OUTBOX_ENABLED'] = True
+    user = _user_with_notification('queued@example.com')
+
+    assert service.send_digests() == 1
+    assert _pending(user) == 0
+    assert EmailOutbox.query.count() == 1
+    assert not getattr(app.extensions['mailman'], 'outbox', [])
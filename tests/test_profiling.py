@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from app import create_app
+from app.profiling import aggregate_profiles
+from tests.conftest import TestConfig
+
+
+def _busy():
+    end = time.perf_counter() + 0.2
+    while time.perf_counter() < end:
+        pass
+    return 'ok'
+
+
+def test_slow_request_writes_collapsed_stacks(tmp_path):
+    class ProfileConfig(TestConfig):
+        PROFILE_ENABLED = True
+        PROFILE_SAMPLE_RATE = 0.0
+        PROFILE_SLOW_MS = 50
+        PROFILE_INTERVAL_MS = 2
+        PROFILE_DIR = str(tmp_path)
+
+    app = create_app(ProfileConfig)
+    app.add_url_rule('/busy', 'busy', _busy)
+
+    assert app.test_client().get('/busy').status_code == 200
+
+    stacks = aggregate_profiles(str(tmp_path), 'busy')
+    assert sum(stacks.values()) > 0
+    assert any('_busy (' in stack for stack in stacks)
+
+
+GEVENT_SCRIPT = textwrap.dedent('''
+    from gevent import monkey
+    monkey.patch_all()
+
+    import sys
+    import time
+
+    import gevent
+
+    from app import create_app
+    from tests.conftest import TestConfig
+
+
+    class ProfileConfig(TestConfig):
+        PROFILE_ENABLED = True
+        PROFILE_SAMPLE_RATE = 0.0
+        PROFILE_SLOW_MS = 50
+        PROFILE_INTERVAL_MS = 2
+        PROFILE_DIR = sys.argv[1]
+
+
+    def busy():
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end:
+            pass
+        return 'ok'
+
+
+    def waiting():
+        gevent.sleep(0.2)
+        return 'ok'
+
+
+    app = create_app(ProfileConfig)
+    app.add_url_rule('/busy', 'busy', busy)
+    app.add_url_rule('/waiting', 'waiting', waiting)
+    client = app.test_client()
+    # gevent ワーカーと同様に、リクエストをグリーンレットで同時に処理する
+    jobs = [gevent.spawn(client.get, '/busy'), gevent.spawn(client.get, '/waiting')]
+    gevent.joinall(jobs, raise_error=True)
+    assert all(job.value.status_code == 200 for job in jobs)
+''')
+
+
+def test_greenlet_requests_write_collapsed_stacks(tmp_path):
+    pytest.importorskip('gevent')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+
+    subprocess.run([sys.executable, '-c', GEVENT_SCRIPT, str(tmp_path)],
+                   cwd=root, env=env, check=True, timeout=60)
+
+    busy = aggregate_profiles(str(tmp_path), 'busy')
+    waiting = aggregate_profiles(str(tmp_path), 'waiting')
+    # CPUを使い続けるグリーンレットの処理中も記録される
+    assert any('busy (' in stack for stack in busy)
+    # 待機中のグリーンレットは待機している箇所が記録される
+    assert any('waiting (' in stack for stack in waiting)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.user import User
+from app.repository.user_repository import UserRepository
+from app.services.auth_service import AuthService
+from app.services.email_service import EmailService
+from app.services.purge_service import PurgeService
+
+
+def _abandoned(email, days=30):
+    user = UserRepository.create_user(email)
+    user.created_at = datetime.utcnow() - timedelta(days=days)
+    db.session.commit()
+    return user
+
+
+@pytest.mark.parametrize('mode', ['signed', 'random'])
+def test_purge_keeps_user_who_registered_again(app, mode):
+    app.config['VERIFICATION_TOKEN_MODE'] = mode
+    user = _abandoned('again@example.com')
+    user_id = user.id
+
+    with app.test_request_context():
+        success, _, _ = AuthService(UserRepository(), EmailService()).register_user('again@example.com')
+    assert success
+
+    deleted, _ = PurgeService(UserRepository()).purge(pause=0)
+
+    assert deleted == 0
+    assert db.session.get(User, user_id) is not None
+
+
+def test_purge_deletes_abandoned_users_with_expired_tokens(app):
+    expired = _abandoned('expired@example.com')
+    expired.verification_token_expires_at = datetime.utcnow() - timedelta(days=1)
+    _abandoned('never@example.com')
+    recent = UserRepository.create_user('recent@example.com')
+    db.session.commit()
+
+    deleted, _ = PurgeService(UserRepository()).purge(pause=0)
+
+    assert deleted == 2
+    assert [user.email for user in User.query.all()] == [recent.email]
+
+
+def test_purge_runs_in_batches_and_pauses_between_them(app, monkeypatch):
+    for i in range(5):
+        _abandoned(f'abandoned{i}@example.com')
+    calls, sleeps = [], []
+    delete = UserRepository.delete_unverified_before
+
+    def counting_delete(*args, **kwargs):
+        calls.append(args)
+        return delete(*args, **kwargs)
+
+    monkeypatch.setattr(UserRepository, 'delete_unverified_before', staticmethod(counting_delete))
+    monkeypatch.setattr('app.services.purge_service.time.sleep', sleeps.append)
+
+    deleted, _ = PurgeService(UserRepository()).purge(batch_size=2, pause=0.5)
+
+    assert deleted == 5
+    # 2件, 2件, 1件 の3バッチで、満杯のバッチの後にだけ待機する
+    assert len(calls) == 3
+    assert sleeps == [0.5, 0.5]
+    assert User.query.count() == 0
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from app import create_app
+from app.query_plans import _query_cases, check_query_plans
+from tests.conftest import TestConfig
+
+
+CASE_NAMES = [name for name, _ in _query_cases()]
+
+
+def _assert_plans_ok(results):
+    assert [result.name for result in results] == CASE_NAMES
+    failures = {result.name: result.plans for result in results if not result.ok}
+    assert not failures
+
+
+def test_query_plans_sqlite(app):
+    _assert_plans_ok(check_query_plans())
+
+
+@pytest.mark.skipif(not (os.environ.get('DATABASE_URL') or '').startswith('postgresql'),
+                    reason='DATABASE_URL に PostgreSQL（`flask db upgrade` 適用済み）を指定した場合のみ実行')
+def test_query_plans_postgresql():
+    class PostgresConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+
+    # スキーマはマイグレーションで作成済みのものを使い、検査は終了時にロールバックする
+    app = create_app(PostgresConfig)
+    with app.app_context():
+        _assert_plans_ok(check_query_plans())
@@ -0,0 +1,94 @@
+import pytest
+
+from app import create_app, db
+from app.rate_limit import MemoryTokenBucket, parse_rule
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('app.rate_limit.time.monotonic', lambda: now[0])
+    return now
+
+
+def test_bucket_allows_burst_up_to_capacity(clock):
+    bucket = MemoryTokenBucket()
+    capacity, rate = parse_rule('3/60')
+
+    results = [bucket.consume('ip:1', capacity, rate) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    # 1トークンの補充に20秒かかる
+    assert results[-1][1] == pytest.approx(20)
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = MemoryTokenBucket()
+    capacity, rate = parse_rule('3/60')
+    for _ in range(3):
+        bucket.consume('ip:1', capacity, rate)
+
+    clock[0] += 19
+    assert not bucket.consume('ip:1', capacity, rate)[0]
+    clock[0] += 1
+    assert bucket.consume('ip:1', capacity, rate)[0]
+    # 補充は容量を超えない
+    clock[0] += 3600
+    assert [bucket.consume('ip:1', capacity, rate)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_buckets_are_isolated_per_key(clock):
+    bucket = MemoryTokenBucket()
+    capacity, rate = parse_rule('1/60')
+
+    assert bucket.consume('ip:1', capacity, rate)[0]
+    assert not bucket.consume('ip:1', capacity, rate)[0]
+    assert bucket.consume('ip:2', capacity, rate)[0]
+    assert bucket.consume('email:a@example.com', capacity, rate)[0]
+
+
+def test_register_returns_429_with_retry_after(app, clock):
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_AUTH_PER_IP='2/60')
+    client = app.test_client()
+
+    statuses = [client.post('/auth/register', data={'email': f'user{i}@example.com'}).status_code
+                for i in range(3)]
+
+    assert statuses == [302, 302, 429]
+    response = client.post('/auth/register', data={'email': 'late@example.com'})
+    assert response.headers['Retry-After'] == '30'
+
+
+def test_login_is_limited_per_email(app, clock):
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_AUTH_PER_EMAIL='1/600')
+    client = app.test_client()
+
+    assert client.post('/auth/login', data={'email': 'a@example.com'}).status_code != 429
+    assert client.post('/auth/login', data={'email': 'A@example.com '}).status_code == 429
+    assert client.post('/auth/login', data={'email': 'b@example.com'}).status_code != 429
+
+
+class ProxiedConfig(TestConfig):
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_AUTH_PER_IP = '1/60'
+    PROXY_FIX_X_FOR = 1
+
+
+def test_clients_behind_proxy_get_separate_buckets(clock):
+    app = create_app(ProxiedConfig)
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+
+        def post(ip):
+            return client.post('/auth/login', data={'email': ''},
+                               headers={'X-Forwarded-For': ip}).status_code
+
+        try:
+            assert post('203.0.113.1') != 429
+            assert post('203.0.113.2') != 429
+            assert post('203.0.113.1') == 429
+        finally:
+            db.session.remove()
+            db.drop_all()
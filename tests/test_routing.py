@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from flask import session
+
+from app import create_app, db
+from app.models.user import User
+from app.repository.user_repository import UserRepository
+from app.routing import STICKY_SESSION_KEY, replica_read
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_REPLICA_URIS = [f"sqlite:///{tmp_path / 'replica.db'}"]
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica_0'])
+        # レプリカにのみ存在するユーザー（プライマリとの区別に使う）
+        with db.engines['replica_0'].begin() as connection:
+            connection.execute(User.__table__.insert().values(email='replica@example.com'))
+        yield app
+        db.session.remove()
+    # init_app で共有の db に登録されたレプリカ用のメタデータを他のテストに残さない
+    db.metadatas.pop('replica_0', None)
+
+
+def test_reads_inside_replica_read_use_replica(app):
+    with replica_read():
+        assert User.query.filter_by(email='replica@example.com').first() is not None
+    assert User.query.filter_by(email='replica@example.com').first() is None
+    assert UserRepository.find_by_email('replica@example.com') is not None
+
+
+def test_reads_after_write_use_primary(app):
+    with app.test_request_context():
+        db.session.add(User(email='primary@example.com'))
+        db.session.commit()
+
+        # 同じセッション内で書き込んだ後はプライマリを読む
+        assert UserRepository.find_by_email('primary@example.com') is not None
+        assert UserRepository.find_by_email('replica@example.com') is None
+
+
+def test_sticky_session_uses_primary(app):
+    with app.test_request_context():
+        assert UserRepository.find_by_email('replica@example.com') is not None
+
+        session[STICKY_SESSION_KEY] = time.time() + 30
+        assert UserRepository.find_by_email('replica@example.com') is None
+
+        session[STICKY_SESSION_KEY] = time.time() - 1
+        assert UserRepository.find_by_email('replica@example.com') is not None
+
+
+def test_find_by_verification_token_uses_primary(app):
+    user = User(email='verify@example.com')
+    db.session.add(user)
+    db.session.commit()
+    token = UserRepository.generate_verification_token(user)
+    # 書き込みの記録を持たない新しいセッションで検証する（レプリカには反映されていない）
+    db.session.remove()
+
+    found = UserRepository.find_by_verification_token(token)
+
+    assert found is not None
+    assert found.email == 'verify@example.com'
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from app import create_app, db
+from app.models.search import SQLITE_TRIGRAM_AVAILABLE
+from app.models.user import Post, User
+from app.repository import search_repository
+from app.repository.search_repository import SearchRepository
+from app.services.search_service import SearchService
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def author(app):
+    user = User(email='author@example.com', username='author', email_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _post(author, body):
+    post = Post(body=body, author=author)
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def _search(query, page=1):
+    posts, has_next = SearchService(SearchRepository()).search(query, page)
+    return [post.body for post in posts], has_next
+
+
+@pytest.fixture(params=['bigram', 'trigram'])
+def index(request, monkeypatch):
+    if request.param == 'trigram' and not SQLITE_TRIGRAM_AVAILABLE:
+        pytest.skip('FTS5 の trigram トークナイザが使えない')
+    monkeypatch.setattr(search_repository, 'SQLITE_TRIGRAM_AVAILABLE', request.param == 'trigram')
+    return request.param
+
+
+def test_bigram_false_positives_are_filtered(app, author, index):
+    # "ab" "bc" の両方を含むが "abc" を含まない投稿は一致しない
+    _post(author, 'bc ab')
+    _post(author, 'xabcx')
+
+    assert _search('abc') == (['xabcx'], False)
+    assert sorted(_search('ab')[0]) == ['bc ab', 'xabcx']
+
+
+def test_short_terms_use_bigram_index(app, author):
+    _post(author, 'とうきょう')
+    _post(author, 'きょうと')
+
+    assert sorted(_search('きょ')[0]) == ['きょうと', 'とうきょう']
+    assert sorted(_search('と')[0]) == ['きょうと', 'とうきょう']
+
+
+def test_full_width_query_matches_normalized_body(app, author):
+    _post(author, 'Flask でSNS')
+
+    assert _search('ｆｌａｓｋ')[0] == ['Flask でSNS']
+
+
+def test_pages_are_filled_after_filtering(app, author, index):
+    app.config['SEARCH_PAGE_SIZE'] = 2
+    # n-gramのみ一致する投稿を挟んでも、各ページが埋まる
+    for i in range(3):
+        _post(author, f'abc{i}')
+        _post(author, 'ab bc')
+
+    first, has_next = _search('abc')
+    second, has_more = _search('abc', page=2)
+
+    assert len(first) == 2 and has_next
+    assert len(second) == 1 and not has_more
+    assert sorted(first + second) == ['abc0', 'abc1', 'abc2']
+
+
+@pytest.mark.skipif(not SQLITE_TRIGRAM_AVAILABLE, reason='FTS5 の trigram トークナイザが使えない')
+def test_fts_index_follows_updates_and_deletes(app, author):
+    post = _post(author, 'hello world')
+    assert SearchRepository.find_post_ids_fts(['hello'], 10) == [post.id]
+
+    post.body = 'goodbye world'
+    db.session.commit()
+    assert SearchRepository.find_post_ids_fts(['hello'], 10) == []
+    assert SearchRepository.find_post_ids_fts(['goodbye'], 10) == [post.id]
+
+    db.session.delete(post)
+    db.session.commit()
+    assert SearchRepository.find_post_ids_fts(['world'], 10) == []
+
+
+# 短い（検索語に近い）本文ほど上位になる。作成順とは異なる順位になるように並べる
+RANKED_BODIES = [
+    'we walked to the tokyo tower and then had a long dinner nearby',
+    'tokyo tower',
+    'tokyo tower at night',
+]
+EXPECTED_RANKING = ['tokyo tower', 'tokyo tower at night', RANKED_BODIES[0]]
+
+
+@pytest.mark.skipif(not SQLITE_TRIGRAM_AVAILABLE, reason='FTS5 の trigram トークナイザが使えない')
+def test_trigram_results_are_ranked_sqlite(app, author):
+    for body in RANKED_BODIES:
+        _post(author, body)
+
+    assert _search('Tokyo Tower')[0] == EXPECTED_RANKING
+
+
+@pytest.mark.skipif(not (os.environ.get('DATABASE_URL') or '').startswith('postgresql'),
+                    reason='DATABASE_URL に PostgreSQL（`flask db upgrade` 適用済み）を指定した場合のみ実行')
+def test_trigram_results_are_ranked_postgresql():
+    class PostgresConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+
+    # スキーマはマイグレーションで作成済みのものを使い、作成した投稿は終了時にロールバックする
+    app = create_app(PostgresConfig)
+    with app.app_context():
+        try:
+            author = User(email='ranking@example.com', username='ranking_author', email_verified=True)
+            db.session.add(author)
+            for body in RANKED_BODIES:
+                db.session.add(Post(body=body, author=author))
+            db.session.flush()
+
+            post_ids = SearchRepository.find_post_ids_trigram(['tokyo', 'tower'], 10)
+            bodies = SearchRepository.find_bodies(post_ids)
+            assert [bodies[post_id] for post_id in post_ids][:3] == EXPECTED_RANKING
+        finally:
+            db.session.rollback()
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from app import db
+from app.models.user import User
+from app.repository.user_repository import UserRepository
+
+
+@pytest.fixture
+def signed(app):
+    app.config['VERIFICATION_TOKEN_MODE'] = 'signed'
+    return app
+
+
+def test_signed_token_finds_user(signed):
+    user = UserRepository.create_user('signed@example.com')
+    token = UserRepository.generate_verification_token(user)
+
+    assert UserRepository.find_by_verification_token(token) is user
+
+
+def test_signed_token_is_single_use(signed):
+    user = UserRepository.create_user('signed@example.com')
+    token = UserRepository.generate_verification_token(user)
+
+    UserRepository.mark_email_verified(user)
+
+    assert UserRepository.find_by_verification_token(token) is None
+
+
+def test_signed_token_expires(signed, monkeypatch):
+    user = UserRepository.create_user('signed@example.com')
+    token = UserRepository.generate_verification_token(user, expires_in=60)
+    now = time.time()
+
+    monkeypatch.setattr('app.models.user.time.time', lambda: now + 61)
+
+    assert UserRepository.find_by_verification_token(token) is None
+
+
+def test_signed_token_with_bad_signature_is_rejected(signed):
+    user = UserRepository.create_user('signed@example.com')
+    token = UserRepository.generate_verification_token(user)
+    payload, signature = token.rsplit('.', 1)
+    forged = payload + '.' + ('A' if signature[0] != 'A' else 'B') + signature[1:]
+
+    assert UserRepository.find_by_verification_token(forged) is None
+
+    signed.config['SECRET_KEY'] = 'rotated-secret'
+    assert UserRepository.find_by_verification_token(token) is None
+
+
+def test_signed_token_is_not_accepted_for_reused_user_id(signed):
+    purged = UserRepository.create_user('purged@example.com')
+    user_id = purged.id
+    token = UserRepository.generate_verification_token(purged)
+    db.session.delete(purged)
+    db.session.commit()
+
+    # SQLite は最大のIDが削除されると同じIDを再利用する
+    newcomer = UserRepository.create_user('newcomer@example.com')
+    assert newcomer.id == user_id and newcomer.token_version == 0
+
+    assert UserRepository.find_by_verification_token(token) is None
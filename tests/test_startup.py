@@ -0,0 +1,18 @@
+from app.config import Config
+from app.startup import measure_cold_start
+
+
+def test_cold_start_within_budget(monkeypatch):
+    # 起動時は接続しないため、データベースドライバの有無に依存しないよう SQLite を指定する
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    report = measure_cold_start(runs=3)
+
+    assert report.median_ms <= Config.STARTUP_BUDGET_MS, report.imports_ms[:10]
+    # alembic（Flask-Migrate）は `flask db` の初回利用時まで読み込まない
+    assert not any(name in ('alembic', 'flask_migrate') for name, _ in report.imports_ms)
+
+
+def test_migrate_is_exported_lazily():
+    from app import migrate
+
+    assert migrate.db is not None
@@ -0,0 +1,93 @@
+import pytest
+from flask_login import FlaskLoginClient
+from sqlalchemy import event
+
+from app import db
+from app.models.user import User
+from app.repository.follow_repository import FollowRepository
+from app.repository.timeline_repository import TimelineRepository
+from app.repository.user_repository import UserRepository
+from app.services.follow_service import FollowService
+from app.services.timeline_service import TimelineService
+
+
+def _user(name):
+    user = User(email=f'{name}@example.com', username=name, email_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def users(app):
+    return _user('reader'), _user('author')
+
+
+@pytest.fixture
+def client(app, users):
+    app.test_client_class = FlaskLoginClient
+    return app.test_client(user=users[0])
+
+
+def _publish(author, body):
+    TimelineService(TimelineRepository()).publish(author, body)
+
+
+def _follow(user, target):
+    FollowService(FollowRepository(), UserRepository(), TimelineRepository()).follow(user, target)
+
+
+def test_response_headers(client, users):
+    response = client.get('/home.json')
+
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert 'Cookie' in response.vary
+
+
+def test_matching_etag_returns_304_without_loading_posts(app, client, users):
+    reader, author = users
+    _follow(reader, author)
+    _publish(author, 'hello')
+    etag = client.get('/home.json').headers['ETag']
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get('/home.json', headers={'If-None-Match': etag})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert 'Cookie' in response.vary
+    # 投稿の本文は読み込まない
+    assert not [statement for statement in statements if 'post.body' in statement]
+
+
+def test_new_post_changes_etag(client, users):
+    reader, author = users
+    _follow(reader, author)
+    etag = client.get('/home.json').headers['ETag']
+
+    _publish(author, 'new post')
+    response = client.get('/home.json', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [post['body'] for post in response.get_json()['posts']] == ['new post']
+
+
+def test_follow_changes_etag(client, users):
+    reader, author = users
+    etag = client.get('/home.json').headers['ETag']
+
+    # 投稿のない投稿者をフォローした場合もフォロー先が変わるため変更とみなす
+    _follow(reader, author)
+    response = client.get('/home.json', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
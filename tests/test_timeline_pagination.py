@@ -0,0 +1,95 @@
+import base64
+from datetime import datetime
+
+import pytest
+from flask_login import FlaskLoginClient
+
+from app import db
+from app.models.timeline import TimelineEntry
+from app.models.user import User, Post
+from app.repository.timeline_repository import TimelineRepository
+from app.services.timeline_service import TimelineService, encode_cursor, decode_cursor
+
+
+def _user(email):
+    user = User(email=email, username=email.split('@')[0], email_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _publish(service, author, count, timestamp=None):
+    posts = [service.publish(author, f'post {i}')[2] for i in range(count)]
+    if timestamp is not None:
+        # 同じ投稿日時の投稿をページ境界に並べる
+        ids = [post.id for post in posts]
+        db.session.execute(db.update(Post).where(Post.id.in_(ids)).values(timestamp=timestamp))
+        db.session.execute(db.update(TimelineEntry).where(TimelineEntry.post_id.in_(ids))
+                           .values(timestamp=timestamp))
+        db.session.commit()
+        db.session.expire_all()
+    return posts
+
+
+def _read_all(service, user, limit):
+    seen, cursor = [], None
+    while True:
+        posts, cursor = service.home_timeline(user, cursor, limit=limit)
+        seen.extend(post.id for post in posts)
+        if cursor is None:
+            return seen
+
+
+def test_cursor_round_trip(app):
+    post = Post(id=42, timestamp=datetime(2024, 1, 2, 3, 4, 5, 678901))
+
+    assert decode_cursor(encode_cursor(post)) == (post.timestamp, 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-base64!',
+    base64.urlsafe_b64encode(b'no-separator').decode('ascii'),
+    base64.urlsafe_b64encode(b'2024-13-01T00:00:00|1').decode('ascii'),
+    base64.urlsafe_b64encode(b'2024-01-01T00:00:00|abc').decode('ascii'),
+    base64.urlsafe_b64encode(b'2024-01-01T00:00:00+09:00|1').decode('ascii'),
+    base64.urlsafe_b64encode(b'2024-01-01T00:00:00|' + b'9' * 30).decode('ascii'),
+    'カーソル',
+])
+def test_decode_rejects_malformed_cursor(app, cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_pages_through_identical_timestamps_without_gaps(app):
+    service = TimelineService(TimelineRepository())
+    author = _user('author@example.com')
+    posts = _publish(service, author, 7, timestamp=datetime(2024, 1, 1))
+
+    seen = _read_all(service, author, limit=3)
+
+    assert seen == sorted((post.id for post in posts), reverse=True)
+
+
+def test_new_posts_between_pages_do_not_shift_pages(app):
+    service = TimelineService(TimelineRepository())
+    author = _user('author@example.com')
+    posts = _publish(service, author, 5)
+
+    first, cursor = service.home_timeline(author, limit=2)
+    _publish(service, author, 3)
+    rest = []
+    while cursor is not None:
+        page, cursor = service.home_timeline(author, cursor, limit=2)
+        rest.extend(post.id for post in page)
+
+    # 新しい投稿は含まれず、既存の投稿は重複も欠落もない
+    assert [post.id for post in first] + rest == sorted((post.id for post in posts), reverse=True)
+
+
+def test_malformed_cursor_is_rejected_with_400(app):
+    user = _user('reader@example.com')
+    app.test_client_class = FlaskLoginClient
+    client = app.test_client(user=user)
+
+    for path in ('/home', '/home.json', '/users/reader'):
+        assert client.get(path, query_string={'cursor': 'garbage!'}).status_code == 400
+    assert client.get('/home.json').status_code == 200
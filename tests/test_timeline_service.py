@@ -0,0 +1,44 @@
+from app import db
+from app.models.follow import Follow
+from app.models.timeline import TimelineEntry
+from app.models.user import User
+from app.repository.follow_graph import follow_graph
+from app.repository.timeline_repository import TimelineRepository
+from app.services.timeline_service import TimelineService
+
+
+def _user(email):
+    user = User(email=email, username=email.split('@')[0], email_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _recipients(post):
+    return sorted(entry.user_id for entry in TimelineEntry.query.filter_by(post_id=post.id))
+
+
+def test_publish_fans_out_to_followers_missing_from_cache(app):
+    author, follower = _user('author@example.com'), _user('follower@example.com')
+    # フォロワーがいない状態をキャッシュに載せた後、別のワーカーでフォローされた場合
+    assert len(follow_graph.followers(author.id)) == 0
+    db.session.add(Follow(follower_id=follower.id, followee_id=author.id))
+    db.session.commit()
+
+    success, _, post = TimelineService(TimelineRepository()).publish(author, 'hello')
+
+    assert success and post.fanned_out
+    assert _recipients(post) == sorted([author.id, follower.id])
+
+
+def test_publish_over_fanout_limit_is_not_fanned_out(app):
+    app.config['TIMELINE_FANOUT_LIMIT'] = 1
+    author = _user('popular@example.com')
+    for i in range(2):
+        db.session.add(Follow(follower_id=_user(f'fan{i}@example.com').id, followee_id=author.id))
+    db.session.commit()
+
+    success, _, post = TimelineService(TimelineRepository()).publish(author, 'hello')
+
+    assert success and not post.fanned_out
+    assert _recipients(post) == [author.id]
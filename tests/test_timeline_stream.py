@@ -0,0 +1,48 @@
+import pytest
+from flask_login import FlaskLoginClient
+
+from app import create_app, db
+from app.models.user import User
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def client(app):
+    user = User(email='reader@example.com', username='reader', email_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    app.test_client_class = FlaskLoginClient
+    return app.test_client(user=user)
+
+
+def test_stream_is_disabled_by_default(app, client):
+    assert app.config['STREAM_ENABLED'] is False
+    assert client.get('/home/stream').status_code == 404
+    assert b'EventSource' not in client.get('/home').data
+
+
+def test_stream_when_enabled(app, client):
+    app.config['STREAM_ENABLED'] = True
+
+    assert b'EventSource' in client.get('/home').data
+    response = client.get('/home/stream')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert next(response.response) == b'retry: 5000\n\n'
+    response.close()
+
+
+def test_in_process_hub_is_refused_with_multiple_workers():
+    class MultiWorkerConfig(TestConfig):
+        STREAM_ENABLED = True
+        STREAM_URL = None
+        WEB_CONCURRENCY = 4
+
+    with pytest.raises(RuntimeError, match='STREAM_URL'):
+        create_app(MultiWorkerConfig)
+
+    # 単一ワーカー、または配信を無効にしている場合は起動できる
+    MultiWorkerConfig.WEB_CONCURRENCY = 1
+    create_app(MultiWorkerConfig)
+    MultiWorkerConfig.STREAM_ENABLED, MultiWorkerConfig.WEB_CONCURRENCY = False, 4
+    create_app(MultiWorkerConfig)
@@ -0,0 +1,79 @@
+import importlib
+
+import pytest
+
+from app import config, db
+from app.models.user import User
+from app.repository.unit_of_work import unit_of_work
+from app.repository.user_cache import user_cache
+from app.repository.user_repository import UserRepository
+from app.services.auth_service import AuthService
+from app.services.email_service import EmailService
+
+
+@pytest.fixture
+def cached_user(app):
+    app.config['USER_CACHE_ENABLED'] = True
+    app.config['VERIFICATION_TOKEN_MODE'] = 'random'
+    user = UserRepository.create_user('cached@example.com')
+    user_id = user.id
+    db.session.expunge_all()
+    # 1回目の読み込みでスナップショットがキャッシュに載る
+    user = user_cache.load(user_id)
+    assert user_cache.backend.get(str(user_id)) is not None
+    return user
+
+
+def _cached(user_id):
+    return user_cache.backend.get(str(user_id))
+
+
+def test_cache_is_enabled_by_default_only_with_shared_backend(monkeypatch):
+    monkeypatch.delenv('USER_CACHE_ENABLED', raising=False)
+    monkeypatch.delenv('USER_CACHE_URL', raising=False)
+    try:
+        assert not importlib.reload(config).Config.USER_CACHE_ENABLED
+        monkeypatch.setenv('USER_CACHE_URL', 'redis://cache:6379/0')
+        assert importlib.reload(config).Config.USER_CACHE_ENABLED
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+
+@pytest.mark.parametrize('write', [
+    lambda user: UserRepository.save(user),
+    lambda user: UserRepository.update_username(user, 'renamed'),
+    lambda user: UserRepository.mark_email_verified(user),
+    lambda user: UserRepository.generate_verification_token(user),
+], ids=['save', 'update_username', 'mark_email_verified', 'generate_verification_token'])
+def test_write_methods_invalidate_cache(app, cached_user, write):
+    write(cached_user)
+
+    assert _cached(cached_user.id) is None
+
+
+def test_invalidation_waits_for_unit_of_work_commit(app, cached_user):
+    with unit_of_work():
+        UserRepository.update_username(cached_user, 'renamed')
+        assert _cached(cached_user.id) is not None
+
+    assert _cached(cached_user.id) is None
+    db.session.expunge_all()
+    assert user_cache.load(cached_user.id).username == 'renamed'
+
+
+def test_retried_setup_with_stale_snapshot_succeeds(app, cached_user):
+    user_id = cached_user.id
+    UserRepository.mark_email_verified(cached_user)
+    user_cache.load(user_id)
+    # 別のワーカーでユーザー名が設定され、このワーカーのキャッシュは古いままの場合
+    db.session.execute(db.update(User).where(User.id == user_id).values(username='alice'))
+    db.session.commit()
+    db.session.expunge_all()
+    assert user_cache.load(user_id).username is None
+
+    with app.test_request_context():
+        success, _, user = AuthService(UserRepository(), EmailService()).complete_registration(
+            user_id, 'alice')
+
+    assert success and user.username == 'alice'
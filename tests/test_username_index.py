@@ -0,0 +1,37 @@
+import threading
+import time
+
+from app.repository.username_index import UsernameIndex
+
+
+def test_concurrent_refresh_reloads_once(app, monkeypatch):
+    index = UsernameIndex()
+    index.init_app(app)
+    with app.app_context():
+        index.reload()
+    # 再読み込みの期限を過ぎた状態にする
+    app.extensions['username_index']['loaded_at'] = 0.0
+
+    reloads = []
+    original = UsernameIndex.reload
+
+    def slow_reload(self):
+        reloads.append(threading.get_ident())
+        time.sleep(0.1)
+        original(self)
+
+    monkeypatch.setattr(UsernameIndex, 'reload', slow_reload)
+    start = threading.Barrier(8)
+
+    def check():
+        with app.app_context():
+            start.wait()
+            index.might_be_taken('alice')
+
+    threads = [threading.Thread(target=check) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(reloads) == 1